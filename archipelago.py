@@ -14,18 +14,18 @@
 from time import sleep, time
 from modules import eth
 from termcolor import colored
+import numpy as np
 
 DEBUG = False
 PROCESSING = False
 
 # Globals
 START_BLOCK = 14997767 # contract deployment block (reduces block scanning)
-LATEST_BLOCK = eth.get_latest_block()
+LATEST_BLOCK = None # Pinned to the latest block at runtime unless set here
 
 # Load contracts
 ADDRESS = "0x555598409fE9A72f0A5e423245c34555F6445555"
 ROYALTY = "0x1fC12C9f68A6B0633Ba5897A40A8e61ed9274dC9"
-ARCH = eth.get_contract(ADDRESS, eth.get_contract_abi(ADDRESS))
 
 ##################################################
 def main():
@@ -34,22 +34,24 @@ def main():
     """
     print("\nStarting Archipelago analysis.")
 
+    # Pin the block for the whole run
+    latest_block = LATEST_BLOCK or eth.get_latest_block()
+
+    # Load the contract ABI from Etherscan
+    arch = eth.get_contract(ADDRESS, eth.get_contract_abi(ADDRESS))
+
     # Fetch all Transfer logs for the OGN contract since deployment
     # Due to periods of high volume, need to set block range to low value (2,000)
-    royalty_logs = get_logs(ARCH, START_BLOCK, LATEST_BLOCK, 500000)
-
-    royalty_payments = []
-    # royalty_currencies = []
-    royalty_amount = 0
+    royalty_logs = get_logs(arch, START_BLOCK, latest_block, 500000)
 
-    for log in royalty_logs:
-        recipient = log["args"]["recipient"]
+    # Pull recipient and amount into columns, amounts are kept as exact ints
+    recipients = np.array([log["args"]["recipient"] for log in royalty_logs], dtype=object)
+    amounts = np.array([log["args"]["amount"] for log in royalty_logs], dtype=object)
+    # royalty_currencies = [log["args"]["currency"] for log in royalty_logs] # Only WETH
 
-        if recipient == ROYALTY:
-            royalty_payments.append(log["logIndex"]) # Append random data to determine quantity
-            # royalty_currencies.append(log["args"]["currency"]) # Only WETH
-            tx_royalty_amount = log["args"]["amount"] / 1e18
-            royalty_amount += tx_royalty_amount
+    # Select payments to the royalty address and sum before converting to WETH
+    royalty_payments = amounts[recipients == ROYALTY]
+    royalty_amount = sum(royalty_payments) / 1e18
 
 
     
@@ -61,48 +63,11 @@ def main():
 ##################################################
 def get_logs(contract, from_block, to_block, gap=1000000):
     """
-    Function to get all transfer logs for a provided contract.
-    NOTE: This can run slowly depending on when the contract was
-    deployed and the block gap may need to be adjusted depending
-    on the activity within the collection. Designed for a specific
-    objective and is not efficient for all collections. Limited to
-    10k logs with > 2000 block range, unlimited logs with block range
-    that is <= 2,000.
+    Function to get all royalty payment logs for a provided contract.
+    Uses the shared concurrent log scanner, which splits the block
+    range up automatically during periods of high volume.
     """
-    s_time = time()
-    output = []
-
-    # Limit to how many events we can call at once, break calls into smaller chunks
-    start_block = from_block
-    end_block = to_block if (to_block - from_block) <= gap else (start_block + gap)
-
-    while True:
-        # Output processing progress
-        print("Processing: " + str(start_block) + " / " + str(to_block) + "          ", end='\r')
-
-        # Grab events from a range of blocks
-        royalty_filter = contract.events.RoyaltyPayment.createFilter(fromBlock=start_block, toBlock=end_block)
-        royalty_entries = royalty_filter.get_all_entries()
-
-        # Log
-        if DEBUG: print("Fetched: " + str(start_block) + " to " + str(end_block))
-
-        # Add events to the output list
-        output.extend(royalty_entries)
-
-        # Break loop if end_block equals the desired to_block
-        if end_block == to_block: break
-
-        # Adjust start_block to be the previous end_block
-        start_block = end_block
-
-        # Adjust end_block to the to_block if adding the gap takes us over the 
-        # desired to_block, otherwise, add the gap to the new start_block
-        end_block = to_block if (start_block + gap) > to_block else (start_block + gap)
-
-    e_time = time()
-    print(colored("\nRetrieved Events in " + str(round(e_time-s_time,2)) + "s", 'green'))
-    return output
+    return eth.get_event_logs(contract.events.RoyaltyPayment, from_block, to_block, gap)
 
 
 
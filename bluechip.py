@@ -16,7 +16,7 @@
 
 # Imports
 import sys
-import requests
+from modules import api
 
 # Globals
 KEY = "demo"
@@ -86,9 +86,7 @@ def get_data(url):
     """
     Function to fetch data from URL and return JSON
     """
-    with requests.Session() as s:
-        response = s.get(url)
-    return response.json()
+    return api.get_json(url)
 
 
 ##################################################
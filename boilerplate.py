@@ -7,8 +7,7 @@
 import os
 import sys
 import dotenv
-import requests
-from modules import data, eth
+from modules import api, data, eth
 
 dotenv.load_dotenv()
 
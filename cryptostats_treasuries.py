@@ -10,8 +10,7 @@
 """
 
 # Imports
-import requests
-from modules import data
+from modules import api, data
 
 ##################################################
 def main():
@@ -69,9 +68,7 @@ def get_data(url):
     """
     Function to fetch data from URL and return JSON
     """
-    with requests.Session() as s:
-        response = s.get(url)
-    return response.json()
+    return api.get_json(url)
 
 
 ##################################################
@@ -1,13 +1,32 @@
 #! Python3
+"""
+    File name: friends_process.py
+    Python Version: 3.9.x
+    File Details:
+        Purpose: Pull friend.tech metadata for queued users in friend_tech_user.
 
-from modules import db2
+        Notes:
+        - python friends_process.py               Process one user at a time.
+        - python friends_process.py --batch [N]   Worker mode. Claims N users at a time
+          (SELECT ... FOR UPDATE SKIP LOCKED), fetches them concurrently and writes
+          the results back in bulk. Run as many worker processes as needed.
+        - python friends_process.py --reset       Requeue users claimed by workers that
+          were killed. Only run this while no workers are running.
+        - python friends_process.py --load FILE   Queue the base addresses in FILE (one
+          per line) with COPY, streaming the file. The addresses must not be queued yet.
+"""
+
+from modules import api, db2
 from time import sleep
-import requests
+import asyncio
+import json
 import sys
 
-SESSION = requests.Session()
 API = "https://prod-api.kosetto.com/users/"
 
+BATCH_SIZE = 100 # Users claimed per batch in worker mode
+CONCURRENCY = 10 # Concurrent API requests per worker
+
 ##################################################
 def main():
     """
@@ -29,20 +48,118 @@ def main():
     else:
         db2.add_friendtech_metadata(address, metadata["id"], metadata["twitterUsername"], metadata["twitterUserId"])
 
+##################################################
+def process_batch(batch_size=BATCH_SIZE, concurrency=CONCURRENCY):
+    """
+    Function to claim a batch of unprocessed users, fetch their
+    metadata concurrently and write the results back in bulk.
+    Users that fail to fetch are released back to the queue.
+    """
+    addresses = db2.claim_friendtech_users(batch_size)
+
+    if not addresses:
+        print("No addresses to process. Sleeping for 60s...")
+        sleep(60)
+        return
+
+    print("Processing batch of " + str(len(addresses)) + " users.")
+
+    try:
+        results = asyncio.run(get_metadata_many(addresses, concurrency))
+    except BaseException:
+        db2.release_friendtech_users(addresses)
+        raise
+
+    completed = []
+    skipped = []
+    failed = []
+    for address, metadata in zip(addresses, results):
+        if metadata is None:
+            failed.append(address)
+        elif metadata.get("message") is not None:
+            skipped.append(address)
+        else:
+            completed.append((address, metadata["id"], metadata["twitterUsername"], metadata["twitterUserId"]))
+
+    db2.add_friendtech_metadata_many(completed)
+    db2.flag_friendtech_users(skipped)
+    db2.release_friendtech_users(failed)
+
+    print("Completed " + str(len(completed)) + ", skipped " + str(len(skipped)) + ", released " + str(len(failed)) + ".")
+
+    # Most requests failing usually means we're being rate limited
+    if len(failed) > len(addresses) // 2:
+        print("Too many request errors. Sleeping for 60s...")
+        sleep(60)
+
+##################################################
+def load_users(path):
+    """
+    Function to queue every base address in a file, one per
+    line, streaming the file straight into COPY.
+    """
+    with open(path) as file:
+        addresses = (line.strip() for line in file if line.strip())
+        count = db2.load_friendtech_users(addresses)
+
+    print("Queued " + str(count) + " users.")
+
+##################################################
 def get_metadata(address):
     """
     Function to fetch metadata from friend.tech API.
     """
-    response = SESSION.get(API + address)
+    try:
+        response = api.get(API + address)
+    except api.HTTPError as e:
+        print("Request Error: " + str(e.status))
+        sys.exit(0)
+
     if response.status_code in [200, 404]:
         return response.json()
     else:
         print("Request Error: " + str(response.status_code))
         sys.exit(0)
 
+##################################################
+async def get_metadata_many(addresses, concurrency=CONCURRENCY):
+    """
+    Function to fetch metadata for many users from the friend.tech
+    API with at most concurrency requests in flight. Returns a list
+    in the same order, with None for failed requests.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with api.AsyncClient() as client:
+        async def fetch(address):
+            async with semaphore:
+                try:
+                    status, text = await client.get(API + address)
+                    if status in [200, 404]:
+                        return json.loads(text)
+                    print("Request Error: " + str(status))
+                except (api.HTTPError, ValueError) as e:
+                    print("Request Error: " + str(e))
+                return None
+
+        return await asyncio.gather(*[fetch(address) for address in addresses])
+
 ##################################################
 # Runtime Entry Point
 if __name__ == "__main__":
+    args = sys.argv
 
-    while True:
-        main()
+    if len(args) > 1 and args[1] == "--reset":
+        db2.reset_friendtech_claims()
+
+    elif len(args) > 2 and args[1] == "--load":
+        load_users(args[2])
+
+    elif len(args) > 1 and args[1] == "--batch":
+        batch_size = int(args[2]) if len(args) > 2 else BATCH_SIZE
+        while True:
+            process_batch(batch_size)
+
+    else:
+        while True:
+            main()
@@ -11,14 +11,14 @@
 
 # Imports
 from time import sleep, time
-from modules import eth, config, data
+from modules import eth, config, data, columnar
 from termcolor import colored
 import sys
 
 DEBUG = False
 
 # Load latest block and create contract object with generic ABI
-BLOCK = eth.get_latest_block()
+BLOCK = None # Pinned to the latest block at runtime unless set here
 ABI = config.load("modules/abi/origin_721.json")
 
 
@@ -31,45 +31,42 @@ def main(address):
 
     print("\nStarting Contract Minter Analysis.")
 
+    # Pin the block for the whole run
+    block = BLOCK or eth.get_latest_block()
+
     # Grab deployment block from Etherscan to simplify processing
     start_block = eth.get_contract_deploy_date(address, True)
 
     # Create contract object using Origin ERC721 ABI
     contract = eth.get_contract(address, ABI)
 
-    # Get all transfer logs for the provided contract with a 50k block interval
-    transfers = eth.get_transfer_logs(contract, start_block, BLOCK, 1000)
+    # Get all transfer logs for the provided contract as a columnar batch
+    transfers = columnar.get_transfer_batch(contract, start_block, block, 1000)
 
     # Find all unique user addresses that received an NFT from burn address
     users = process_events(transfers)
 
     # Save list as a CSV
     output_path = "files/output"
-    output_name = address + "_" + str(BLOCK) + ".csv"
+    output_name = address + "_" + str(block) + ".csv"
     data.save(users, output_path, output_name, ["Address"])
 
 ##################################################
-def process_events(logs):
+def process_events(batch):
     """
-    Function to take a list of raw events and process into a list
-    of addresses for further processing.
+    Function to take a columnar batch of Transfer events and process
+    into a list of addresses for further processing.
     """
 
-    print("Preparing to process " + str(len(logs)) + " events.")
+    print("Preparing to process " + str(len(batch)) + " events.")
     s_time = time()
 
-    # Iterate over logs and organize into a list of users
-    output = []
-    for log in logs:
-        from_address = log.args["from"]
-        # If sender is burn address, Transfer is a mint
-        if from_address == "0x0000000000000000000000000000000000000000":
-            output.append(log.args["to"])
+    # If sender is burn address, Transfer is a mint
+    output = batch.table.addresses(batch.minted_to())
 
     e_time = time()
     print(colored("Processed events in " + str(round(e_time-s_time,2)) + "s",'green'))
 
-    output = list(set(output))
     print("Found " + str(len(output)) + " users.")
 
     return output
@@ -0,0 +1,139 @@
+#! Python3
+"""
+    File name: activity.py
+    Date created: 10/18/2026
+    Python Version: 3.9.x
+    File Details:
+        Purpose: A streaming aggregator that turns Transfer events into per address
+        activity (number of events, first block and last block).
+
+        Notes:
+        - Replaces the process_user_logs copies that kept every block number for
+          every address in Python lists. Only the count, first and last block are
+          ever used, so those are kept in compact array columns instead.
+        - from_batches aggregates with NumPy over a stream of columnar TransferBatch
+          chunks (see columnar.py and events.iter_transfer_batches), so the stored
+          logs are never all held in memory at once.
+"""
+
+# Import Standard Packages
+from array import array
+from time import time
+
+# Import Other Packages
+from termcolor import colored
+import numpy as np
+
+##################################################
+class Activity:
+    """
+    Per address activity stored as parallel array columns, with a
+    dict mapping each address to its row. Addresses keep the order
+    in which they were first seen.
+    """
+    def __init__(self):
+        self.index = {}
+        self.counts = array("I")
+        self.first = array("I")
+        self.last = array("I")
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, address):
+        return address in self.index
+
+    def add(self, address, block):
+        """
+        Function to record one event for an address at a block.
+        """
+        row = self.index.get(address)
+
+        if row is None:
+            self.index[address] = len(self.counts)
+            self.counts.append(1)
+            self.first.append(block)
+            self.last.append(block)
+            return
+
+        self.counts[row] += 1
+        if block < self.first[row]:
+            self.first[row] = block
+        if block > self.last[row]:
+            self.last[row] = block
+
+    def addresses(self):
+        """
+        Function to return a list of all addresses seen.
+        """
+        return list(self.index.keys())
+
+    def count(self, address):
+        """
+        Function to return the number of events for an address.
+        """
+        return self.counts[self.index[address]]
+
+    def first_block(self, address):
+        """
+        Function to return the earliest block with an event for an address.
+        """
+        return self.first[self.index[address]]
+
+    def last_block(self, address):
+        """
+        Function to return the latest block with an event for an address.
+        """
+        return self.last[self.index[address]]
+
+##################################################
+def from_batches(batches):
+    """
+    Function to aggregate a stream of columnar TransferBatch chunks
+    (sharing one AddressTable) into an Activity using vectorized
+    operations. Each event is counted once for the sender and once for
+    the receiver, and addresses keep the order they were first seen in.
+    """
+    s_time = time()
+    counts = np.zeros(0, dtype=np.int64)
+    first = np.zeros(0, dtype=np.int64)
+    last = np.zeros(0, dtype=np.int64)
+    seen_at = np.zeros(0, dtype=np.int64)
+    position = 0
+    total = 0
+    table = None
+
+    for batch in batches:
+        # Grow the columns for addresses first interned in this chunk
+        table = batch.table
+        grow = len(table) - len(counts)
+        counts = np.concatenate((counts, np.zeros(grow, dtype=np.int64)))
+        first = np.concatenate((first, np.full(grow, np.iinfo(np.int64).max, dtype=np.int64)))
+        last = np.concatenate((last, np.full(grow, -1, dtype=np.int64)))
+        seen_at = np.concatenate((seen_at, np.full(grow, np.iinfo(np.int64).max, dtype=np.int64)))
+
+        # Interleave sender / receiver so first seen order follows the logs
+        ids = np.column_stack((batch.sender, batch.receiver)).ravel()
+        blocks = np.repeat(batch.block, 2)
+
+        counts += np.bincount(ids, minlength=len(counts))
+        np.minimum.at(first, ids, blocks)
+        np.maximum.at(last, ids, blocks)
+        np.minimum.at(seen_at, ids, position + np.arange(len(ids)))
+        position += len(ids)
+        total += len(batch)
+
+    # Only keep ids that appear in the batches, ordered by first appearance
+    seen = np.nonzero(counts)[0]
+    seen = seen[np.argsort(seen_at[seen], kind="stable")]
+
+    output = Activity()
+    output.index = dict(zip(table.addresses(seen), range(len(seen)))) if table is not None else {}
+    output.counts = array("I", counts[seen].astype(np.uint32).tobytes())
+    output.first = array("I", first[seen].astype(np.uint32).tobytes())
+    output.last = array("I", last[seen].astype(np.uint32).tobytes())
+
+    e_time = time()
+    print(colored("Aggregated " + str(total) + " events for " + str(len(output)) + " addresses in " + str(round(e_time-s_time,2)) + "s\n", 'green'))
+
+    return output
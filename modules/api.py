@@ -0,0 +1,277 @@
+#! Python3
+"""
+    File name: api.py
+    Date created: 10/18/2026
+    Python Version: 3.9.x
+    File Details:
+        Purpose: A shared HTTP client for Etherscan and the other third party APIs,
+        used by every fetch helper in the repo.
+
+        Notes:
+        - One pooled keep-alive requests.Session per host, instead of a new session
+          (and TLS handshake) per call.
+        - A token bucket per host (see LIMITS) spaces requests out, so Etherscan
+          stays under its 5 req/s limit no matter how many threads are calling it.
+        - 429s, 5xx, connection errors and Etherscan's "Max rate limit reached"
+          responses are retried with exponential backoff (honouring Retry-After).
+          Once retries run out an HTTPError is raised instead of handing bad data
+          back to the caller.
+        - AsyncClient is the aiohttp facade with the same limits and retries.
+"""
+
+# Import Standard Packages
+from threading import Lock
+from time import monotonic, sleep
+from urllib.parse import urlparse
+import asyncio
+import random
+
+# Import Other Packages
+from requests.adapters import HTTPAdapter
+import aiohttp
+import requests
+
+# Requests per second allowed for each host, others use DEFAULT_RATE
+LIMITS = {
+    "api.etherscan.io": 5
+}
+DEFAULT_RATE = 10
+
+RETRIES = 5
+BACKOFF = 0.5 # Seconds before the first retry, doubled for each retry after
+RETRY_STATUSES = [429, 500, 502, 503, 504]
+TIMEOUT = 30
+
+SESSIONS = {}
+BUCKETS = {}
+LOCK = Lock()
+SHARE = 1 # Number of processes splitting each rate limit, see reset
+
+##################################################
+class HTTPError(Exception):
+    """
+    Error raised when a request still fails after all retries.
+    """
+    def __init__(self, url, status, message=""):
+        self.url = url
+        self.status = status
+        super().__init__("HTTP " + str(status) + " for " + url + (": " + message if message else ""))
+
+##################################################
+class TokenBucket:
+    """
+    Thread safe token bucket that allows rate calls per second
+    with bursts of up to capacity calls.
+    """
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = monotonic()
+        self.lock = Lock()
+
+    def reserve(self):
+        """
+        Function to take a token and return how many seconds
+        the caller has to wait before using it.
+        """
+        with self.lock:
+            now = monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def wait(self):
+        """
+        Function to block until a call is allowed.
+        """
+        delay = self.reserve()
+        if delay > 0:
+            sleep(delay)
+
+##################################################
+def get_bucket(host):
+    """
+    Function to return the shared token bucket for a host.
+    """
+    with LOCK:
+        if host not in BUCKETS:
+            BUCKETS[host] = TokenBucket(LIMITS.get(host, DEFAULT_RATE) / SHARE)
+        return BUCKETS[host]
+
+##################################################
+def get_session(host):
+    """
+    Function to return the shared keep-alive session for a host.
+    """
+    with LOCK:
+        if host not in SESSIONS:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=32)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            SESSIONS[host] = session
+        return SESSIONS[host]
+
+##################################################
+def request(method, url, params=None, headers=None, json=None, retries=RETRIES, timeout=TIMEOUT):
+    """
+    Function to send a request through the shared session for its
+    host, rate limited and retried. Returns the requests Response for
+    any status that isn't retried (so callers can still handle a 404).
+    """
+    host = urlparse(url).netloc
+    session = get_session(host)
+    bucket = get_bucket(host)
+
+    for attempt in range(retries + 1):
+        bucket.wait()
+        try:
+            response = session.request(method, url, params=params, headers=headers, json=json, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt == retries:
+                raise HTTPError(url, "error", str(e))
+            sleep(backoff(attempt))
+            continue
+
+        if not is_retryable(response.status_code, response.content):
+            return response
+
+        if attempt == retries:
+            raise HTTPError(url, response.status_code, response.text[:200])
+        sleep(backoff(attempt, response.headers.get("Retry-After")))
+
+##################################################
+def reset(share=1):
+    """
+    Function to drop the sessions and buckets inherited from the
+    parent in a forked worker process. Each rate limit is split
+    between share processes so together they stay under it.
+    """
+    global SESSIONS, BUCKETS, LOCK, SHARE
+    for session in SESSIONS.values():
+        session.close()
+    SESSIONS = {}
+    BUCKETS = {}
+    LOCK = Lock()
+    SHARE = share
+
+##################################################
+def get(url, params=None, headers=None, retries=RETRIES, timeout=TIMEOUT):
+    """
+    Function to GET a URL, see request.
+    """
+    return request("GET", url, params, headers, None, retries, timeout)
+
+##################################################
+def get_json(url, params=None, headers=None, retries=RETRIES, timeout=TIMEOUT):
+    """
+    Function to GET a URL and return the JSON body, raising an
+    HTTPError for any non 2xx response.
+    """
+    return to_json(get(url, params, headers, retries, timeout))
+
+##################################################
+def post_json(url, json=None, headers=None, retries=RETRIES, timeout=TIMEOUT):
+    """
+    Function to POST a JSON body (e.g. a GraphQL query) and return
+    the JSON response, raising an HTTPError for any non 2xx response.
+    """
+    return to_json(request("POST", url, None, headers, json, retries, timeout))
+
+##################################################
+def to_json(response):
+    """
+    Function to return the JSON body of a response, raising an
+    HTTPError for any non 2xx response.
+    """
+    if not response.ok:
+        raise HTTPError(response.url, response.status_code, response.text[:200])
+    return response.json()
+
+##################################################
+class AsyncClient:
+    """
+    Async facade over aiohttp that shares the per host token buckets
+    and retry rules with get. Use as an async context manager:
+
+        async with api.AsyncClient() as client:
+            status, text = await client.get(url)
+    """
+    def __init__(self, ssl=True, limit_per_host=32, retries=RETRIES, timeout=TIMEOUT):
+        self.ssl = ssl
+        self.limit_per_host = limit_per_host
+        self.retries = retries
+        self.timeout = timeout
+        self.session = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(ssl=self.ssl, limit_per_host=self.limit_per_host)
+        self.session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.session.close()
+        return False
+
+    async def get(self, url, params=None, headers=None):
+        """
+        Function to GET a URL, rate limited and retried. Returns
+        (status, text) for any status that isn't retried.
+        """
+        bucket = get_bucket(urlparse(url).netloc)
+
+        for attempt in range(self.retries + 1):
+            delay = bucket.reserve()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            try:
+                async with self.session.get(url, params=params, headers=headers) as response:
+                    status = response.status
+                    text = await response.text()
+                    retry_after = response.headers.get("Retry-After")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.retries:
+                    raise HTTPError(url, "error", str(e))
+                await asyncio.sleep(backoff(attempt))
+                continue
+
+            if not is_retryable(status, text.encode()):
+                return status, text
+
+            if attempt == self.retries:
+                raise HTTPError(url, status, text[:200])
+            await asyncio.sleep(backoff(attempt, retry_after))
+
+    async def get_text(self, url, params=None, headers=None):
+        """
+        Function to GET a URL and return the body, raising an
+        HTTPError for any non 2xx response.
+        """
+        status, text = await self.get(url, params, headers)
+        if status // 100 != 2:
+            raise HTTPError(url, status, text[:200])
+        return text
+
+##################################################
+def is_retryable(status, content):
+    """
+    Function to check if a response should be retried. Etherscan
+    returns its rate limit error as a 200 with a small JSON body.
+    """
+    if status in RETRY_STATUSES:
+        return True
+    return status == 200 and len(content) < 512 and b"rate limit" in content.lower()
+
+##################################################
+def backoff(attempt, retry_after=None):
+    """
+    Function to return the seconds to wait before a retry,
+    using Retry-After when the server sends one.
+    """
+    try:
+        return float(retry_after)
+    except (TypeError, ValueError):
+        return BACKOFF * 2**attempt * (1 + random.random() / 2)
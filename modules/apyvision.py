@@ -10,7 +10,7 @@
 """
 
 # Imports
-import requests
+from modules import api
 import sys
 
 
@@ -69,9 +69,7 @@ def get_data(url):
     """
     Function to fetch data from URL and return JSON output.
     """
-    with requests.Session() as s:
-        response = s.get(url)
-    return response.json()
+    return api.get_json(url)
 
 
 ##################################################
@@ -0,0 +1,129 @@
+#! Python3
+"""
+    File name: checkpoint.py
+    Date created: 10/18/2026
+    Python Version: 3.9.x
+    File Details:
+        Purpose: A checkpoint journal for long per-user loops. Completed keys
+        (usually addresses) and their output rows are recorded in a local SQLite
+        journal so a rerun after a crash skips the finished work.
+
+        Notes:
+        - Use one journal per run name and include the pinned block in the name
+          (e.g. "ogv_rewards_19585500") so a new block starts a fresh journal.
+        - Rows are committed every `every` keys, a crash only loses the rows
+          since the last commit.
+        - Kept in its own file (JOURNAL_PATH) rather than the main DB so it works
+          from any thread and doesn't wait on the DB writer.
+        - Call clear once the output has been saved.
+"""
+
+# Import Standard Packages
+from threading import Lock
+import json
+import sqlite3
+
+JOURNAL_PATH = "files/checkpoint.db"
+
+##################################################
+class Journal:
+    """
+    Journal of completed keys and their output rows for a run.
+    Use as a context manager so buffered rows are committed on exit:
+
+        with checkpoint.Journal("name_" + str(block)) as journal:
+            for address in addresses:
+                if address in journal: continue
+                journal.add(address, process(address))
+            output = journal.rows()
+    """
+    def __init__(self, name, every=100, path=JOURNAL_PATH):
+        self.name = name
+        self.every = every
+        self.lock = Lock()
+        self.buffer = []
+
+        self.con = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.con.execute("PRAGMA journal_mode = WAL;")
+        self.con.execute("PRAGMA synchronous = NORMAL;")
+        self.con.execute("""
+            CREATE TABLE IF NOT EXISTS journal (
+                run TEXT NOT NULL,
+                key TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                row TEXT NOT NULL,
+                PRIMARY KEY (run, key)
+            ) WITHOUT ROWID;
+        """)
+
+        self.done = set(each[0] for each in self.con.execute("SELECT key FROM journal WHERE run = ?", (name,)))
+        self.position = len(self.done)
+        if self.done:
+            print("Resuming " + name + " with " + str(len(self.done)) + " completed from the checkpoint journal.")
+
+    def __contains__(self, key):
+        return key in self.done
+
+    def __len__(self):
+        return len(self.done)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def add(self, key, row):
+        """
+        Function to record the output row for a completed key,
+        committing every `every` keys.
+        """
+        with self.lock:
+            if key in self.done:
+                return
+            self.done.add(key)
+            self.buffer.append((self.name, key, self.position, json.dumps(row)))
+            self.position += 1
+            if len(self.buffer) >= self.every:
+                self.commit()
+
+    def commit(self):
+        """
+        Function to write buffered rows to the journal.
+        """
+        if not self.buffer:
+            return
+        with self.con:
+            self.con.executemany("INSERT OR REPLACE INTO journal VALUES (?, ?, ?, ?)", self.buffer)
+        self.buffer = []
+
+    def rows(self):
+        """
+        Function to return every journaled row in the order it
+        was completed.
+        """
+        with self.lock:
+            self.commit()
+        cursor = self.con.execute("SELECT row FROM journal WHERE run = ? ORDER BY position", (self.name,))
+        return [json.loads(each[0]) for each in cursor]
+
+    def clear(self):
+        """
+        Function to delete the run from the journal once its
+        output has been saved.
+        """
+        with self.lock:
+            self.buffer = []
+            self.done = set()
+            self.position = 0
+            with self.con:
+                self.con.execute("DELETE FROM journal WHERE run = ?", (self.name,))
+
+    def close(self):
+        """
+        Function to commit buffered rows and close the journal.
+        """
+        with self.lock:
+            self.commit()
+        self.con.close()
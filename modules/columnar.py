@@ -0,0 +1,237 @@
+#! Python3
+"""
+    File name: columnar.py
+    Date created: 10/18/2026
+    Python Version: 3.9.x
+    File Details:
+        Purpose: A columnar representation of Transfer events so that later
+        processing stages can run as vectorized NumPy operations instead of
+        looping over one Python dict per log.
+
+        Notes:
+        - Addresses are interned into an AddressTable and stored as int ids.
+          Checksumming only happens once per unique address, on the way out.
+        - Values are kept exact as Python ints in an object column (token
+          amounts can be larger than any NumPy integer type).
+        - Raw logs (topics/data) are decoded straight into the columns without
+          going through web3 event decoding.
+"""
+
+# Import Standard Packages
+from array import array
+from time import time
+
+# Import Other Packages
+from termcolor import colored
+from web3 import Web3
+import numpy as np
+
+from modules import eth
+
+ZERO = bytes(20)
+
+##################################################
+class AddressTable:
+    """
+    Two way mapping between 20 byte addresses and int ids.
+    """
+    def __init__(self):
+        self.ids = {}
+        self.raw = []
+        self.checksums = []
+
+    def __len__(self):
+        return len(self.raw)
+
+    def intern(self, raw):
+        """
+        Function to return the id for a raw 20 byte address,
+        adding it to the table if it is new.
+        """
+        address_id = self.ids.get(raw)
+        if address_id is None:
+            address_id = len(self.raw)
+            self.ids[raw] = address_id
+            self.raw.append(raw)
+        return address_id
+
+    def id(self, address):
+        """
+        Function to return the id for a hex address, or -1
+        if the address has not been seen.
+        """
+        return self.ids.get(to_bytes(address)[-20:], -1)
+
+    def address(self, address_id):
+        """
+        Function to return the checksum address for an id.
+        """
+        # Checksum lazily, most ids are only ever looked up once
+        while len(self.checksums) <= address_id:
+            self.checksums.append(None)
+        if self.checksums[address_id] is None:
+            self.checksums[address_id] = Web3.to_checksum_address(self.raw[address_id])
+        return self.checksums[address_id]
+
+    def addresses(self, address_ids):
+        """
+        Function to return the checksum addresses for an iterable of ids.
+        """
+        return [self.address(int(each)) for each in address_ids]
+
+##################################################
+class TransferBatch:
+    """
+    Transfer events stored as parallel columns in chain order.
+    """
+    def __init__(self, table, block, transaction_index, log_index, sender, receiver, value):
+        self.table = table
+        self.block = block
+        self.transaction_index = transaction_index
+        self.log_index = log_index
+        self.sender = sender
+        self.receiver = receiver
+        self.value = value
+
+    def __len__(self):
+        return len(self.block)
+
+    def minted_to(self):
+        """
+        Function to return the unique ids that received a Transfer
+        from the zero address, in order of first mint.
+        """
+        zero_id = self.table.id(ZERO)
+        receivers = self.receiver[self.sender == zero_id]
+        unique, first_index = np.unique(receivers, return_index=True)
+        return unique[np.argsort(first_index)]
+
+##################################################
+def get_transfer_batch(contract, from_block, to_block, gap=100000, workers=4, table=None):
+    """
+    Function to fetch all Transfer logs for a contract with the
+    concurrent log scanner and decode them into a TransferBatch.
+    """
+    logs = eth.get_event_logs(contract.events.Transfer, from_block, to_block, gap, workers, decode=False)
+    return from_raw_logs(logs, table)
+
+##################################################
+def from_raw_logs(logs, table=None):
+    """
+    Function to decode raw Transfer logs (as returned by eth_getLogs)
+    straight into a TransferBatch, see decode_transfer.
+    """
+    s_time = time()
+    table = AddressTable() if table is None else table
+    columns = new_columns()
+
+    for log in logs:
+        block, transaction_index, log_index, sender, receiver, value = decode_transfer(log)
+        append(columns, table, block, transaction_index, log_index, sender, receiver, value)
+
+    output = to_batch(table, columns)
+
+    e_time = time()
+    print(colored("Decoded " + str(len(output)) + " events in " + str(round(e_time-s_time,2)) + "s", 'green'))
+    return output
+
+##################################################
+def decode_transfer(log):
+    """
+    Function to decode a raw Transfer log into (block, transaction
+    index, log index, sender, receiver, value), with the sender and
+    receiver as raw 20 byte addresses. Handles both ERC20 (value in
+    data) and ERC721 (tokenId as the 4th topic) Transfer events.
+    """
+    topics = log["topics"]
+    data = to_bytes(log["data"])
+
+    if len(data) >= 32:
+        value = int.from_bytes(data[:32], "big")
+    else:
+        value = int.from_bytes(to_bytes(topics[3]), "big")
+
+    return (
+        to_int(log["blockNumber"]),
+        to_int(log["transactionIndex"]),
+        to_int(log["logIndex"]),
+        to_bytes(topics[1])[-20:],
+        to_bytes(topics[2])[-20:],
+        value
+    )
+
+##################################################
+def from_rows(rows, table=None):
+    """
+    Function to load event table rows from the local DB
+    into a TransferBatch.
+    """
+    table = AddressTable() if table is None else table
+    columns = new_columns()
+
+    for row in rows:
+        append(columns, table, row[1], row[3], row[2], to_bytes(row[6]), to_bytes(row[7]), int(row[8]))
+
+    return to_batch(table, columns)
+
+##################################################
+def new_columns():
+    """
+    Function to set up the growable columns used while decoding.
+    """
+    return {
+        "block": array("q"),
+        "transaction_index": array("I"),
+        "log_index": array("I"),
+        "sender": array("i"),
+        "receiver": array("i"),
+        "value": []
+    }
+
+##################################################
+def append(columns, table, block, transaction_index, log_index, sender, receiver, value):
+    """
+    Function to append a single decoded Transfer to the columns.
+    """
+    columns["block"].append(block)
+    columns["transaction_index"].append(transaction_index)
+    columns["log_index"].append(log_index)
+    columns["sender"].append(table.intern(sender))
+    columns["receiver"].append(table.intern(receiver))
+    columns["value"].append(value)
+
+##################################################
+def to_batch(table, columns):
+    """
+    Function to freeze growable columns into a TransferBatch.
+    """
+    value = np.empty(len(columns["value"]), dtype=object)
+    value[:] = columns["value"]
+
+    return TransferBatch(
+        table,
+        np.frombuffer(columns["block"], dtype=np.int64),
+        np.frombuffer(columns["transaction_index"], dtype=np.uint32),
+        np.frombuffer(columns["log_index"], dtype=np.uint32),
+        np.frombuffer(columns["sender"], dtype=np.int32),
+        np.frombuffer(columns["receiver"], dtype=np.int32),
+        value
+    )
+
+##################################################
+def to_bytes(data):
+    """
+    Function to convert hex strings or HexBytes into bytes.
+    """
+    if isinstance(data, str):
+        return bytes.fromhex(data[2:] if data.startswith("0x") else data)
+    return bytes(data)
+
+##################################################
+def to_int(number):
+    """
+    Function to convert hex quantities from raw JSON-RPC into ints.
+    """
+    if isinstance(number, str):
+        return int(number, 16)
+    return number
@@ -15,30 +15,192 @@
 # Import Standard Packages
 from pathlib import Path
 from time import sleep
+import csv
 import json
 import os
+import shutil
 
 # Import Other Packages
 from termcolor import colored
+import numpy as np
 import pandas as pd
 
+PARQUET_TYPES = {int: "int64", float: "float64", str: "string", bool: "bool_"}
+
 #
-# Function to save a data set as CSV
-def save(data, path, filename, column_headers):
+# Function to save a data set as CSV (or Parquet if filename ends in .parquet)
+def save(data, path, filename, column_headers, dtypes=None):
     try:
+        with StreamWriter(path, filename, column_headers, dtypes) as writer:
+            writer.write_many(data)
+    except Exception as e:
+        print(colored("\n    An error occurred when saving data.", 'red'))
+        print(e)
+
+#
+# Class to stream rows to a CSV or Parquet file in chunks as they are produced,
+# so memory stays flat and everything flushed survives a crash.
+# - dtypes maps column names to int, float, str or bool. Values are converted before
+#   writing and Parquet columns get that type (others are inferred from the first chunk).
+# - Parquet output is a directory of part files (one per chunk) as a Parquet file can't
+#   be appended to. Each part is written atomically. Needs pyarrow.
+# - Set resume to keep rows already on disk (a partial last CSV line is dropped) and
+#   use keys() to skip the rows that were written before the crash.
+class StreamWriter:
+    def __init__(self, path, filename, column_headers, dtypes=None, chunk_size=1000, resume=False):
         # Check if path exists, else create
         output_dir = Path(path)
         output_dir.mkdir(parents=True, exist_ok=True)
-        filename = output_dir / filename
+        self.filename = output_dir / filename
+        self.columns = list(column_headers)
+        self.types = [(dtypes or {}).get(column) for column in self.columns]
+        self.chunk_size = chunk_size
+        self.parquet = self.filename.suffix == ".parquet"
+        self.buffer = []
+        self.written = 0
 
-        # Create dataframe and save to CSV
-        df = pd.DataFrame(data, columns=column_headers)
-        df.to_csv(filename, index=False, encoding='utf-8')
-        sleep(0.1)
-        print(colored("\n    Data saved.", 'green'))
-    except Exception as e:
-        print(colored("\n    An error occurred when saving data.", 'red'))
-        print(e)
+        if self.parquet:
+            arrow()
+            self.schema = None
+            self.parts = 0
+            if not resume and self.filename.exists():
+                shutil.rmtree(self.filename)
+            self.filename.mkdir(exist_ok=True)
+            for part in parquet_parts(self.filename):
+                metadata = arrow().parquet.ParquetFile(part).metadata
+                self.schema = metadata.schema.to_arrow_schema()
+                self.written += metadata.num_rows
+                self.parts += 1
+        else:
+            if resume and self.filename.exists():
+                self.written = repair_csv(self.filename, self.columns)
+            resumed = resume and self.filename.exists() and self.filename.stat().st_size > 0
+            self.file = open(self.filename, "a" if resumed else "w", newline="", encoding="utf-8")
+            self.writer = csv.writer(self.file)
+            if not resumed:
+                self.writer.writerow(self.columns)
+                self.file.flush()
+
+        if self.written:
+            print("Resuming " + str(self.filename) + " after " + str(self.written) + " rows.")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(exc_type is None)
+        return False
+
+    # Function to add a row, flushing to disk once chunk_size rows are buffered.
+    # A single value (e.g. a flat list of addresses) is written as a one column row.
+    def write(self, row):
+        if isinstance(row, (str, bytes)) or not hasattr(row, "__len__"):
+            row = [row]
+        self.buffer.append(row)
+        if len(self.buffer) >= self.chunk_size:
+            self.flush()
+
+    # Function to add many rows
+    def write_many(self, rows):
+        for row in rows:
+            self.write(row)
+
+    # Function to write buffered rows to disk
+    def flush(self):
+        if not self.buffer:
+            return
+        rows = [[convert(value, kind) for value, kind in zip(row, self.types)] for row in self.buffer]
+
+        if self.parquet:
+            self.write_part(rows)
+        else:
+            self.writer.writerows(rows)
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+        self.written += len(rows)
+        self.buffer = []
+
+    # Function to write rows as the next Parquet part file, cast to the schema of the first part
+    def write_part(self, rows):
+        pa = arrow()
+        columns = list(zip(*rows))
+        arrays = [pa.array(values, type=getattr(pa, PARQUET_TYPES[kind])() if kind else None) for values, kind in zip(columns, self.types)]
+        table = pa.Table.from_arrays(arrays, names=self.columns)
+        if self.schema is None:
+            self.schema = table.schema
+        else:
+            table = table.cast(self.schema)
+
+        part = self.filename / ("part-" + str(self.parts).zfill(5) + ".parquet")
+        temp = part.with_suffix(".tmp")
+        pa.parquet.write_table(table, temp)
+        os.replace(temp, part)
+        self.parts += 1
+
+    # Function to return the set of values in a column that are already on disk
+    def keys(self, column=None):
+        column = column or self.columns[0]
+        kind = self.types[self.columns.index(column)]
+        self.flush()
+        output = set()
+        for chunk in load_chunks(self.filename, [column]):
+            output.update(convert(value, kind) for value in chunk[column].tolist())
+        return output
+
+    # Function to flush remaining rows and close the file
+    def close(self, complete=True):
+        self.flush()
+        if not self.parquet:
+            self.file.close()
+        if complete:
+            print(colored("\n    Data saved.", 'green'))
+
+#
+# Function to import pyarrow on first use, as it is only needed for Parquet
+def arrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet files need pyarrow, install it with: pip install pyarrow")
+    return pyarrow
+
+#
+# Function to convert a value to a column type, keeping None as a missing value
+def convert(value, kind):
+    if value is None or kind is None:
+        return value
+    if kind is bool and isinstance(value, str):
+        return value in ["True", "true", "1"]
+    return kind(value)
+
+#
+# Function to drop a partially written last line from a CSV (from a crash) and
+# return the number of complete rows, checking the header matches
+def repair_csv(filename, columns):
+    with open(filename, "rb+") as f:
+        position = f.seek(0, os.SEEK_END)
+        while position > 0:
+            step = min(65536, position)
+            position -= step
+            f.seek(position)
+            newline = f.read(step).rfind(b"\n")
+            if newline >= 0:
+                f.truncate(position + newline + 1)
+                break
+        else:
+            f.truncate(0)
+
+    rows = 0
+    with open(filename, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is not None and header != columns:
+            raise ValueError("Can't resume " + str(filename) + ", the columns don't match.")
+        for _ in reader:
+            rows += 1
+    return rows
 
 #
 # Function to save a dataframe as CSV
@@ -69,22 +231,73 @@ def save_json(data, path, file):
         print(e)
 
 #
-# Function to load a CSV
+# Function to load a CSV (or Parquet) as a list of rows, or a list of the first column
 def load(filename, full):
     try:
-        df = pd.read_csv(filename, encoding='utf-8')
         if full:
-            return df.values.tolist()
+            return [list(record) for record in load_records(filename)]
         else:
-            data = df.values.tolist()
-            for x in range(len(data)):
-                data[x] = data[x][0]
-            assert len(df) == len(data)
-            return data
+            return load_column(filename).tolist()
     except Exception as e:
         print("An error occurred when importing search data.")
         print(e)
 
+#
+# Function to stream a CSV or Parquet file (a single file or a StreamWriter directory of
+# parts) as dicts of column name to NumPy array, chunk_size rows at a time, so large
+# inputs load in constant memory. dtypes maps column names to int, float, str or bool.
+def load_chunks(filename, columns=None, dtypes=None, chunk_size=100000):
+    path = Path(filename)
+    if path.suffix == ".parquet":
+        for part in parquet_parts(path):
+            for batch in arrow().parquet.ParquetFile(part).iter_batches(batch_size=chunk_size, columns=columns):
+                chunk = {name: batch.column(i).to_numpy(zero_copy_only=False) for i, name in enumerate(batch.schema.names)}
+                for name, kind in (dtypes or {}).items():
+                    if name in chunk:
+                        chunk[name] = chunk[name].astype(kind)
+                yield chunk
+    else:
+        for df in pd.read_csv(path, usecols=columns, dtype=dtypes, chunksize=chunk_size, encoding='utf-8'):
+            yield {name: df[name].to_numpy() for name in df.columns}
+
+#
+# Function to load a single column (the first by default) as a NumPy array
+def load_column(filename, column=None, dtype=None, chunk_size=100000):
+    column = column or load_header(filename)[0]
+    dtypes = {column: dtype} if dtype else None
+    chunks = [chunk[column] for chunk in load_chunks(filename, [column], dtypes, chunk_size)]
+    return np.concatenate(chunks) if chunks else np.array([])
+
+#
+# Function to stream rows as tuples of Python values in columns order (file order by default)
+def load_records(filename, columns=None, dtypes=None, chunk_size=100000):
+    for chunk in load_chunks(filename, columns, dtypes, chunk_size):
+        names = columns or list(chunk.keys())
+        yield from zip(*[chunk[name].tolist() for name in names])
+
+#
+# Function to return the column names of a CSV or Parquet file
+def load_header(filename):
+    path = Path(filename)
+    if path.suffix == ".parquet":
+        return arrow().parquet.ParquetFile(parquet_parts(path)[0]).schema_arrow.names
+    with open(path, newline="", encoding="utf-8") as f:
+        return next(csv.reader(f))
+
+#
+# Function to count the rows of a CSV or Parquet file without loading it
+def count_rows(filename):
+    path = Path(filename)
+    if path.suffix == ".parquet":
+        return sum(arrow().parquet.ParquetFile(part).metadata.num_rows for part in parquet_parts(path))
+    return sum(len(df) for df in pd.read_csv(path, usecols=[0], chunksize=100000, encoding='utf-8'))
+
+#
+# Function to list the part files of a Parquet directory, or the file itself
+def parquet_parts(path):
+    path = Path(path)
+    return sorted(path.glob("part-*.parquet")) if path.is_dir() else [path]
+
 #
 # Function to load and import a JSON compatible file
 def load_json(pathname):
@@ -6,21 +6,226 @@
     Python Version: 3.9.x
     File Details:
         Purpose: A series of functions to handle SQLite database operations
+
+        Notes:
+        - The DB runs in WAL mode with synchronous=NORMAL, so readers don't block
+          the writer and commits don't fsync the whole DB.
+        - All writes are upserts and have a bulk (executemany) version that runs
+          in a single transaction.
+        - start_writer() moves writes to a background thread that groups them into
+          transactions. Queued writes are not visible to reads until flush(). Every
+          write goes through write() / transaction(), so the writer and CON never
+          commit at the same time.
+        - connect() creates any tables missing from the DB (sqlite_setup.setup), so
+          an existing DB picks up tables added since it was set up.
+        - SQLite connections only work on the thread that opened them, so threads
+          other than the one that opened CON get a connection of their own (see
+          connection), e.g. the executor eth_async runs DB calls on.
 """
 
 # Import Standard Packages
+from queue import Queue, Empty
+from threading import Thread, get_ident, local
 from time import time
+import atexit
 import sqlite3
 
-CON = sqlite3.connect("./files/ousd.db")
+from modules import sqlite_setup
+
+DB_PATH = "./files/ousd.db"
+WRITER = None # Background writer, see start_writer
+LOCAL = local() # Connections for other threads, see connection
+
+##################################################
+def connect(path=DB_PATH):
+    """
+    Function to open a connection to the DB with WAL
+    journaling and tuned cache pragmas, creating any
+    missing tables.
+    """
+    con = sqlite3.connect(path, timeout=30)
+    con.execute("PRAGMA journal_mode = WAL;")
+    con.execute("PRAGMA synchronous = NORMAL;")
+    con.execute("PRAGMA cache_size = -65536;") # 64 MB
+    con.execute("PRAGMA temp_store = MEMORY;")
+    sqlite_setup.setup(con)
+    return con
+
+CON = connect()
 CUR = CON.cursor()
+OWNER = get_ident() # Thread CON belongs to
+
+##################################################
+def connection():
+    """
+    Function to return the DB connection for the calling thread,
+    CON on the thread that opened it, else a connection of the
+    thread's own, opened on first use.
+    """
+    if get_ident() == OWNER:
+        return CON
+
+    if getattr(LOCAL, "path", None) != DB_PATH:
+        if getattr(LOCAL, "con", None) is not None:
+            LOCAL.con.close()
+        LOCAL.con = connect(DB_PATH)
+        LOCAL.path = DB_PATH
+    return LOCAL.con
+
+##################################################
+def cursor():
+    """
+    Function to return a DB cursor for the calling thread.
+    """
+    if get_ident() == OWNER:
+        return CUR
+    return connection().cursor()
+
+##################################################
+class Writer(Thread):
+    """
+    Background thread with its own connection that runs queued
+    writes, grouping everything queued at the time into a single
+    transaction (up to max_batch writes).
+    """
+    def __init__(self, path=DB_PATH, max_batch=1000):
+        super().__init__(daemon=True)
+        self.path = path
+        self.max_batch = max_batch
+        self.queue = Queue()
+        self.error = None
+
+    def run(self):
+        con = connect(self.path)
+
+        while True:
+            items = [self.queue.get()]
+            while len(items) < self.max_batch:
+                try:
+                    items.append(self.queue.get_nowait())
+                except Empty:
+                    break
+
+            # Each item is a list of (sql, rows) statements that commit together
+            writes = [item for item in items if item is not None]
+            try:
+                with con:
+                    for statements in writes:
+                        for sql, rows in statements:
+                            con.executemany(sql, rows)
+            except Exception as e:
+                # Retry one by one so a single bad write doesn't lose the rest
+                for statements in writes:
+                    try:
+                        with con:
+                            for sql, rows in statements:
+                                con.executemany(sql, rows)
+                    except Exception as e:
+                        self.error = self.error or e
+
+            for item in items:
+                self.queue.task_done()
+
+            if len(writes) < len(items):
+                con.close()
+                return
+
+##################################################
+def start_writer():
+    """
+    Function to start the background writer. Writes made after
+    this are queued and committed in groups.
+    """
+    global WRITER
+    if WRITER is None:
+        WRITER = Writer(DB_PATH)
+        WRITER.start()
+        atexit.unregister(stop_writer)
+        atexit.register(stop_writer)
+
+##################################################
+def flush():
+    """
+    Function to wait until every queued write is committed.
+    Raises the first error hit by the background writer.
+    """
+    if WRITER is None:
+        return
+
+    WRITER.queue.join()
+    if WRITER.error is not None:
+        error = WRITER.error
+        WRITER.error = None
+        raise error
+
+##################################################
+def stop_writer():
+    """
+    Function to commit any queued writes and stop the
+    background writer.
+    """
+    global WRITER
+    if WRITER is None:
+        return
+
+    writer = WRITER
+    try:
+        flush()
+    finally:
+        WRITER = None
+        writer.queue.put(None)
+        writer.join()
+
+##################################################
+def reconnect():
+    """
+    Function to open a fresh connection in a forked worker
+    process. SQLite connections can't be shared across a fork
+    and the background writer thread doesn't survive one.
+    """
+    global CON, CUR, OWNER, WRITER
+    CON = connect(DB_PATH)
+    CUR = CON.cursor()
+    OWNER = get_ident()
+    WRITER = None
+
+##################################################
+def write(sql, rows):
+    """
+    Function to run a write statement for many rows, on the
+    background writer if it is running, else directly in a
+    single transaction.
+    """
+    rows = list(rows)
+    if not rows:
+        return
+
+    transaction([(sql, rows)])
+
+##################################################
+def transaction(statements):
+    """
+    Function to run a list of (sql, rows) write statements in
+    a single transaction, on the background writer if it is
+    running, else directly.
+    """
+    statements = [(sql, list(rows)) for sql, rows in statements]
+
+    if WRITER is not None:
+        WRITER.queue.put(statements)
+        return
+
+    con = connection()
+    with con:
+        for sql, rows in statements:
+            con.executemany(sql, rows)
 
 ##################################################
 def get_block(number):
     """
     Function to get block details from the DB.
     """
-    res = CUR.execute("SELECT * FROM block WHERE number = ?", (number,))
+    res = cursor().execute("SELECT * FROM block WHERE number = ?", (number,))
     return res.fetchone()
 
 ##################################################
@@ -28,11 +233,57 @@ def add_block(number, timestamp, data):
     """
     Function to add block details to the DB.
     """
+    add_blocks([(number, timestamp, data)])
+
+##################################################
+def add_blocks(blocks):
+    """
+    Function to add many (number, timestamp, data) blocks
+    to the DB in a single transaction.
+    """
     last_updated = int(time())
-    CUR.execute(
-        "INSERT INTO block (number, timestamp, data, last_updated) VALUES (?,?,?,?);", 
-        (number, timestamp, data, last_updated,))
-    CON.commit()
+    write(
+        "INSERT OR REPLACE INTO block (number, timestamp, data, last_updated) VALUES (?,?,?,?);",
+        [tuple(block) + (last_updated,) for block in blocks]
+    )
+
+##################################################
+def get_block_timestamps(numbers):
+    """
+    Function to return a dict of block number to timestamp
+    for every provided block stored in the block_time index.
+    """
+    cursor().execute("CREATE TEMP TABLE IF NOT EXISTS block_lookup (number INTEGER PRIMARY KEY);")
+    cursor().execute("DELETE FROM block_lookup;")
+    cursor().executemany("INSERT OR IGNORE INTO block_lookup (number) VALUES (?);", [(number,) for number in numbers])
+    res = cursor().execute("SELECT block_time.number, block_time.timestamp FROM block_lookup JOIN block_time ON block_time.number = block_lookup.number;")
+    return dict(res.fetchall())
+
+##################################################
+def get_block_anchors(first_block, last_block):
+    """
+    Function to return a dict of block number to timestamp for
+    every indexed block from first_block to last_block, plus the
+    nearest indexed block on either side of the range.
+    """
+    res = cursor().execute("SELECT number, timestamp FROM block_time WHERE number BETWEEN ? AND ?", (first_block, last_block))
+    output = dict(res.fetchall())
+
+    before = cursor().execute("SELECT number, timestamp FROM block_time WHERE number < ? ORDER BY number DESC LIMIT 1", (first_block,)).fetchone()
+    after = cursor().execute("SELECT number, timestamp FROM block_time WHERE number > ? ORDER BY number LIMIT 1", (last_block,)).fetchone()
+    for row in [before, after]:
+        if row is not None:
+            output[row[0]] = row[1]
+
+    return output
+
+##################################################
+def add_block_timestamps(timestamps):
+    """
+    Function to add many (number, timestamp) rows to the
+    block_time index in a single transaction.
+    """
+    write("INSERT OR REPLACE INTO block_time (number, timestamp) VALUES (?,?);", timestamps)
 
 ##################################################
 def get_user(address):
@@ -40,21 +291,68 @@ def get_user(address):
     Function to return a User for a provided address
     if they exist in the DB else return None.
     """
-    res = CUR.execute("SELECT * FROM user WHERE address = ?", (address,))
+    res = cursor().execute("SELECT * FROM user WHERE address = ?", (address,))
     return res.fetchone()
 
 ##################################################
 def add_user(address, ens, is_contract, first_activity=0):
     """
     Function to add a user to the database and set a
-    default first_tx value to 0 unless provided.
+    default first_tx value to 0 unless provided. Returns
+    the row values, which may still be queued on the
+    writer rather than stored (see write).
     """
-    last_updated = time()
-    CUR.execute(
-        "INSERT INTO user (address, ens, is_contract, first_activity, last_updated) VALUES (?,?,?,?,?);", 
-        (address, ens, is_contract, first_activity, last_updated,)
+    last_updated = int(time())
+    write(
+        "INSERT OR REPLACE INTO user (address, ens, is_contract, first_activity, last_updated) VALUES (?,?,?,?,?);",
+        [(address, ens, is_contract, first_activity, last_updated)]
+    )
+    return (address, ens, is_contract, first_activity, last_updated, None)
+
+##################################################
+def get_users(addresses):
+    """
+    Function to return a dict of address to User row for
+    every provided address that exists in the DB, using a
+    single query against a temporary lookup table.
+    """
+    fill_lookup(addresses)
+    res = cursor().execute("SELECT user.* FROM lookup CROSS JOIN user ON user.address = lookup.address;")
+    return {row[0]: row for row in res.fetchall()}
+
+##################################################
+def fill_lookup(addresses):
+    """
+    Function to load a list of addresses into the temporary
+    lookup table used for bulk reads.
+    """
+    cursor().execute("CREATE TEMP TABLE IF NOT EXISTS lookup (address TEXT PRIMARY KEY);")
+    cursor().execute("DELETE FROM lookup;")
+    cursor().executemany("INSERT OR IGNORE INTO lookup (address) VALUES (?);", [(address,) for address in addresses])
+
+##################################################
+def add_users(users):
+    """
+    Function to add many users to the database in a single
+    transaction. Each user is an (address, ens, is_contract,
+    first_activity, ens_updated) tuple.
+    """
+    last_updated = int(time())
+    write(
+        "INSERT OR REPLACE INTO user (address, ens, is_contract, first_activity, ens_updated, last_updated) VALUES (?,?,?,?,?,?);",
+        [tuple(user) + (last_updated,) for user in users]
+    )
+
+##################################################
+def update_ens_names(names):
+    """
+    Function to update the ENS name for many users in a single
+    transaction. Each name is an (address, ens, ens_updated) tuple.
+    """
+    write(
+        "UPDATE user SET ens=?, ens_updated=? WHERE address=?;",
+        [(ens, ens_updated, address) for address, ens, ens_updated in names]
     )
-    CON.commit()
 
 ##################################################
 def update_user(address, ens, is_contract, first_activity):
@@ -63,11 +361,10 @@ def update_user(address, ens, is_contract, first_activity):
     function in the event data needs to be reprocessed.
     """
     last_updated = int(time())
-    CUR.execute(
+    write(
         "UPDATE user SET ens=?, is_contract=?, first_activity=?, last_updated=? WHERE address=?;",
-        (ens, is_contract, first_activity, last_updated, address,)
+        [(ens, is_contract, first_activity, last_updated, address)]
     )
-    CON.commit()
 
 ##################################################
 def get_contract(address):
@@ -75,17 +372,118 @@ def get_contract(address):
     Function to return a Contract for a provided address
     if it exists in the DB else return None.
     """
-    res = CUR.execute("SELECT * FROM contract WHERE address = ?", (address,))
+    res = cursor().execute("SELECT * FROM contract WHERE address = ?", (address,))
     return res.fetchone()
 
+##################################################
+def get_contracts(addresses):
+    """
+    Function to return a dict of address to Contract row for
+    every provided address that exists in the DB, using a
+    single query against a temporary lookup table.
+    """
+    fill_lookup(addresses)
+    res = cursor().execute("SELECT contract.* FROM lookup CROSS JOIN contract ON contract.address = lookup.address;")
+    return {row[0]: row for row in res.fetchall()}
+
 ##################################################
 def add_contract(address, is_verified, deploy_date):
     """
-    Function to add a contract to the database.
+    Function to add a contract to the database. Returns the
+    row values, which may still be queued on the writer
+    rather than stored (see write).
+    """
+    return add_contracts([(address, is_verified, deploy_date)])[0]
+
+##################################################
+def add_contracts(contracts):
+    """
+    Function to add many (address, is_verified, deploy_date)
+    contracts to the database in a single transaction. Returns
+    the row values, the write may still be queued (see write).
     """
     last_updated = int(time())
-    CUR.execute(
-        "INSERT INTO contract (address, is_verified, deploy_date, last_updated) VALUES (?,?,?,?);", 
-        (address, is_verified, deploy_date, last_updated,)
+    rows = [tuple(contract) + (last_updated,) for contract in contracts]
+    write("INSERT OR REPLACE INTO contract (address, is_verified, deploy_date, last_updated) VALUES (?,?,?,?);", rows)
+    return rows
+
+##################################################
+def get_codes(addresses):
+    """
+    Function to return a dict of address to (code_hash, code_size,
+    kind) for every provided address with stored code. Kind is None
+    if the code hash has not been classified yet.
+    """
+    fill_lookup(addresses)
+    res = cursor().execute(
+        "SELECT code.address, code.code_hash, code.code_size, code_kind.kind FROM lookup "
+        "JOIN code ON code.address = lookup.address "
+        "LEFT JOIN code_kind ON code_kind.code_hash = code.code_hash;"
     )
-    CON.commit()
+    return {row[0]: row[1:] for row in res.fetchall()}
+
+##################################################
+def add_codes(codes):
+    """
+    Function to add many (address, code_hash, code_size)
+    rows to the database in a single transaction.
+    """
+    last_updated = int(time())
+    write(
+        "INSERT OR REPLACE INTO code (address, code_hash, code_size, last_updated) VALUES (?,?,?,?);",
+        [tuple(code) + (last_updated,) for code in codes]
+    )
+
+##################################################
+def add_code_kinds(kinds):
+    """
+    Function to add many (code_hash, kind) rows to the
+    database in a single transaction.
+    """
+    last_updated = int(time())
+    write(
+        "INSERT OR REPLACE INTO code_kind (code_hash, kind, last_updated) VALUES (?,?,?);",
+        [tuple(kind) + (last_updated,) for kind in kinds]
+    )
+
+##################################################
+def get_event_sync(contract):
+    """
+    Function to return the (first_block, last_block) range of
+    Transfer events stored for a contract, else return None.
+    """
+    res = cursor().execute("SELECT first_block, last_block FROM event_sync WHERE contract = ?", (contract,))
+    return res.fetchone()
+
+##################################################
+def iter_events(contract, from_block, to_block):
+    """
+    Function to return a cursor over the stored Transfer events
+    for a contract, rows are fetched lazily while iterating.
+    """
+    return connection().execute(
+        "SELECT * FROM event WHERE contract = ? AND block >= ? AND block <= ? ORDER BY block, log_index;",
+        (contract, from_block, to_block,)
+    )
+
+##################################################
+def replace_events(contract, from_block, first_block, last_block, events):
+    """
+    Function to delete all stored events for a contract from
+    from_block onward, insert the provided event rows and update
+    the stored block range, all in a single transaction. Goes
+    through the background writer if it is running, see flush.
+    """
+    last_updated = int(time())
+    transaction([
+        ("DELETE FROM event WHERE contract = ? AND block >= ?;", [(contract, from_block,)]),
+        (
+            "INSERT OR REPLACE INTO event (contract, block, log_index, transaction_index, hash, block_hash, e_from, e_to, value) "
+            "VALUES (?,?,?,?,?,?,?,?,?);",
+            events
+        ),
+        (
+            "INSERT OR REPLACE INTO event_sync (contract, first_block, last_block, last_updated) VALUES (?,?,?,?);",
+            [(contract, first_block, last_block, last_updated,)]
+        )
+    ])
@@ -1,57 +1,173 @@
 #! Python3
 """
-    File name: db.py
+    File name: db2.py
     Author: Jonathan Snow
     Date created: 09/06/2022
     Python Version: 3.9.x
     File Details:
-        Purpose: A series of functions to handle SQLite database operations
+        Purpose: A series of functions to handle Postgres database operations
+
+        Notes:
+        - Connections come from a ThreadedConnectionPool (created on first use) so
+          concurrent workers can share the module. Each function checks out a
+          connection, commits (or rolls back on error) and returns it to the pool.
+        - All statements are parameterized, values are never formatted into SQL.
+        - Bulk writes use execute_values (many rows per statement) and copy_rows
+          streams rows in with COPY for large loads, formatting them as COPY reads
+          so a generator of rows is never held in memory.
 """
 
 # Import Standard Packages
+from contextlib import contextmanager
 from time import time
+import csv
 import dotenv
+import io
 import os
 
-import psycopg2
 from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
 
 dotenv.load_dotenv()
 
-conn = psycopg2.connect(host=os.getenv("DB_HOST"), port=os.getenv("DB_PORT"), user=os.getenv("DB_USER"),
-                        password=os.getenv("DB_PASS"), dbname=os.getenv("DB_NAME"), sslmode='require')
-cursor = conn.cursor()
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE") or 10)
+PAGE_SIZE = 1000 # Rows per statement for execute_values
+POOL = None # Created on first use, see get_pool
 
+##################################################
+def get_pool():
+    """
+    Function to return the shared connection pool, creating
+    it on first use.
+    """
+    global POOL
+    if POOL is None:
+        POOL = ThreadedConnectionPool(1, POOL_SIZE, host=os.getenv("DB_HOST"), port=os.getenv("DB_PORT"), user=os.getenv("DB_USER"),
+                                      password=os.getenv("DB_PASS"), dbname=os.getenv("DB_NAME"), sslmode='require')
+    return POOL
 
 ##################################################
-def get_block(number):
+@contextmanager
+def connection():
     """
-    Function to get block details from the DB.
+    Function to check out a pooled connection for a unit of
+    work. Commits if the block succeeds, else rolls back.
+    """
+    pool = get_pool()
+    conn = pool.getconn()
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        pool.putconn(conn)
+
+##################################################
+def execute(query, params=None, fetch=None):
+    """
+    Function to run a single parameterized statement. Set fetch
+    to 'one' or 'all' to return rows.
+    """
+    with connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(query, params)
+            if fetch == "one":
+                return cursor.fetchone()
+            if fetch == "all":
+                return cursor.fetchall()
+
+##################################################
+def execute_many(query, rows, template=None, fetch=False):
+    """
+    Function to run a statement with a VALUES %s placeholder for
+    many rows using execute_values, in a single transaction.
+    """
+    rows = list(rows)
+    if not rows:
+        return [] if fetch else None
+
+    with connection() as conn:
+        with conn.cursor() as cursor:
+            return execute_values(cursor, query, rows, template=template, page_size=PAGE_SIZE, fetch=fetch)
+
+##################################################
+class RowStream:
+    """
+    Read only file object over an iterable of rows, formatted as
+    CSV a few rows at a time as COPY reads from it.
     """
-    cursor.execute(
-        f"""
-        SELECT * 
-        FROM block
-        WHERE number = {number}
+    def __init__(self, rows):
+        self.rows = iter(rows)
+        self.buffer = ""
+        self.line = io.StringIO()
+        self.writer = csv.writer(self.line)
+        self.count = 0
+
+    def read(self, size=-1):
         """
-    )
-    return cursor.fetchone()
+        Function to return up to size characters of CSV, or
+        all of the remaining rows if size is negative.
+        """
+        while size < 0 or len(self.buffer) < size:
+            row = next(self.rows, None)
+            if row is None:
+                break
+            self.writer.writerow(["\\N" if value is None else value for value in row])
+            self.buffer += self.line.getvalue()
+            self.line.seek(0)
+            self.line.truncate()
+            self.count += 1
+
+        if size < 0:
+            size = len(self.buffer)
+        output, self.buffer = self.buffer[:size], self.buffer[size:]
+        return output
 
+##################################################
+def copy_rows(table, columns, rows):
+    """
+    Function to stream many rows into a table with COPY. Much
+    faster than INSERT for large loads, but doesn't handle
+    conflicts so only use it for rows that are known to be new.
+    Returns the number of rows copied.
+    """
+    stream = RowStream(rows)
+    with connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.copy_expert(
+                "COPY " + table + " (" + ", ".join(columns) + ") FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                stream
+            )
+
+    return stream.count
+
+##################################################
+def get_block(number):
+    """
+    Function to get block details from the DB.
+    """
+    return execute("SELECT * FROM block WHERE number = %s", (number,), "one")
 
 ##################################################
 def add_block(number, timestamp, data):
     """
     Function to add block details to the DB.
     """
+    add_blocks([(number, timestamp, data)])
+
+##################################################
+def add_blocks(blocks):
+    """
+    Function to add many (number, timestamp, data) blocks
+    to the DB, skipping blocks that already exist.
+    """
     last_updated = int(time())
-    cursor.execute(
-        f"""
-        INSERT INTO block (number, timestamp, data, last_updated)
-        VALUES ({number}, {timestamp}, {data}, {last_updated})
-        """
+    execute_many(
+        "INSERT INTO block (number, timestamp, data, last_updated) VALUES %s ON CONFLICT DO NOTHING",
+        [tuple(block) + (last_updated,) for block in blocks]
     )
-    conn.commit()
-
 
 ##################################################
 def get_user(address):
@@ -59,15 +175,16 @@ def get_user(address):
     Function to return a User for a provided address
     if they exist in the DB else return None.
     """
-    cursor.execute(
-        f"""
-        SELECT * 
-        FROM user_address
-        WHERE address = '{address}'
-        """
-    )
-    return cursor.fetchone()
+    return execute("SELECT * FROM user_address WHERE address = %s", (address,), "one")
 
+##################################################
+def get_users(addresses):
+    """
+    Function to return a dict of address to User row for
+    every provided address that exists in the DB.
+    """
+    rows = execute("SELECT * FROM user_address WHERE address = ANY(%s)", (list(addresses),), "all")
+    return {row[0]: row for row in rows}
 
 ##################################################
 def add_user(address, ens, is_contract, first_activity=0):
@@ -75,15 +192,19 @@ def add_user(address, ens, is_contract, first_activity=0):
     Function to add a user to the database and set a
     default first_tx value to 0 unless provided.
     """
+    add_users([(address, ens, is_contract, first_activity)])
+
+##################################################
+def add_users(users):
+    """
+    Function to add many (address, ens, is_contract, first_activity)
+    users to the database, skipping users that already exist.
+    """
     last_updated = int(time())
-    cursor.execute(
-        f"""
-        INSERT INTO user_address (address, ens, is_contract, first_activity, last_updated)
-        VALUES ('{address}', '{ens}', {is_contract}, {first_activity}, {last_updated})
-        """
+    execute_many(
+        "INSERT INTO user_address (address, ens, is_contract, first_activity, last_updated) VALUES %s ON CONFLICT DO NOTHING",
+        [tuple(user) + (last_updated,) for user in users]
     )
-    conn.commit()
-
 
 ##################################################
 def update_user(address, ens, is_contract, first_activity):
@@ -92,75 +213,126 @@ def update_user(address, ens, is_contract, first_activity):
     function in the event data needs to be reprocessed.
     """
     last_updated = int(time())
-    """
-    CUR.execute(
-        "UPDATE user SET ens=?, is_contract=?, first_activity=?, last_updated=? WHERE address=?;",
-        (ens, is_contract, first_activity, last_updated, address,)
+    execute(
+        "UPDATE user_address SET ens = %s, is_contract = %s, first_activity = %s, last_updated = %s WHERE address = %s",
+        (ens, is_contract, first_activity, last_updated, address)
     )
-    CON.commit()
-    """
 
+##################################################
 def get_unprocessed_user():
     """
     Function to get an unprocessed user from the DB
     """
-    cursor.execute(
-        f"""
-        SELECT base_address
-        FROM friend_tech_user
-        WHERE status IS NULL
-        LIMIT 1
+    row = execute("SELECT base_address FROM friend_tech_user WHERE status IS NULL LIMIT 1", fetch="one")
+    return row[0] if row is not None else None
+
+##################################################
+def claim_friendtech_users(limit):
+    """
+    Function to atomically claim up to limit unprocessed users by
+    marking them as processing. Rows locked by another worker are
+    skipped, so concurrent workers never claim the same user.
+    """
+    rows = execute(
         """
+        UPDATE friend_tech_user
+        SET status = 'processing'
+        WHERE base_address IN (
+            SELECT base_address
+            FROM friend_tech_user
+            WHERE status IS NULL
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING base_address
+        """,
+        (limit,),
+        "all"
     )
-    try:
-        return cursor.fetchone()[0]
-    except TypeError as e:
-        return None
+    return [row[0] for row in rows]
 
 ##################################################
-def add_friendtech_user(base_address):
+def release_friendtech_users(base_addresses):
     """
-    Function to add a user to the database and set a
-    default first_tx value to 0 unless provided.
+    Function to return claimed users to the queue so
+    another worker can pick them up.
     """
-    cursor.execute(
-        f"""
-        INSERT INTO friend_tech (base_address)
-        VALUES ('{base_address}')
-        """
+    execute(
+        "UPDATE friend_tech_user SET status = NULL WHERE base_address = ANY(%s) AND status = 'processing'",
+        (list(base_addresses),)
     )
-    conn.commit()
+
+##################################################
+def reset_friendtech_claims():
+    """
+    Function to return every claimed user to the queue, for
+    claims left behind by a worker that was killed. Only run
+    this while no workers are running.
+    """
+    execute("UPDATE friend_tech_user SET status = NULL WHERE status = 'processing'")
+
+##################################################
+def add_friendtech_user(base_address):
+    """
+    Function to add a friend.tech user to the queue.
+    """
+    add_friendtech_users([base_address])
+
+##################################################
+def add_friendtech_users(base_addresses):
+    """
+    Function to add many friend.tech users to the queue in
+    a single statement.
+    """
+    execute_many("INSERT INTO friend_tech (base_address) VALUES %s", [(base_address,) for base_address in base_addresses])
+
+##################################################
+def load_friendtech_users(base_addresses):
+    """
+    Function to stream a large (iterable) list of new friend.tech
+    users into the queue with COPY. Returns the number loaded.
+    """
+    return copy_rows("friend_tech", ["base_address"], ((base_address,) for base_address in base_addresses))
 
 ##################################################
 def add_friendtech_metadata(base_address, id, t_un, t_id):
     """
-    Function to add a user to the database and set a
-    default first_tx value to 0 unless provided.
+    Function to store the friend.tech metadata for a user
+    and mark them as complete.
     """
-    cursor.execute(
-        f"""
+    add_friendtech_metadata_many([(base_address, id, t_un, t_id)])
+
+##################################################
+def add_friendtech_metadata_many(metadata):
+    """
+    Function to store many (base_address, id, twitter_username,
+    twitter_id) rows and mark them as complete in one statement.
+    """
+    execute_many(
+        """
         UPDATE friend_tech_user
         SET
-            ft_id = {id},
-            twitter_username = '{t_un}',
-            twitter_id = {t_id},
+            ft_id = v.ft_id,
+            twitter_username = v.twitter_username,
+            twitter_id = v.twitter_id,
             status = 'complete'
-        WHERE base_address = '{base_address}'
-        """
+        FROM (VALUES %s) AS v (base_address, ft_id, twitter_username, twitter_id)
+        WHERE friend_tech_user.base_address = v.base_address
+        """,
+        metadata,
+        template="(%s, %s::bigint, %s, %s::bigint)"
     )
-    conn.commit()
 
 ##################################################
 def flag_friendtech_user(base_address):
     """
     Function to skip processing for a speciifc base user.
     """
-    cursor.execute(
-        f"""
-        UPDATE friend_tech_user
-        SET status = 'skipped'
-        WHERE base_address = '{base_address}'
-        """
-    )
-    conn.commit()
+    flag_friendtech_users([base_address])
 
+##################################################
+def flag_friendtech_users(base_addresses):
+    """
+    Function to skip processing for many base users at once.
+    """
+    execute("UPDATE friend_tech_user SET status = 'skipped' WHERE base_address = ANY(%s)", (list(base_addresses),))
@@ -14,7 +14,8 @@
 
 import json
 import asyncio
-import aiohttp
+
+from modules import api
 
 ##################################################
 def scrape_async(addr):
@@ -55,7 +56,7 @@ async def scrape_helper(addresses):
     Function to create a ClientSession and to pass along
     to the data fetching function.
     """
-    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=False)) as client:
+    async with api.AsyncClient(ssl=False) as client:
         tokens = await fetch_data(client, addresses)
     return tokens
 
@@ -83,15 +84,13 @@ async def get_data(client, address):
     print("Scraping Address: " + str(address), end='\r', flush=True)
     url = "https://api.dex.guru/v3/tokens/search/" + address + "?network=eth"
 
-    async with client.get(url) as response:
-        try:
-            assert response.status == 200
-            data = await response.text()
-            return '{"address": "' + str(address) + '", "data": ' + data +'}'
-        except AssertionError:
-            print("Error Processing Address (dex.guru): " + str(address) + " with error code " + str(response.status))
-            print(url)
-            return '{"address": "' + str(address) + '", "data": "none"}'
+    try:
+        data = await client.get_text(url)
+        return '{"address": "' + str(address) + '", "data": ' + data +'}'
+    except api.HTTPError as e:
+        print("Error Processing Address (dex.guru): " + str(address) + " with error code " + str(e.status))
+        print(url)
+        return '{"address": "' + str(address) + '", "data": "none"}'
 
 
 ##################################################
@@ -0,0 +1,214 @@
+#! Python3
+"""
+    File name: enrichment.py
+    Date created: 10/18/2026
+    Python Version: 3.9.x
+    File Details:
+        Purpose: A bulk user-profile enrichment pipeline. Takes a full list of holder
+        addresses, finds the ones missing from the local user cache in one query and
+        resolves them concurrently (ENS name, contract check, first activity).
+
+        Notes:
+        - Replaces the process_user copies in the holder scripts, which ran four or
+          more network calls one after another for every uncached holder.
+        - Each lookup kind has its own bounded worker pool and rate limit (see
+          LOOKUPS). The two Etherscan lookups split the 5 req/s API limit, which
+          api.py also enforces across everything calling Etherscan.
+        - ENS names are resolved in batches through ReverseRecords and cached
+          users have their name refreshed once it is older than ENS_TTL.
+        - Contract checks use batched eth_getCode calls (see eth.get_contract_kinds).
+        - All DB reads and writes happen on the calling thread (the DB connection
+          is bound to it), workers only make network calls. The contract check reads
+          and writes the code cache, so it runs on the calling thread while ENS names
+          resolve on a worker. Results are written back in a single transaction.
+        - Failed lookups are retried (see run_lookup) and are never cached. With
+          strict=True get_user_details raises once the rest are cached, so a caller
+          writing resumable output (see report.py) doesn't write incomplete rows.
+"""
+
+# Import Standard Packages
+from concurrent.futures import ThreadPoolExecutor
+from time import sleep, time
+
+# Import Other Packages
+from termcolor import colored
+import requests
+
+from modules import api, db, eth, rpc
+
+DEBUG = False
+
+ENS_TTL = 30 * 24 * 60 * 60 # Refresh cached ENS names after 30 days
+
+# Worker pool size and requests per second for each lookup kind
+LOOKUPS = {
+    "deploy_block": {"workers": 2, "rate": 2},
+    "first_transaction": {"workers": 3, "rate": 3}
+}
+
+##################################################
+def get_user_details(addresses, lookups=LOOKUPS, strict=False):
+    """
+    Function to return a dict of address to user details for every
+    provided address, in the same (address, ens, is_contract,
+    first_activity, last_updated, ens_updated) shape as db.get_user.
+    Cache misses are resolved concurrently and written to the DB in
+    bulk, expired ENS names are refreshed. Users whose contract check
+    or first activity couldn't be resolved are returned with None /
+    0, or if strict raise a LookupError after the rest are cached.
+    """
+    s_time = time()
+    output = db.get_users(addresses)
+    missing = [address for address in addresses if address not in output]
+
+    # Cached users whose ENS name has expired (or was never resolved in bulk)
+    expiry = int(time()) - ENS_TTL
+    stale = [address for address, row in output.items() if len(row) < 6 or (row[5] or 0) < expiry]
+
+    print("Found " + str(len(output)) + " cached users (" + str(len(stale)) + " with expired ENS), resolving " + str(len(missing)) + " users.")
+    if not missing and not stale:
+        return output
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        # ENS names and contract checks are independent, run them side by side.
+        # The contract check uses the DB so it stays on this thread.
+        ens_future = executor.submit(lookup_ens_names, missing + stale)
+        contracts = lookup_contracts(missing)
+        ens_names = ens_future.result()
+
+        # First activity depends on whether the address is a contract
+        contract_addresses = [address for address in missing if contracts.get(address) is True]
+        user_addresses = [address for address in missing if contracts.get(address) is False]
+        deploy_future = executor.submit(run_lookup, "deploy_block", lookup_deploy_block, contract_addresses, lookups)
+        first_future = executor.submit(run_lookup, "first_transaction", eth.get_first_transaction, user_addresses, lookups)
+        deploy_blocks = deploy_future.result()
+        first_transactions = first_future.result()
+
+    # Resolve deploy timestamps here as the block index writes to the DB
+    first_activity = dict(first_transactions)
+    deploy_timestamps = eth.get_block_timestamps(deploy_blocks.values())
+    for address, block in deploy_blocks.items():
+        first_activity[address] = deploy_timestamps[block]
+
+    # Refresh expired ENS names for cached users
+    last_updated = int(time())
+    refreshed = []
+    for address in stale:
+        if address in ens_names:
+            refreshed.append((address, ens_names[address], last_updated))
+            output[address] = (address, ens_names[address]) + tuple(output[address][2:5]) + (last_updated,)
+    db.update_ens_names(refreshed)
+
+    # Only cache users where every lookup succeeded, ENS is retried via the TTL
+    resolved = []
+    for address in missing:
+        ens_name = ens_names.get(address, "")
+        ens_updated = last_updated if address in ens_names else 0
+        is_contract = contracts.get(address)
+        activity = first_activity.get(address)
+
+        # Match the 1 / 0 stored in the DB for is_contract
+        if is_contract is not None:
+            is_contract = int(is_contract)
+
+        if is_contract is not None and activity is not None:
+            resolved.append((address, ens_name, is_contract, activity, ens_updated))
+        output[address] = (address, ens_name, is_contract, activity or 0, last_updated, ens_updated)
+
+    db.add_users(resolved)
+
+    e_time = time()
+    print(colored("Resolved " + str(len(resolved)) + " / " + str(len(missing)) + " users in " + str(round(e_time-s_time,2)) + "s", 'green'))
+
+    failed = len(missing) - len(resolved)
+    if failed:
+        print(colored("Failed to resolve " + str(failed) + " users, they will be retried on the next run.", 'red'))
+        if strict:
+            raise LookupError("Failed to resolve " + str(failed) + " / " + str(len(missing)) + " users")
+
+    return output
+
+##################################################
+def run_lookup(kind, function, addresses, lookups=LOOKUPS, retries=2):
+    """
+    Function to run a lookup function over a list of addresses on its
+    own bounded, rate limited worker pool. Addresses whose lookup
+    raised are retried up to retries times with a backoff. Returns a
+    dict of address to result, addresses that still fail are left out.
+    """
+    settings = lookups[kind]
+    limiter = api.TokenBucket(settings["rate"])
+    output = {}
+    errors = {}
+
+    def call(address):
+        limiter.wait()
+        try:
+            return address, function(address), None
+        except Exception as e:
+            return address, None, e
+
+    pending = list(addresses)
+    with ThreadPoolExecutor(max_workers=settings["workers"]) as executor:
+        for attempt in range(retries + 1):
+            if attempt > 0:
+                sleep(2 ** attempt)
+                print("Retrying " + kind + " for " + str(len(pending)) + " addresses.")
+
+            errors = {}
+            i = 1
+            for address, result, error in executor.map(call, pending):
+                if DEBUG: print("Resolved " + kind + " " + str(i) + " / " + str(len(pending)))
+                if error is None:
+                    output[address] = result
+                else:
+                    errors[address] = error
+                    if DEBUG: print("\n" + kind + " lookup failed for " + address + ": " + str(error))
+                i+=1
+
+            pending = list(errors)
+            if not pending:
+                break
+
+    print("Resolved " + kind + " for " + str(len(output)) + " / " + str(len(addresses)) + " addresses.")
+    if errors:
+        print(colored(kind + " lookup failed for " + str(len(errors)) + " addresses, last error: " + str(list(errors.values())[-1]), 'red'))
+    return output
+
+##################################################
+def lookup_ens_names(addresses):
+    """
+    Function to batch resolve ENS names, returning an empty dict
+    on failure as ENS errors shouldn't block caching the user.
+    """
+    try:
+        names = eth.get_ens_names(addresses)
+    except Exception as e:
+        print("ENS lookup failed: " + str(e))
+        return {}
+
+    print("Resolved ENS for " + str(len(addresses)) + " addresses.")
+    return names
+
+##################################################
+def lookup_contracts(addresses):
+    """
+    Function to batch check which addresses are contracts, returning
+    an empty dict on a network failure so the users are retried next
+    run. Must be called on the thread that owns the DB connection.
+    """
+    try:
+        kinds = eth.get_contract_kinds(addresses)
+    except (requests.RequestException, rpc.RPCError) as e:
+        print("Contract lookup failed: " + str(e))
+        return {}
+
+    print("Resolved contract for " + str(len(addresses)) + " addresses.")
+    return {address: kind != "eoa" for address, kind in kinds.items()}
+
+##################################################
+def lookup_deploy_block(address):
+    """
+    Function to look up the block a contract was deployed in.
+    """
+    return eth.get_contract_deploy_date(address, True)
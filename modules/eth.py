@@ -11,14 +11,23 @@
         Notes:
         - Will standardize code comment structure in the future.
         - May move API keys to ENV
+        - Importing this module makes no network calls. The Web3 and ENS clients
+          are created on first use (get_web3 / get_ns) and the latest block is
+          resolved once per run and then pinned (see get_latest_block).
 """
 
 from web3 import Web3
 from ens import ENS
-from modules import config, db, data
+from ens.exceptions import InvalidName
+from ens.utils import normalize_name
+from eth_utils import event_abi_to_log_topic
+from web3.exceptions import BadFunctionCallOutput, ContractLogicError
+from web3._utils import request as web3_request
+from modules import api, config, db, data, rpc
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from bisect import bisect
 from time import sleep, time
 from termcolor import colored
-import requests
 import dotenv
 import os
 import sys
@@ -30,17 +39,62 @@ ETHERSCAN_KEY = os.getenv("ETHERSCAN_API_KEY")
 ETHERSCAN = "https://api.etherscan.io/api"
 
 RPC = os.getenv("ORIGIN_RPC") or "https://eth-mainnet.alchemyapi.io/v2/" + os.getenv("ALCHEMY_API_KEY")
-WEB3 =  Web3(Web3.HTTPProvider(RPC))
-ns = ENS.from_web3(WEB3)
+WEB3 = None # Created on first use, see get_web3
+NS = None # Created on first use, see get_ns
+LATEST_BLOCK = None # Pinned on first use, see get_latest_block
 
 # Load ERC20 ABI
 ABI = config.load("modules/abi/erc20.json")
 GNOSIS = config.load("modules/abi/gnosis.json")
 
+# Multicall3 is deployed to the same address on mainnet and most other chains
+MULTICALL = "0xcA11bde05977b3631167028862bE2a173976CA11"
+MULTICALL_ABI = config.load("modules/abi/multicall3.json")
+BALANCE_OF = bytes.fromhex("70a08231") # balanceOf(address) selector
+
+# ENS ReverseRecords resolves many reverse records per call and forward-verifies them
+REVERSE_RECORDS = "0x3671aE578E63FdF66ad4F3E12CC0c0d71Ac7510C"
+REVERSE_RECORDS_ABI = config.load("modules/abi/reverse_records.json")
+
+# EIP-1167 minimal proxy runtime code is this prefix + implementation address + suffix
+MINIMAL_PROXY_PREFIX = bytes.fromhex("363d3d373d3d3d363d73")
+MINIMAL_PROXY_SUFFIX = bytes.fromhex("5af43d82803e903d91602b57fd5bf3")
+
+# Safe proxies (v1.1.1+) answer masterCopy() from storage slot 0 before delegating, so
+# every Safe proxy's runtime code pushes the padded 0xa619486e selector for the comparison
+SAFE_PROXY_MARKER = bytes.fromhex("7fa619486e") + bytes(28)
+
+# Storage pointer proxies (EIP-1967 / UUPS / OZ Transparent, legacy zos) push one of these
+# slots and share identical runtime code across deployments with unrelated implementations
+PROXY_SLOTS = [
+    (int.from_bytes(Web3.keccak(text="eip1967.proxy.implementation"), "big") - 1).to_bytes(32, "big"),
+    (int.from_bytes(Web3.keccak(text="eip1967.proxy.beacon"), "big") - 1).to_bytes(32, "big"),
+    bytes(Web3.keccak(text="org.zeppelinos.proxy.implementation"))
+]
+
+# Block timestamps are strictly increasing, by at least one 12s slot after the merge
+MERGE_BLOCK = 15537394
+MAX_TIMESTAMP_ERROR = 300 # Default error bound (seconds) for estimated timestamps
+
+# Fragments of provider errors that mean an eth_getLogs window was too large
+# eth_getLogs errors (lower case) providers return when a block window has too many results
+LOG_RANGE_ERRORS = [
+    "query returned more than", # Geth, Infura
+    "query exceeds max results", # Erigon
+    "log response size exceeded", # Alchemy
+    "logs matched by query exceeds limit",
+    "block range too large",
+    "block range is too wide", # Ankr
+    "block range limit exceeded", # Chainstack
+    "exceed maximum block range",
+    "eth_getlogs is limited to", # QuickNode
+    "eth_getlogs and eth_newfilter are limited to"
+]
+
 ##################################################
 # Function to get block details
 def get_block(block_id, is_full):
-    return WEB3.eth.get_block(block_identifier=block_id, full_transactions=is_full)
+    return get_web3().eth.get_block(block_identifier=block_id, full_transactions=is_full)
 
 ##################################################
 # Function to get block details
@@ -51,16 +105,14 @@ def get_block_data(number):
 
     # if block does not exist process and return
     if block is None:
-        block_data = WEB3.eth.get_block(block_identifier=number, full_transactions=False)
-        block_data_json = WEB3.to_json(block_data)
+        block_data = get_web3().eth.get_block(block_identifier=number, full_transactions=False)
+        block_data_json = Web3.to_json(block_data)
         block_data_string = data.json_to_string(block_data_json)
 
         block_timestamp = block_data["timestamp"]
         db.add_block(number, block_timestamp, block_data_string)
 
-        db_block = db.get_block(number)
-        db_block_json = data.string_to_json(db_block[2])
-        return db_block_json
+        return data.string_to_json(block_data_string)
 
     # Else, return block details from DB
     else:
@@ -68,45 +120,213 @@ def get_block_data(number):
         return block_json
 
 ##################################################
-# Function to get the latest block processed
-def get_latest_block():
-    return WEB3.eth.get_block('latest').number
+def get_block_timestamp(number):
+    """
+    Function to get the timestamp for a single block
+    from the block timestamp index.
+    """
+    return get_block_timestamps([number])[number]
+
+##################################################
+def get_block_timestamps(numbers, batch_size=500):
+    """
+    Function to get the timestamps for many blocks at once. Blocks
+    missing from the local block_time index are fetched with batched
+    eth_getBlockByNumber calls and stored in bulk. Returns a dict of
+    block number to timestamp.
+    """
+    numbers = list(set(int(number) for number in numbers))
+    output = db.get_block_timestamps(numbers)
+    missing = [number for number in numbers if number not in output]
+
+    if missing:
+        print("Fetching timestamps for " + str(len(missing)) + " blocks.")
+
+        # The index is its own cache, skip the RPC cache for these headers
+        with batch(batch_size, None) as b:
+            futures = [b.add("eth_getBlockByNumber", [rpc.to_block_param(number), False]) for number in missing]
+        fetched = [(number, int(future.result()["timestamp"], 16)) for number, future in zip(missing, futures)]
+
+        db.add_block_timestamps(fetched)
+        output.update(fetched)
+
+    return output
+
+##################################################
+def estimate_block_timestamps(numbers, max_error=MAX_TIMESTAMP_ERROR, batch_size=500):
+    """
+    Function to estimate timestamps for many blocks by interpolating
+    between indexed anchor blocks. As timestamps strictly increase
+    (by 12s per block after the merge) each estimate has a hard
+    bound, and blocks whose bound is above max_error seconds are
+    fetched exactly instead. Returns a dict of block number to
+    timestamp, every value is within max_error of the real one.
+    """
+    numbers = sorted(set(int(number) for number in numbers))
+    if not numbers:
+        return {}
+
+    anchors = db.get_block_anchors(numbers[0], numbers[-1])
+    output = {}
+    pending = numbers
+    fetched = 0
+
+    while pending:
+        keys = sorted(anchors)
+        groups = {}
+
+        for number in pending:
+            if number in anchors:
+                output[number] = anchors[number]
+                continue
+
+            position = bisect(keys, number)
+            if 0 < position < len(keys):
+                estimate, error = interpolate_timestamp(number, keys[position - 1], keys[position], anchors)
+                if error <= max_error:
+                    output[number] = estimate
+                    continue
+
+            groups.setdefault(position, []).append(number)
+
+        if not groups:
+            break
+
+        # Fetch one block per unbounded gap, splitting it for the next round
+        fetch = []
+        for position, group in groups.items():
+            if position == 0:
+                fetch.append(group[0])
+            elif position == len(keys):
+                fetch.append(group[-1])
+            else:
+                fetch.append(group[len(group) // 2])
+
+        anchors.update(get_block_timestamps(fetch, batch_size))
+        fetched += len(fetch)
+        pending = [number for group in groups.values() for number in group]
+
+    print("Estimated " + str(len(numbers) - fetched) + " / " + str(len(numbers)) + " block timestamps (max error " + str(max_error) + "s).")
+    return output
+
+##################################################
+def interpolate_timestamp(number, low_block, high_block, anchors):
+    """
+    Function to linearly interpolate a block timestamp between two
+    anchor blocks. Returns (estimate, max_error) where the error is
+    a hard bound from the minimum spacing between blocks.
+    """
+    low_time = anchors[low_block]
+    high_time = anchors[high_block]
+
+    # Earliest and latest the block could possibly have been mined
+    earliest = low_time + min_block_spacing(low_block, number)
+    latest = high_time - min_block_spacing(number, high_block)
+
+    estimate = low_time + (high_time - low_time) * (number - low_block) // (high_block - low_block)
+    estimate = min(max(estimate, earliest), latest)
+
+    return estimate, max(estimate - earliest, latest - estimate)
+
+##################################################
+def min_block_spacing(from_block, to_block):
+    """
+    Function to return the minimum number of seconds between
+    two blocks. One second per block before the merge and one
+    12 second slot per block after it.
+    """
+    if from_block >= MERGE_BLOCK:
+        return 12 * (to_block - from_block)
+    return to_block - from_block
+
+##################################################
+def get_web3():
+    """
+    Function to return the shared Web3 client, creating
+    it on first use.
+    """
+    global WEB3
+    if WEB3 is None:
+        WEB3 = Web3(Web3.HTTPProvider(RPC))
+        # Innermost, so the cache stores raw results rather than formatted ones
+        WEB3.middleware_onion.inject(rpc.cache_middleware, "rpc_cache", layer=0)
+    return WEB3
+
+##################################################
+def reset():
+    """
+    Function to drop the clients inherited from the parent in a
+    forked worker process, so the worker opens its own connections.
+    """
+    global WEB3, NS
+    WEB3 = None
+    NS = None
+
+    # web3 caches one requests session per thread, don't reuse the parent's sockets
+    web3_request._session_cache.clear()
+    rpc.reset()
+
+##################################################
+def get_ns():
+    """
+    Function to return the shared ENS client, creating
+    it on first use.
+    """
+    global NS
+    if NS is None:
+        NS = ENS.from_web3(get_web3())
+    return NS
+
+##################################################
+def get_latest_block(refresh=False):
+    """
+    Function to get the latest block number. The first call
+    pins it for the rest of the run so every query sees the
+    same chain state, pass refresh=True to fetch a new one.
+    """
+    global LATEST_BLOCK
+    if LATEST_BLOCK is None or refresh:
+        LATEST_BLOCK = get_web3().eth.get_block('latest').number
+
+        # Blocks near the head can still reorg, keep them out of the RPC cache
+        rpc.CACHE.head = LATEST_BLOCK
+    return LATEST_BLOCK
 
 ##################################################
 # Function to get details about a Transaction
 def get_transaction(tx):
-    return WEB3.eth.get_transaction(tx)
+    return get_web3().eth.get_transaction(tx)
 
 ##################################################
 # Function to get a Transaction receipt
 def get_transaction_receipt(tx):
-    return WEB3.eth.get_transaction_receipt(tx)
+    return get_web3().eth.get_transaction_receipt(tx)
 
 ##################################################
 # Function to initialize a Contract object
 def get_contract(address, contract_abi=ABI):
-    return WEB3.eth.contract(address=address, abi=contract_abi)
+    return get_web3().eth.contract(address=address, abi=contract_abi)
 
 ##################################################
 # Function to convert from ether to wei
 def ether_to_wei(ether):
-    return WEB3.to_wei(ether, 'ether')
+    return Web3.to_wei(ether, 'ether')
 
 ##################################################
 # Function to convert from gwei to wei
 def gwei_to_wei(gwei):
-    return WEB3.to_wei(gwei, 'gwei')
+    return Web3.to_wei(gwei, 'gwei')
 
 ##################################################
 # Function to convert from gwei to wei
 def gwei_to_ether(gwei):
-    wei = WEB3.to_wei(gwei, 'gwei')
-    return WEB3.from_wei(wei, 'ether')
+    wei = Web3.to_wei(gwei, 'gwei')
+    return Web3.from_wei(wei, 'ether')
 
 ##################################################
 # Function to convert from wei to ether
 def wei_to_ether(wei):
-    return WEB3.from_wei(wei, 'ether')
+    return Web3.from_wei(wei, 'ether')
 
 ##################################################
 # Function to convert from bytes to int
@@ -115,24 +335,120 @@ def bytes2int(bytes):
 
 ##################################################
 # Function to get token balance for provided contract
-def get_token_balance(contract_object, address, block=get_latest_block()):
+def get_token_balance(contract_object, address, block=None):
+    block = block if block is not None else get_latest_block()
     return contract_object.functions.balanceOf(address).call(block_identifier=block)
 
+##################################################
+def get_token_balances(contracts, addresses, block, batch_size=500):
+    """
+    Function to get the raw balanceOf for every contract / address pair
+    using Multicall3 aggregate3. Returns a matrix with one row per address
+    and one column per contract, in the order provided. Calls that fail
+    inside the Multicall are retried on their own, see get_address_calls.
+    """
+    return get_address_calls(contracts, addresses, block, BALANCE_OF, batch_size)
+
+##################################################
+def get_address_calls(contracts, addresses, block, selector, batch_size=500):
+    """
+    Function to call a view function that takes a single address and
+    returns a uint256 (such as balanceOf) for every contract / address
+    pair using Multicall3 aggregate3. Returns an address x contract
+    matrix. Calls that fail inside the Multicall (for example out of
+    gas) are retried with a single eth_call, which raises if the call
+    really fails, so a failure is never mistaken for a zero.
+    """
+    multicall = get_contract(MULTICALL, MULTICALL_ABI)
+
+    # Build the flattened call list, address major so rows stay contiguous
+    calls = []
+    for address in addresses:
+        call_data = selector + bytes.fromhex(address[2:].rjust(64, "0"))
+        for contract in contracts:
+            calls.append((contract.address, True, call_data))
+
+    # Send the calls in chunks of batch_size per eth_call
+    results = []
+    for i in range(0, len(calls), batch_size):
+        if DEBUG: print("Multicall: " + str(i) + " / " + str(len(calls)))
+        batch = calls[i:i + batch_size]
+        results.extend(multicall.functions.aggregate3(batch).call(block_identifier=block))
+
+    # Decode the results back into an address x contract matrix
+    output = []
+    width = len(contracts)
+    for row in range(len(addresses)):
+        values = []
+        for column, (success, return_data) in enumerate(results[row * width:(row + 1) * width]):
+            if success and len(return_data) >= 32:
+                values.append(int.from_bytes(return_data[:32], "big"))
+            else:
+                values.append(call_address(contracts[column], addresses[row], block, selector))
+        output.append(values)
+
+    return output
+
+##################################################
+def call_address(contract, address, block, selector):
+    """
+    Function to make a single address view call with eth_call,
+    raising if it reverts or doesn't return a uint256.
+    """
+    call_data = selector + bytes.fromhex(address[2:].rjust(64, "0"))
+    return_data = get_web3().eth.call({"to": contract.address, "data": call_data}, block)
+    if len(return_data) < 32:
+        raise BadFunctionCallOutput("Call to " + contract.address + " for " + address + " returned no value")
+    return int.from_bytes(return_data[:32], "big")
+
 ##################################################
 # Function to get token balance for provided contract
-def get_total_supply(contract_object, block=get_latest_block()):
+def get_total_supply(contract_object, block=None):
+    block = block if block is not None else get_latest_block()
     print(block)
     return contract_object.functions.totalSupply().call(block_identifier=block)
 
 ##################################################
 # Function to get token balance for provided contract
-def get_frax_position(contract_object, address, block=get_latest_block()):
+def get_frax_position(contract_object, address, block=None):
+    block = block if block is not None else get_latest_block()
     return contract_object.functions.lockedLiquidityOf(address).call(block_identifier=block)
 
 ##################################################
 # Function to get ETH balance for provided address
-def get_balance(address, block = get_latest_block()):
-    return WEB3.eth.get_balance(address, block)
+def get_balance(address, block=None):
+    block = block if block is not None else get_latest_block()
+    return get_web3().eth.get_balance(address, block)
+
+##################################################
+def batch(max_size=500, cache=rpc.CACHE):
+    """
+    Function to open a JSON-RPC batch against the shared provider.
+    Calls added inside the block are sent together as one request.
+    """
+    return rpc.Batch(RPC, max_size, cache=cache)
+
+##################################################
+def get_balances(addresses, block, batch_size=500):
+    """
+    Function to get the ETH balance (in wei) for a list of
+    addresses using batched eth_getBalance calls.
+    """
+    block = rpc.to_block_param(block)
+    with batch(batch_size) as b:
+        futures = [b.add("eth_getBalance", [address, block]) for address in addresses]
+    return [int(future.result(), 16) for future in futures]
+
+##################################################
+def get_transaction_counts(addresses, block, batch_size=500):
+    """
+    Function to get the transaction count (nonce) for a list of
+    addresses using batched eth_getTransactionCount calls.
+    """
+    block = rpc.to_block_param(block)
+    with batch(batch_size) as b:
+        futures = [b.add("eth_getTransactionCount", [address, block]) for address in addresses]
+    return [int(future.result(), 16) for future in futures]
 
 ##################################################
 # Function to get the current ETH price
@@ -144,7 +460,7 @@ def get_eth_price():
 ##################################################
 # Function to take an address and return checksum
 def get_checksum(address):
-    return WEB3.to_checksum_address(address)
+    return Web3.to_checksum_address(address)
 
 ##################################################
 # Function to get all NFT holders for a contract
@@ -170,12 +486,11 @@ def get_contract_deploy_date(address, return_block=False):
 
     # Pull the block from the transaction receipt and lookup timestamp
     block = tx_receipt["blockNumber"]
-    block_data = get_block_data(block)
 
     if return_block:
         return block
     else:
-        return block_data["timestamp"]
+        return get_block_timestamp(block)
 
 ##################################################
 # Function to determine if an address is a contract
@@ -201,10 +516,111 @@ def is_gnosis(address):
     except Exception as e:
         return False
 
+##################################################
+def get_contract_kinds(addresses, batch_size=500):
+    """
+    Function to classify a list of addresses as 'eoa', 'contract',
+    'safe' or 'minimal_proxy'. Code hashes are stored per address and
+    each distinct code hash is only classified once, Safe proxies are
+    recognised from their code alone. Storage pointer proxies share
+    code across unrelated implementations, so their hash is stored as
+    'proxy' and each address gets its own VERSION() check instead.
+    Addresses without code are always rechecked, as contracts can be
+    deployed to them later (e.g. counterfactual Safes).
+    """
+    stored = db.get_codes(addresses)
+    missing = [address for address in addresses if address not in stored]
+
+    # Fetch code for unseen addresses and store the hash for contracts
+    codes = dict(zip(missing, get_codes(missing, "latest", batch_size)))
+    db.add_codes([(address, Web3.keccak(code).hex(), len(code)) for address, code in codes.items() if code])
+    db.flush()
+    stored = db.get_codes(addresses)
+
+    # Classify each new code hash once, using the first address seen with it
+    unclassified = {}
+    for address in addresses:
+        row = stored.get(address)
+        if row is not None and row[2] is None:
+            unclassified.setdefault(row[0], address)
+
+    kinds = {}
+    for code_hash, address in unclassified.items():
+        code = codes.get(address) or bytes(get_web3().eth.get_code(address))
+        try:
+            kinds[code_hash] = classify_code(address, code)
+        except Exception as e:
+            # Don't store a kind we aren't sure of, retry on the next run
+            if DEBUG: print("Failed to classify " + address + ": " + str(e))
+            kinds[code_hash] = None
+    db.add_code_kinds([(code_hash, kind) for code_hash, kind in kinds.items() if kind is not None])
+
+    output = {}
+    for address in addresses:
+        row = stored.get(address)
+        if row is None:
+            output[address] = "eoa"
+            continue
+
+        kind = row[2] or kinds.get(row[0]) or "contract"
+        if kind == "proxy":
+            # The implementation behind a shared proxy hash decides, check each address
+            kind = "safe" if has_safe_version(address) else "contract"
+        output[address] = kind
+
+    return output
+
+##################################################
+def get_codes(addresses, block="latest", batch_size=500):
+    """
+    Function to get the runtime code for a list of addresses
+    using batched eth_getCode calls. Returns a list of bytes,
+    empty for addresses without code.
+    """
+    block = rpc.to_block_param(block)
+    with batch(batch_size) as b:
+        futures = [b.add("eth_getCode", [address, block]) for address in addresses]
+    return [bytes.fromhex(future.result()[2:]) for future in futures]
+
+##################################################
+def classify_code(address, code):
+    """
+    Function to classify the code deployed at an address. Safe proxies
+    are matched on their code, storage pointer proxies are returned as
+    'proxy' as their kind depends on the implementation, anything else
+    is checked with a VERSION() call.
+    """
+    if SAFE_PROXY_MARKER in code:
+        return "safe"
+
+    if any(slot in code for slot in PROXY_SLOTS):
+        return "proxy"
+
+    if has_safe_version(address):
+        return "safe"
+
+    if code.startswith(MINIMAL_PROXY_PREFIX) and code.endswith(MINIMAL_PROXY_SUFFIX):
+        return "minimal_proxy"
+
+    return "contract"
+
+##################################################
+def has_safe_version(address):
+    """
+    Function to check for a Safe with a VERSION() call, the same check
+    as is_gnosis, but only a revert or empty return counts as not a
+    Safe so transport errors are raised.
+    """
+    try:
+        get_contract(address, GNOSIS).functions.VERSION().call()
+        return True
+    except (BadFunctionCallOutput, ContractLogicError):
+        return False
+
 ##################################################
 # Function to determine if an address is a contract
 def is_contract(address):
-    data = WEB3.eth.get_code(address)
+    data = get_web3().eth.get_code(address)
 
     if len(data) == 0:
         return False
@@ -225,7 +641,8 @@ def is_contract_verified(address):
 
 ##################################################
 # Function to get token balance for provided contract
-def get_cvx_proxy_owner(contract_object, block=get_latest_block()):
+def get_cvx_proxy_owner(contract_object, block=None):
+    block = block if block is not None else get_latest_block()
     return contract_object.functions.owner().call(block_identifier=block)
 
 ##################################################
@@ -240,8 +657,9 @@ def get_source_code(address):
 
 ##################################################
 # Function to take an address and return checksum
-def get_transaction_count(address, block = get_latest_block()):
-    return WEB3.eth.get_transaction_count(address, block)
+def get_transaction_count(address, block=None):
+    block = block if block is not None else get_latest_block()
+    return get_web3().eth.get_transaction_count(address, block)
 
 ##################################################
 # Function to get the first user initiated transaction
@@ -308,64 +726,182 @@ def get_transactions(address):
 
 
 ##################################################
-def get_transfer_logs(contract, to_block, gap=1000000):
+def get_transfer_logs(contract, from_block=None, to_block=None, gap=100000, workers=4):
     """
     Function to get all transfer logs for a provided contract.
-    NOTE: This can run slowly depending on when the contract was
-    deployed and the block gap may need to be adjusted depending
-    on the activity within the collection. Designed for a specific
-    objective and is not efficient for all collections. Limited to
-    10k logs with > 2000 block range, unlimited logs with block range
-    that is <= 2,000.
+    Defaults to scanning from the contract deployment block up
+    to the latest block. See get_event_logs for how the range is
+    split up and fetched.
+    """
+    # Grab the contract deployment block if no start block was provided
+    if from_block is None:
+        from_block = get_contract_deploy_date(contract.address, True)
+
+    if to_block is None:
+        to_block = get_latest_block()
+
+    return get_event_logs(contract.events.Transfer, from_block, to_block, gap, workers)
+
+##################################################
+def get_event_logs(event, from_block, to_block, gap=100000, workers=4, target=5000, max_gap=1000000, decode=True):
+    """
+    Function to get all logs for a contract event between two blocks
+    (inclusive). Block windows are fetched concurrently with a bounded
+    pool of workers, scheduled by LogWindows. Returns decoded events
+    ordered by (block, log index), or the raw logs in the same order
+    if decode is False.
     """
     s_time = time()
-    output = []
+    contract_event = event()
+    params = get_log_params(contract_event)
+    windows = LogWindows(from_block, to_block, gap, target, max_gap)
 
-    # Grab the contract deployment block
-    from_block = get_contract_deploy_date(contract.address, True)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        running = {}
 
-    # Limit to how many events we can call at once, break calls into smaller chunks
-    start_block = from_block
-    end_block = to_block if (to_block - from_block) <= gap else (start_block + gap)
+        while running or windows.pending():
+            # Keep the pool full with new windows of the current size
+            for window in windows.take(workers - len(running)):
+                running[executor.submit(fetch_logs, params, *window)] = window
 
-    while True:
-        # Output processing progress
-        print("Processing: " + str(start_block) + " / " + str(to_block) + "          ", end='\r')
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
 
-        # Grab events from a range of blocks
-        transfer_filter = contract.events.Transfer.create_filter(fromBlock=start_block, toBlock=end_block)
-        transfer_entries = transfer_filter.get_all_entries()
+            for future in done:
+                window = running.pop(future)
+                try:
+                    logs = future.result()
+                except Exception as e:
+                    for half in windows.split(window, e):
+                        running[executor.submit(fetch_logs, params, *half)] = half
+                    continue
+                windows.add(window, logs)
 
-        # Log
-        if DEBUG: print("Fetched: " + str(start_block) + " to " + str(end_block))
+    return windows.result(contract_event, decode, s_time)
 
-        # Add events to the output list
-        output.extend(transfer_entries)
+##################################################
+def get_log_params(contract_event):
+    """
+    Function to return the eth_getLogs filter (without the
+    block range) for a contract event.
+    """
+    return {
+        "address": contract_event.address,
+        "topics": [event_abi_to_log_topic(contract_event.abi)]
+    }
 
-        # Break loop if end_block equals the desired to_block
-        if end_block == to_block: break
+##################################################
+class LogWindows:
+    """
+    Block window scheduler shared by eth.get_event_logs and
+    eth_async.get_event_logs. Windows are handed out at the current
+    size, a window the provider refuses (too many results, block
+    range too large) is bisected and retried, and the window size
+    grows while results are sparse and shrinks when they are dense.
+    """
+    def __init__(self, from_block, to_block, gap=100000, target=5000, max_gap=1000000):
+        self.next_block = from_block
+        self.to_block = to_block
+        self.gap = gap
+        self.target = target
+        self.max_gap = max_gap
+        self.logs = []
+        self.blocks_done = 0
+        self.blocks_total = to_block - from_block + 1
+
+    def pending(self):
+        return self.next_block <= self.to_block
+
+    def take(self, count):
+        """
+        Function to return up to count new (start, end) windows.
+        """
+        windows = []
+        while self.pending() and len(windows) < count:
+            end_block = min(self.next_block + self.gap - 1, self.to_block)
+            windows.append((self.next_block, end_block))
+            self.next_block = end_block + 1
+        return windows
+
+    def split(self, window, error):
+        """
+        Function to bisect a window the provider refused, returning
+        the two halves to fetch. Any other error is raised.
+        """
+        start_block, end_block = window
+        if not is_log_range_error(error) or start_block == end_block:
+            raise error
+
+        if DEBUG: print("Splitting: " + str(start_block) + " to " + str(end_block))
+        middle = (start_block + end_block) // 2
+        self.gap = max(1, (end_block - start_block + 1) // 2)
+        return [(start_block, middle), (middle + 1, end_block)]
+
+    def add(self, window, logs):
+        """
+        Function to store the logs for a fetched window and adapt
+        the window size to their density.
+        """
+        start_block, end_block = window
+        self.logs.extend(logs)
+        self.blocks_done += end_block - start_block + 1
+
+        # Grow the window while results are sparse, shrink when dense
+        if len(logs) < self.target // 4:
+            self.gap = min(self.gap * 2, self.max_gap)
+        elif len(logs) > self.target:
+            self.gap = max(1, self.gap // 2)
 
-        # Adjust start_block to be the previous end_block
-        start_block = end_block
+        # Output processing progress
+        print("Processing: " + str(self.blocks_done) + " / " + str(self.blocks_total) + " blocks          ", end='\r')
 
-        # Adjust end_block to the to_block if adding the gap takes us over the 
-        # desired to_block, otherwise, add the gap to the new start_block
-        end_block = to_block if (start_block + gap) > to_block else (start_block + gap)
-        sleep(0.3)
+    def result(self, contract_event, decode, s_time):
+        """
+        Function to return the logs in chain order, decoded if
+        decode is True.
+        """
+        # Windows complete out of order, restore chain order before decoding
+        self.logs.sort(key=lambda log: (log["blockNumber"], log["logIndex"]))
+        output = [contract_event.process_log(log) for log in self.logs] if decode else self.logs
 
-    e_time = time()
-    print(colored("\nRetrieved Events in " + str(round(e_time-s_time,2)) + "s", 'green'))
-    return output
+        e_time = time()
+        print(colored("\nRetrieved " + str(len(output)) + " Events in " + str(round(e_time-s_time,2)) + "s", 'green'))
+        return output
+
+##################################################
+def fetch_logs(params, start_block, end_block, retries=3):
+    """
+    Function to fetch the raw logs for one block window. Errors
+    that are not range related (such as timeouts) are retried with
+    a backoff, range errors are raised for the window to be split.
+    """
+    attempt = 0
+    while True:
+        try:
+            return get_web3().eth.get_logs(dict(params, fromBlock=start_block, toBlock=end_block))
+        except Exception as e:
+            attempt += 1
+            if is_log_range_error(e) or attempt > retries:
+                raise
+            sleep(0.5 * 2 ** attempt)
 
+##################################################
+def is_log_range_error(error):
+    """
+    Function to check whether an eth_getLogs error means the
+    block window was too large for the provider, by matching
+    the provider messages in LOG_RANGE_ERRORS.
+    """
+    message = str(error).lower()
+    return any(each in message for each in LOG_RANGE_ERRORS)
 
 
 ##################################################
 def get_data(url):
     """
-    Helper function to get data from a provided URL.
+    Helper function to get data from a provided URL through the
+    shared rate limited client.
     """
-    with requests.Session() as s:
-        return s.get(url)
+    return api.get(url)
 
 ##################################################
 def get_ens_name(address):
@@ -373,9 +909,54 @@ def get_ens_name(address):
     Function to lookup the ens name for an address.
     NOTE: Will display a FutureWarning, this can be ignored.
     """
-    ens_lookup = ns.name(address)
+    ens_lookup = get_ns().name(address)
 
     if ens_lookup is None:
         return ''
     else:
-        return ns.name(address)
+        return ens_lookup
+
+##################################################
+def get_ens_names(addresses, batch_size=200):
+    """
+    Function to reverse resolve ENS names for a list of addresses
+    through the ENS ReverseRecords getNames call, which only returns
+    a name if it forward resolves back to the same address. Returns
+    a dict of address to name ('' if there is no valid name).
+    """
+    reverse_records = get_contract(REVERSE_RECORDS, REVERSE_RECORDS_ABI)
+    output = {}
+
+    for i in range(0, len(addresses), batch_size):
+        if DEBUG: print("Resolving ENS: " + str(i) + " / " + str(len(addresses)))
+        batch = addresses[i:i + batch_size]
+        output.update(zip(batch, get_reverse_names(reverse_records, batch)))
+
+    return output
+
+##################################################
+def get_reverse_names(reverse_records, addresses):
+    """
+    Function to call getNames for a batch of addresses. A single
+    broken resolver reverts the whole call, so reverted batches are
+    split in half until the bad address is found and skipped. Other
+    errors (connection errors, timeouts, 429s) are raised so the
+    names are retried later instead of being stored as blank.
+    """
+    try:
+        names = reverse_records.functions.getNames(addresses).call()
+    except ContractLogicError:
+        if len(addresses) == 1:
+            return [""]
+        middle = len(addresses) // 2
+        return get_reverse_names(reverse_records, addresses[:middle]) + get_reverse_names(reverse_records, addresses[middle:])
+
+    # Drop names that are not in normalized form, as the UI would
+    output = []
+    for name in names:
+        try:
+            output.append(name if name and normalize_name(name) == name else "")
+        except InvalidName:
+            output.append("")
+
+    return output
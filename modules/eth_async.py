@@ -0,0 +1,306 @@
+#! Python3
+"""
+    File name: eth_async.py
+    Date created: 10/18/2026
+    Python Version: 3.9.x
+    File Details:
+        Purpose: Asyncio versions of the per address read helpers in eth.py, built
+        on AsyncWeb3, so a script can gather thousands of independent reads at once
+        instead of making them one after another.
+
+        Notes:
+        - Every call shares one aiohttp session (one connection pool) per event loop.
+        - At most LIMIT requests are in flight at a time, pass limit to run (or call
+          set_limit) to change it. Extra calls wait their turn.
+        - Calls pinned to a block number go through the same RPC cache as eth.py and
+          the latest block is pinned once per run and shared with eth.py.
+        - Contract and event objects from eth.get_contract can be passed in as is.
+        - Blocking calls (DB, Etherscan) run in an executor so they don't stall the
+          loop. DB calls share one thread, which gets its own connection (db.connection).
+        - Use run to drive a coroutine, it opens the session and closes it again:
+
+            balances = eth_async.run(eth_async.gather(eth_async.get_balance, addresses, block), limit=100)
+"""
+
+# Import Standard Packages
+from concurrent.futures import ThreadPoolExecutor
+from time import time
+import asyncio
+
+# Import Other Packages
+from web3 import AsyncHTTPProvider, AsyncWeb3, Web3
+from web3._utils import request as web3_request
+import aiohttp
+
+from modules import data, db, eth, rpc
+
+LIMIT = 64 # Requests in flight at a time
+TIMEOUT = 60
+
+WEB3 = None # Created on first use in each event loop, see get_web3
+SESSION = None
+SEMAPHORE = None
+LOOP = None
+CONTRACTS = {}
+DB = ThreadPoolExecutor(max_workers=1) # Runs DB calls off the loop, on one connection
+
+##################################################
+async def get_web3():
+    """
+    Function to return the shared AsyncWeb3 client, creating it
+    (and its connection pool) on first use in the running loop.
+    Calls made while it is being created wait for the same one.
+    If creating it fails the next call tries again.
+    """
+    global WEB3, LOOP
+    loop = asyncio.get_running_loop()
+    if WEB3 is None or LOOP is not loop:
+        LOOP = loop
+        WEB3 = loop.create_task(connect())
+
+    # Shielded, so a caller being cancelled doesn't cancel it for everyone else
+    task = WEB3
+    try:
+        return await asyncio.shield(task)
+    except BaseException:
+        # Don't keep handing out the failed task
+        if WEB3 is task and task.done():
+            WEB3 = None
+        raise
+
+##################################################
+async def connect():
+    """
+    Function to create the AsyncWeb3 client on a pooled
+    session with the in-flight limit and RPC cache.
+    """
+    global SESSION, SEMAPHORE
+    SEMAPHORE = asyncio.Semaphore(LIMIT)
+    connector = aiohttp.TCPConnector(limit=LIMIT)
+    SESSION = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=TIMEOUT), raise_for_status=True)
+
+    provider = AsyncHTTPProvider(eth.RPC)
+    try:
+        await provider.cache_async_session(SESSION)
+    except BaseException:
+        await SESSION.close()
+        SESSION = None
+        raise
+    w3 = AsyncWeb3(provider)
+
+    # Innermost, so the cache stores raw results and cache hits don't take a slot
+    w3.middleware_onion.inject(rpc.async_cache_middleware, "rpc_cache", layer=0)
+    w3.middleware_onion.inject(limit_middleware, "limit", layer=0)
+    CONTRACTS.clear()
+    return w3
+
+##################################################
+async def limit_middleware(make_request, w3):
+    """
+    AsyncWeb3 middleware that holds a semaphore slot for
+    each request sent to the node.
+    """
+    async def middleware(method, params):
+        async with SEMAPHORE:
+            return await make_request(method, params)
+
+    return middleware
+
+##################################################
+def set_limit(limit):
+    """
+    Function to set how many requests can be in flight at a
+    time. Takes effect the next time the client is created.
+    """
+    global LIMIT
+    LIMIT = limit
+
+##################################################
+async def close():
+    """
+    Function to close the shared connection pool.
+    """
+    global WEB3, SESSION
+    if WEB3 is not None:
+        await asyncio.gather(WEB3, return_exceptions=True)
+    if SESSION is not None:
+        await SESSION.close()
+
+    # Drop the closed session from web3's cache so the next loop can cache its own
+    web3_request._async_session_cache.clear()
+    WEB3 = None
+    SESSION = None
+
+##################################################
+def run(coroutine, limit=None):
+    """
+    Function to run a coroutine to completion with the shared
+    client, closing its connections afterwards.
+    """
+    if limit is not None:
+        set_limit(limit)
+
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            await close()
+
+    return asyncio.run(main())
+
+##################################################
+async def gather(function, items, *args):
+    """
+    Function to call an async helper for every item at once,
+    returning the results in the same order.
+    """
+    return await asyncio.gather(*[function(item, *args) for item in items])
+
+##################################################
+async def get_latest_block():
+    """
+    Function to get the latest block number, pinned for the run
+    and shared with eth.get_latest_block.
+    """
+    if eth.LATEST_BLOCK is None:
+        block = await (await get_web3()).eth.block_number
+
+        # Calls gathered together all fetch it, keep the first so they agree
+        if eth.LATEST_BLOCK is None:
+            eth.LATEST_BLOCK = block
+
+            # Blocks near the head can still reorg, keep them out of the RPC cache
+            rpc.CACHE.head = block
+    return eth.LATEST_BLOCK
+
+##################################################
+async def get_contract(contract_object):
+    """
+    Function to return the AsyncWeb3 version of a contract
+    object created by eth.get_contract.
+    """
+    w3 = await get_web3()
+    if contract_object.address not in CONTRACTS:
+        CONTRACTS[contract_object.address] = w3.eth.contract(address=contract_object.address, abi=contract_object.abi)
+    return CONTRACTS[contract_object.address]
+
+##################################################
+async def get_token_balance(contract_object, address, block=None):
+    """
+    Function to get the token balance of an address for a
+    provided contract.
+    """
+    block = block if block is not None else await get_latest_block()
+    contract = await get_contract(contract_object)
+    return await contract.functions.balanceOf(address).call(block_identifier=block)
+
+##################################################
+async def get_balance(address, block=None):
+    """
+    Function to get the ETH balance (in wei) of an address.
+    """
+    block = block if block is not None else await get_latest_block()
+    return await (await get_web3()).eth.get_balance(address, block)
+
+##################################################
+async def get_transaction_count(address, block=None):
+    """
+    Function to get the transaction count (nonce) of an address.
+    """
+    block = block if block is not None else await get_latest_block()
+    return await (await get_web3()).eth.get_transaction_count(address, block)
+
+##################################################
+async def is_contract(address):
+    """
+    Function to check if an address has code deployed.
+    """
+    code = await (await get_web3()).eth.get_code(address)
+    return len(code) > 0
+
+##################################################
+async def get_block_data(number):
+    """
+    Function to get block details, from the DB if stored
+    there, otherwise from the node (and then stored).
+    """
+    # Check to see if block exists in DB
+    loop = asyncio.get_running_loop()
+    block = await loop.run_in_executor(DB, db.get_block, number)
+    if block is not None:
+        return data.string_to_json(block[2])
+
+    block_data = await (await get_web3()).eth.get_block(number, False)
+    block_data_string = data.json_to_string(Web3.to_json(block_data))
+    await loop.run_in_executor(DB, db.add_block, number, block_data["timestamp"], block_data_string)
+
+    return data.string_to_json(block_data_string)
+
+##################################################
+async def get_transfer_logs(contract, from_block=None, to_block=None, gap=100000, workers=4):
+    """
+    Function to get all transfer logs for a provided contract,
+    see get_event_logs.
+    """
+    if from_block is None:
+        # Etherscan and receipt lookups are blocking, keep them off the loop
+        loop = asyncio.get_running_loop()
+        from_block = await loop.run_in_executor(None, eth.get_contract_deploy_date, contract.address, True)
+
+    if to_block is None:
+        to_block = await get_latest_block()
+
+    return await get_event_logs(contract.events.Transfer, from_block, to_block, gap, workers)
+
+##################################################
+async def get_event_logs(event, from_block, to_block, gap=100000, workers=4, target=5000, max_gap=1000000, decode=True):
+    """
+    Function to get all logs for a contract event between two blocks
+    (inclusive), the async version of eth.get_event_logs. Up to workers
+    block windows are fetched at a time, scheduled by eth.LogWindows.
+    Returns decoded events ordered by (block, log index), or the raw
+    logs in the same order if decode is False.
+    """
+    s_time = time()
+    w3 = await get_web3()
+    contract_event = event()
+    params = eth.get_log_params(contract_event)
+    windows = eth.LogWindows(from_block, to_block, gap, target, max_gap)
+
+    async def fetch(start_block, end_block, retries=3):
+        # Same as eth.fetch_logs, errors other than range errors (such as timeouts) are retried
+        attempt = 0
+        while True:
+            try:
+                return await w3.eth.get_logs(dict(params, fromBlock=start_block, toBlock=end_block))
+            except Exception as e:
+                attempt += 1
+                if eth.is_log_range_error(e) or attempt > retries:
+                    raise
+                await asyncio.sleep(0.5 * 2 ** attempt)
+
+    running = {}
+    try:
+        while running or windows.pending():
+            # Keep workers windows of the current size in flight
+            for window in windows.take(workers - len(running)):
+                running[asyncio.ensure_future(fetch(*window))] = window
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                window = running.pop(task)
+                try:
+                    logs = task.result()
+                except Exception as e:
+                    for half in windows.split(window, e):
+                        running[asyncio.ensure_future(fetch(*half))] = half
+                    continue
+                windows.add(window, logs)
+    finally:
+        # Wait for the cancelled windows so none are left running after we return
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+
+    return windows.result(contract_event, decode, s_time)
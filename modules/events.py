@@ -0,0 +1,103 @@
+#! Python3
+"""
+    File name: events.py
+    Date created: 10/18/2026
+    Python Version: 3.9.x
+    File Details:
+        Purpose: A series of functions to keep a persistent, incremental store
+        of ERC20 Transfer events in the local SQLite DB.
+
+        Notes:
+        - The store is keyed on contract + block + logIndex, and event_sync
+          tracks the stored block range for each contract. Repeat runs only
+          fetch blocks after the last stored block.
+        - The last REORG_DEPTH stored blocks are always refetched so that a
+          reorg near the chain head can't leave stale events behind.
+        - Fetched logs are decoded from their raw topics / data straight into
+          table rows, and stored events are read back as a stream of columnar
+          TransferBatch chunks, so the full history is never held in memory.
+        - The event tables are created on first use (see db.connect).
+"""
+
+# Import Standard Packages
+from itertools import islice
+
+from modules import db, eth, columnar
+
+REORG_DEPTH = 64
+CHUNK_SIZE = 100000 # Stored events per TransferBatch
+
+##################################################
+def sync_transfer_logs(contract, from_block=None, to_block=None, gap=100000, workers=4, reorg_depth=REORG_DEPTH):
+    """
+    Function to bring the stored Transfer events for a contract up
+    to to_block. Returns the resolved (from_block, to_block).
+    """
+    address = contract.address
+    sync = db.get_event_sync(address)
+
+    if to_block is None:
+        to_block = eth.get_latest_block()
+
+    if from_block is None:
+        from_block = sync[0] if sync is not None else eth.get_contract_deploy_date(address, True)
+
+    # Nothing stored yet, or the request starts before the stored range
+    if sync is None or from_block < sync[0]:
+        print("No stored events, fetching from block " + str(from_block))
+        logs = eth.get_event_logs(contract.events.Transfer, from_block, to_block, gap, workers, decode=False)
+        db.replace_events(address, 0, from_block, to_block, to_rows(address, logs))
+
+    # Catch up from the stored high-water mark, rewinding for reorgs
+    elif to_block > sync[1]:
+        start_block = max(sync[0], sync[1] - reorg_depth + 1)
+        print("Catching up stored events from block " + str(start_block))
+        logs = eth.get_event_logs(contract.events.Transfer, start_block, to_block, gap, workers, decode=False)
+        db.replace_events(address, start_block, sync[0], to_block, to_rows(address, logs))
+
+    # Make the events readable if they were queued on the background writer
+    db.flush()
+    return from_block, to_block
+
+##################################################
+def iter_transfer_batches(address, from_block, to_block, table=None, chunk_size=CHUNK_SIZE):
+    """
+    Function to stream the stored Transfer events for a contract
+    as TransferBatch chunks of up to chunk_size events in chain
+    order. Every chunk shares one AddressTable, so ids line up
+    across chunks. Call sync_transfer_logs first.
+    """
+    table = columnar.AddressTable() if table is None else table
+    rows = db.iter_events(address, from_block, to_block)
+
+    while True:
+        batch = columnar.from_rows(islice(rows, chunk_size), table)
+        if len(batch) == 0:
+            return
+        yield batch
+
+##################################################
+def to_rows(address, logs):
+    """
+    Function to decode raw Transfer logs (topics / data) straight
+    into event table rows. Addresses are stored checksummed, each
+    unique address is only checksummed once.
+    """
+    table = columnar.AddressTable()
+    output = []
+
+    for log in logs:
+        block, transaction_index, log_index, sender, receiver, value = columnar.decode_transfer(log)
+        output.append((
+            address,
+            block,
+            log_index,
+            transaction_index,
+            "0x" + columnar.to_bytes(log["transactionHash"]).hex(),
+            "0x" + columnar.to_bytes(log["blockHash"]).hex(),
+            table.address(table.intern(sender)),
+            table.address(table.intern(receiver)),
+            str(value)
+        ))
+
+    return output
@@ -17,10 +17,10 @@
 
 import json
 import asyncio
-import aiohttp
-import requests
 import sys
 
+from modules import api
+
 BURN = "0x0000000000000000000000000000000000000000"
 
 ##################################################
@@ -32,7 +32,6 @@ def scrape_slow(addr, block):
 
     # Set up some stuff
     output = {}
-    session = requests.Session()
 
     # Terminal output stuff
     i=1
@@ -42,8 +41,7 @@ def scrape_slow(addr, block):
     for pool in addr:
         print("Processing: " + str(i) + " / " + str(l) + "          ", end='\r')
         url = "https://api.holders.at/holders?network=ethereum&collection=" + pool + "&block=" + str(block)
-        response = session.get(url)
-        lp_list = response.json()
+        lp_list = api.get_json(url)
 
         # Remove burn address if present
         if BURN in lp_list: lp_list.remove(BURN)
@@ -97,7 +95,7 @@ async def scrape_helper(addresses, block):
     Function to create a ClientSession and to pass along
     to the data fetching function.
     """
-    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=False)) as client:
+    async with api.AsyncClient(ssl=False) as client:
         tokens = await fetch_data(client, addresses, block)
     return tokens
 
@@ -125,14 +123,12 @@ async def get_data(client, address, block):
     print("Scraping Address: " + str(address), end='\r', flush=True)
     url = "https://api.holders.at/holders?network=ethereum&collection=" + address + "&block=" + str(block)
 
-    async with client.get(url) as response:
-        try:
-            assert response.status == 200
-            data = await response.text()
-            return '{"address": "' + str(address) + '", "data": ' + data +'}'
-        except AssertionError:
-            print("Error Processing Address (holders): " + str(address) + " with error code " + str(response.status))
-            return '{"address": "' + str(address) + '", "data": "none"}'
+    try:
+        data = await client.get_text(url)
+        return '{"address": "' + str(address) + '", "data": ' + data +'}'
+    except api.HTTPError as e:
+        print("Error Processing Address (holders): " + str(address) + " with error code " + str(e.status))
+        return '{"address": "' + str(address) + '", "data": "none"}'
 
 
 ##################################################
@@ -0,0 +1,289 @@
+#! Python3
+"""
+    File name: replay.py
+    Date created: 10/18/2026
+    Python Version: 3.9.x
+    File Details:
+        Purpose: A balance replay engine that folds a stream of columnar Transfer
+        event batches into exact integer balances per address at any target block,
+        instead of calling balanceOf once per holder.
+
+        Notes:
+        - Standard ERC20s are replayed directly in token units.
+        - Rebasing tokens (OUSD / OETH) are replayed in credits. Each Transfer
+          to or from a rebasing account is converted to credits at the
+          rebasingCreditsPerToken in effect at that log and balances are
+          credits / creditsPerToken at the target block. Non rebasing accounts
+          are replayed in token units.
+        - Rebases come from TotalSupplyUpdatedHighres events and, before the
+          Highres upgrade, legacy TotalSupplyUpdated events, whose 1e18 credits
+          per token are scaled to 1e27.
+        - Accounts switch between credits and tokens at their AccountRebasingEnabled
+          / AccountRebasingDisabled events. Opt outs from before those events
+          existed (including contracts migrated automatically) have no event, so
+          accounts without events use their state at the target block throughout.
+        - Yield delegation is not replayed. Always run verify_balances against a
+          sample of balanceOf calls and check the reported mismatches.
+"""
+
+# Import Standard Packages
+import random
+
+# Import Other Packages
+from termcolor import colored
+from web3 import Web3
+import numpy as np
+
+from modules import columnar, eth
+
+RESOLUTION = 10**18
+LEGACY_SCALE = 10**9 # Legacy credits per token (1e18) to Highres (1e27)
+KEY_SHIFT = 2**20 # Orders (block, log index) as a single int64
+NON_REBASING = Web3.keccak(text="nonRebasingCreditsPerToken(address)")[:4]
+BURN = "0x0000000000000000000000000000000000000000"
+
+# Events that may be missing from the current implementation ABI
+REBASE_ABI = [
+    {
+        "anonymous": False,
+        "name": "TotalSupplyUpdated",
+        "type": "event",
+        "inputs": [
+            {"indexed": False, "name": "totalSupply", "type": "uint256"},
+            {"indexed": False, "name": "rebasingCredits", "type": "uint256"},
+            {"indexed": False, "name": "rebasingCreditsPerToken", "type": "uint256"}
+        ]
+    },
+    {
+        "anonymous": False,
+        "name": "TotalSupplyUpdatedHighres",
+        "type": "event",
+        "inputs": [
+            {"indexed": False, "name": "totalSupply", "type": "uint256"},
+            {"indexed": False, "name": "rebasingCredits", "type": "uint256"},
+            {"indexed": False, "name": "rebasingCreditsPerToken", "type": "uint256"}
+        ]
+    },
+    {
+        "anonymous": False,
+        "name": "AccountRebasingEnabled",
+        "type": "event",
+        "inputs": [{"indexed": False, "name": "account", "type": "address"}]
+    },
+    {
+        "anonymous": False,
+        "name": "AccountRebasingDisabled",
+        "type": "event",
+        "inputs": [{"indexed": False, "name": "account", "type": "address"}]
+    }
+]
+
+##################################################
+def replay_balances(batches, to_block=None, rebases=None, non_rebasing=None, opt_changes=None, initial_credits_per_token=10**27):
+    """
+    Function to replay a stream of TransferBatch chunks (sharing one
+    AddressTable, see events.iter_transfer_batches) into a dict of
+    checksum address to exact int balance at to_block (inclusive,
+    defaults to the last event). Pass rebases from get_rebases for
+    rebasing tokens, with the accounts that are non rebasing at
+    to_block and the opt in / out history from get_opt_changes.
+    """
+    balances = np.zeros(0, dtype=object) # Credits for rebasing accounts, else tokens
+    rebasing = np.zeros(0, dtype=bool)
+    last_block = None
+    table = None
+
+    # Accounts without opt events keep their state at to_block, the others start opposite to their first event
+    changes = opt_changes if opt_changes is not None else (np.zeros(0, dtype=np.int64), [], [])
+    initial = set(columnar.to_bytes(address)[-20:] for address in non_rebasing or [])
+    first_change = {}
+    for address, enabled in zip(changes[1], changes[2]):
+        first_change.setdefault(columnar.to_bytes(address)[-20:], enabled)
+    initial = (initial - set(first_change)) | set(address for address, enabled in first_change.items() if enabled)
+    applied = 0
+
+    def grow_to(size):
+        nonlocal balances, rebasing
+        added = [table.raw[address_id] not in initial for address_id in range(len(rebasing), size)]
+        balances = grow(balances, size)
+        rebasing = np.concatenate((rebasing, np.array(added, dtype=bool)))
+
+    def apply_changes(until_key):
+        # Switch accounts between credits and tokens at their opt in / out events
+        nonlocal applied
+        while applied < len(changes[0]) and changes[0][applied] < until_key:
+            key, address, enabled = changes[0][applied], changes[1][applied], changes[2][applied]
+            applied += 1
+            address_id = table.intern(columnar.to_bytes(address)[-20:])
+            grow_to(len(table))
+            if bool(rebasing[address_id]) == enabled:
+                continue
+            cpt = credits_per_token_at(rebases, np.array([key]), initial_credits_per_token)[0]
+            if enabled:
+                balances[address_id] = balances[address_id] * cpt // RESOLUTION
+            else:
+                balances[address_id] = balances[address_id] * RESOLUTION // cpt
+            rebasing[address_id] = enabled
+
+    for batch in batches:
+        table = batch.table
+        grow_to(len(table))
+
+        mask = np.ones(len(batch), dtype=bool) if to_block is None else batch.block <= to_block
+        senders = batch.sender[mask]
+        receivers = batch.receiver[mask]
+        values = batch.value[mask]
+        if len(values) == 0:
+            continue
+        last_block = int(batch.block[mask][-1])
+
+        if rebases is None:
+            fold(balances, senders, receivers, values, values)
+            continue
+
+        # Split the batch at opt in / out events so each part uses the right units
+        keys = batch.block[mask] * KEY_SHIFT + batch.log_index[mask]
+        start = 0
+        while start < len(keys):
+            apply_changes(keys[start])
+            end = len(keys) if applied == len(changes[0]) else int(np.searchsorted(keys, changes[0][applied]))
+            part = slice(start, end)
+
+            cpt = credits_per_token_at(rebases, keys[part], initial_credits_per_token)
+            credits = values[part] * cpt // RESOLUTION
+            sent = np.where(rebasing[senders[part]], credits, values[part])
+            received = np.where(rebasing[receivers[part]], credits, values[part])
+            fold(balances, senders[part], receivers[part], sent, received)
+            start = end
+
+    if table is None:
+        return {}
+
+    if rebases is not None:
+        # Convert credits back to tokens at the target block
+        target_block = to_block if to_block is not None else last_block or 0
+        target_key = target_block * KEY_SHIFT + KEY_SHIFT - 1
+        apply_changes(target_key + 1)
+        target_cpt = credits_per_token_at(rebases, np.array([target_key]), initial_credits_per_token)[0]
+        balances = np.where(rebasing, balances * RESOLUTION // target_cpt, balances)
+
+    output = {}
+    for address, balance in zip(table.addresses(range(len(balances))), balances):
+        if address != BURN:
+            output[address] = int(balance)
+
+    return output
+
+##################################################
+def grow(balances, size):
+    """
+    Function to extend a balance column with zeros for ids
+    added to the AddressTable since it was last grown.
+    """
+    return np.concatenate((balances, np.zeros(size - len(balances), dtype=object)))
+
+##################################################
+def fold(balances, senders, receivers, sent, received):
+    """
+    Function to sum transfers into per id balances in place,
+    adding received to the receiver and subtracting sent from
+    the sender (the same value unless their units differ).
+    """
+    np.add.at(balances, receivers, received)
+    np.subtract.at(balances, senders, sent)
+
+##################################################
+def get_rebases(contract, from_block, to_block, gap=100000, workers=4):
+    """
+    Function to fetch the rebasingCreditsPerToken history for a
+    rebasing token from both the Highres and legacy rebase events.
+    Returns (keys, credits_per_token) arrays sorted by (block, log
+    index), with credits per token at 1e27.
+    """
+    events = get_contract(contract).events
+    logs = eth.get_event_logs(events.TotalSupplyUpdatedHighres, from_block, to_block, gap, workers)
+    legacy = eth.get_event_logs(events.TotalSupplyUpdated, from_block, to_block, gap, workers)
+
+    rebases = [(log["blockNumber"] * KEY_SHIFT + log["logIndex"], log.args["rebasingCreditsPerToken"]) for log in logs]
+    rebases += [(log["blockNumber"] * KEY_SHIFT + log["logIndex"], log.args["rebasingCreditsPerToken"] * LEGACY_SCALE) for log in legacy]
+    rebases.sort(key=lambda rebase: rebase[0])
+
+    keys = np.array([rebase[0] for rebase in rebases], dtype=np.int64)
+    credits_per_token = np.empty(len(rebases), dtype=object)
+    credits_per_token[:] = [rebase[1] for rebase in rebases]
+
+    return keys, credits_per_token
+
+##################################################
+def get_opt_changes(contract, from_block, to_block, gap=100000, workers=4):
+    """
+    Function to fetch every account opting in to (enabled True) or
+    out of rebasing. Returns (keys, addresses, enabled) sorted by
+    (block, log index).
+    """
+    events = get_contract(contract).events
+    changes = [(log, True) for log in eth.get_event_logs(events.AccountRebasingEnabled, from_block, to_block, gap, workers)]
+    changes += [(log, False) for log in eth.get_event_logs(events.AccountRebasingDisabled, from_block, to_block, gap, workers)]
+    changes.sort(key=lambda change: (change[0]["blockNumber"], change[0]["logIndex"]))
+
+    keys = np.array([log["blockNumber"] * KEY_SHIFT + log["logIndex"] for log, enabled in changes], dtype=np.int64)
+    return keys, [log.args["account"] for log, enabled in changes], [enabled for log, enabled in changes]
+
+##################################################
+def get_contract(contract):
+    """
+    Function to return the token with the rebase and opt in / out
+    event ABIs, which older or newer implementations may lack.
+    """
+    return eth.get_contract(contract.address, REBASE_ABI)
+
+##################################################
+def credits_per_token_at(rebases, keys, initial_credits_per_token):
+    """
+    Function to look up the credits per token in effect at each
+    (block, log index) key, using the initial value before the
+    first known rebase.
+    """
+    rebase_keys, rebase_cpt = rebases
+    position = np.searchsorted(rebase_keys, keys) - 1
+
+    output = np.empty(len(keys), dtype=object)
+    output[:] = initial_credits_per_token
+    found = position >= 0
+    output[found] = rebase_cpt[position[found]]
+    return output
+
+##################################################
+def get_non_rebasing(contract, addresses, block):
+    """
+    Function to return the set of addresses that have opted out
+    of rebasing (non zero nonRebasingCreditsPerToken) at a block.
+    """
+    results = eth.get_address_calls([contract], addresses, block, NON_REBASING)
+    return set(address for address, result in zip(addresses, results) if result[0])
+
+##################################################
+def verify_balances(contract, balances, block, sample=200, tolerance=0):
+    """
+    Function to compare replayed balances against balanceOf for a
+    random sample of addresses. Prints and returns a list of
+    (address, replayed, actual) for every address that disagrees
+    by more than tolerance (in raw token units).
+    """
+    addresses = list(balances.keys())
+    checked = random.sample(addresses, min(sample, len(addresses)))
+    actual = eth.get_token_balances([contract], checked, block)
+
+    output = []
+    for address, result in zip(checked, actual):
+        if abs(balances[address] - result[0]) > tolerance:
+            output.append((address, balances[address], result[0]))
+
+    if output:
+        print(colored("Replayed balance mismatch for " + str(len(output)) + " / " + str(len(checked)) + " sampled addresses", 'red'))
+        for each in output:
+            print("    " + each[0] + " replayed: " + str(each[1]) + " actual: " + str(each[2]))
+    else:
+        print(colored("Replayed balances match balanceOf for " + str(len(checked)) + " sampled addresses", 'green'))
+
+    return output
@@ -0,0 +1,516 @@
+#! Python3
+"""
+    File name: report.py
+    Date created: 10/18/2026
+    Python Version: 3.9.x
+    File Details:
+        Purpose: A declarative holder report engine shared by the token holder
+        scripts (ousd.py, ousd_simple.py, oeth_users.py, gnosis.py, ogv_balances.py).
+        A script names the token, the block range and a list of Columns and the
+        engine does the rest.
+
+        Notes:
+        - Each Column declares the stages it needs, only those stages are run:
+            profiles      ENS, is_contract, first activity (enrichment)
+            balances      balanceOf for every token named by a balance column (Multicall)
+            eth           ETH balance (JSON-RPC batches)
+            transactions  Transaction count (JSON-RPC batches)
+            timestamps    First / last event timestamps
+            kinds         Contract kind (eoa / contract / safe / minimal_proxy)
+        - Holders are processed in chunks of chunk_size as a streaming pipeline.
+          The RPC stages for the next chunk are fetched on worker threads while
+          the DB backed stages (profiles, timestamps, kinds) run for the current
+          one on the calling thread, then the chunk is written out.
+        - Every stage is resumable: Transfer logs, profiles and block timestamps
+          are stored in the DB, calls at the pinned block hit the RPC cache and
+          holders already in the output file are skipped on a rerun.
+        - Without a fixed block a report runs at rpc.REORG_DEPTH blocks behind
+          the head, so its calls can be cached. The block is journaled under the
+          report name until the report finishes, so a rerun after a crash picks
+          up the same block and output file instead of starting a new one.
+        - run(workers=N) (--workers N on the command line) shards the chunks over
+          a pool of N forked processes, each with its own Web3 / RPC connections,
+          SQLite connection and share of the API rate limits. Rows are merged back
+          in order. Needs the fork start method (Linux / macOS).
+"""
+
+# Import Standard Packages
+from concurrent.futures import ThreadPoolExecutor
+from time import time
+import multiprocessing
+import multiprocessing.util
+
+# Import Other Packages
+from termcolor import colored
+
+from modules import activity, api, checkpoint, columnar, data, db, enrichment, eth, events, replay, rpc
+
+BURN = "0x0000000000000000000000000000000000000000"
+RPC_STAGES = ["balances", "eth", "transactions"]
+WORKER = None # (report, block) inherited by forked worker processes, see process_shard
+
+##################################################
+class Column:
+    """
+    A report column: the header, a function that builds the value
+    from a Holder and the stages that function needs.
+    """
+    def __init__(self, name, value, stages=()):
+        self.name = name
+        self.value = value
+        self.stages = set(stages)
+        self.tokens = []
+
+##################################################
+class Holder:
+    """
+    Everything the stages resolved for one address, passed to
+    each column function. Fields of stages that weren't run are
+    left as None.
+    """
+    def __init__(self, address):
+        self.address = address
+        self.profile = None
+        self.balances = None
+        self.eth_wei = None
+        self.transactions = None
+        self.events = None
+        self.first_block = None
+        self.last_block = None
+        self.first_timestamp = None
+        self.last_timestamp = None
+        self.kind = None
+
+    def token(self, contract, decimals=18):
+        """
+        Function to return a token balance as a rounded decimal.
+        """
+        return round(self.balances[contract.address] / 10**decimals, 2)
+
+##################################################
+class Report:
+    """
+    A holder report for a token. Holders are every address in the
+    token's Transfer logs (or addresses if provided), one row each.
+    Set replay to derive token balances from the logs instead of
+    calling balanceOf (and rebasing for OUSD / OETH).
+    """
+    def __init__(self, name, token, columns, start_block=None, block=None, gap=100000, addresses=None,
+                 replay=False, rebasing=False, estimate_timestamps=False, chunk_size=5000):
+        self.name = name
+        self.token = token
+        self.columns = columns
+        self.start_block = start_block
+        self.block = block
+        self.gap = gap
+        self.addresses = addresses
+        self.replay = replay
+        self.rebasing = rebasing
+        self.estimate_timestamps = estimate_timestamps
+        self.chunk_size = chunk_size
+
+        self.stages = set().union(*[column.stages for column in columns])
+        self.tokens = list({token.address: token for column in columns for token in column.tokens}.values())
+
+    def run(self, workers=1):
+        """
+        Function to build the report and stream it to
+        files/output/<name>_<block>.csv, optionally over a
+        pool of worker processes.
+        """
+        s_time = time()
+        print("\nStarting " + self.name + " report.")
+
+        # Commit DB cache writes on a background thread, grouped into transactions
+        db.start_writer()
+
+        # Pin the block for the whole run, the same one as an unfinished earlier run
+        block = self.pin_block()
+
+        # Bring the local Transfer log store up to the block, then stream it in chunks to aggregate by user
+        start_block, block = events.sync_transfer_logs(self.token, self.start_block, block, self.gap)
+        table = columnar.AddressTable()
+        self.activity = activity.from_batches(events.iter_transfer_batches(self.token.address, start_block, block, table))
+
+        # Holders to process in checksum format, without the burn address
+        holders = self.addresses or [address for address in self.activity.addresses() if address != BURN]
+        holders = [eth.get_checksum(address) for address in holders]
+
+        # Provided addresses may never have held the token, they have no event columns to fill
+        if self.addresses:
+            inactive = [address for address in holders if address not in self.activity]
+            if inactive:
+                print("Skipping " + str(len(inactive)) + " addresses with no Transfer events.")
+                holders = [address for address in holders if address in self.activity]
+        print("Preparing to process " + str(len(holders)) + " users.")
+
+        # Replayed balances need every log, so build them up front in a second pass over the store
+        self.replayed = self.replay_balances(start_block, block, holders, table) if self.replay and "balances" in self.stages else None
+
+        # Stream rows to CSV, skipping holders written before a crash
+        output_name = self.name + "_" + str(block) + ".csv"
+        writer = data.StreamWriter("files/output", output_name, [column.name for column in self.columns], resume=True)
+        done = writer.keys()
+        remaining = [address for address in holders if address not in done]
+        chunks = [remaining[i:i+self.chunk_size] for i in range(0, len(remaining), self.chunk_size)]
+
+        if workers > 1:
+            results = self.process_pool(chunks, block, workers)
+        else:
+            results = self.process_chunks(chunks, block)
+
+        processed = len(done)
+        for rows in results:
+            writer.write_many(rows)
+            writer.flush()
+            processed += len(rows)
+            print("\rProcessed " + str(processed) + " / " + str(len(holders)) + " users.", end="", flush=True)
+
+        writer.close()
+
+        # The output is complete, the next run can start at a new block
+        if self.block is None:
+            with checkpoint.Journal("report_" + self.name) as journal:
+                journal.clear()
+
+        e_time = time()
+        print(colored("Finished " + self.name + " report in " + str(round(e_time-s_time,2)) + "s", 'green'))
+
+    def pin_block(self):
+        """
+        Function to return the block to run the report at. Without a
+        fixed block, one far enough behind the head to be cached is
+        journaled under the report name and reused until the report
+        finishes.
+        """
+        if self.block is not None:
+            return self.block
+
+        # Always pin the head, so the RPC cache knows which blocks could still reorg
+        head = eth.get_latest_block()
+        with checkpoint.Journal("report_" + self.name) as journal:
+            if "block" not in journal:
+                journal.add("block", head - rpc.REORG_DEPTH)
+            block = journal.rows()[0]
+
+        if block != head - rpc.REORG_DEPTH:
+            print("Resuming the unfinished " + self.name + " report at block " + str(block) + ".")
+        return block
+
+    def process_chunks(self, chunks, block):
+        """
+        Function to yield the output rows for each chunk in order,
+        fetching the RPC stages for the next chunk in the background.
+        """
+        with ThreadPoolExecutor(max_workers=len(RPC_STAGES)) as executor:
+            pending = self.fetch(executor, chunks[0], block) if chunks else None
+            for index, chunk in enumerate(chunks):
+                fetched = pending
+
+                # Start the RPC stages for the next chunk while this one is processed
+                if index + 1 < len(chunks):
+                    pending = self.fetch(executor, chunks[index + 1], block)
+
+                yield self.process(chunk, fetched)
+
+    def process_pool(self, chunks, block, workers):
+        """
+        Function to yield the output rows for each chunk in order,
+        processing the chunks on a pool of forked worker processes.
+        The report itself is inherited through the fork, so only the
+        chunks and rows are sent between processes.
+        """
+        global WORKER
+
+        # Only fork with no other threads running, a child would inherit locks
+        # held by threads that don't exist in it. Stopping the writer also
+        # commits queued writes so the workers can see them.
+        db.stop_writer()
+
+        WORKER = (self, block)
+        try:
+            context = multiprocessing.get_context("fork")
+            print("Processing " + str(len(chunks)) + " chunks on " + str(workers) + " worker processes.")
+            pool = context.Pool(workers, initializer=init_worker, initargs=(workers,))
+            try:
+                for rows, hits, misses in pool.imap(process_shard, chunks):
+                    rpc.CACHE.hits.update(hits)
+                    rpc.CACHE.misses.update(misses)
+                    yield rows
+
+                # Let the workers exit normally so their exit hooks run
+                pool.close()
+            except BaseException:
+                pool.terminate()
+                raise
+            finally:
+                pool.join()
+        finally:
+            WORKER = None
+            db.start_writer()
+
+    def fetch(self, executor, addresses, block):
+        """
+        Function to start the RPC only stages for a chunk on the
+        executor. Returns a dict of stage to Future.
+        """
+        output = {}
+        if "balances" in self.stages:
+            output["balances"] = executor.submit(self.get_balances, addresses, block)
+        if "eth" in self.stages:
+            output["eth"] = executor.submit(eth.get_balances, addresses, block)
+        if "transactions" in self.stages:
+            output["transactions"] = executor.submit(eth.get_transaction_counts, addresses, block)
+        return output
+
+    def process(self, addresses, fetched):
+        """
+        Function to run the DB backed stages for a chunk, wait for
+        its RPC stages and return the output rows.
+        """
+        holders = [Holder(address) for address in addresses]
+
+        for holder in holders:
+            holder.events = self.activity.count(holder.address)
+            holder.first_block = self.activity.first_block(holder.address)
+            holder.last_block = self.activity.last_block(holder.address)
+
+        # Fetch user details from DB or resolve all missing users in bulk. Strict, so a
+        # chunk with unresolved users fails instead of being written and skipped on resume.
+        if self.stages & {"profiles", "kinds"}:
+            profiles = enrichment.get_user_details(addresses, strict=True)
+            for holder in holders:
+                holder.profile = profiles[holder.address]
+
+        # Get timestamps for every first and last event block in the chunk at once
+        if "timestamps" in self.stages:
+            event_blocks = set(holder.first_block for holder in holders) | set(holder.last_block for holder in holders)
+            if self.estimate_timestamps:
+                timestamps = eth.estimate_block_timestamps(event_blocks)
+            else:
+                timestamps = eth.get_block_timestamps(event_blocks)
+            for holder in holders:
+                holder.first_timestamp = timestamps[holder.first_block]
+                holder.last_timestamp = timestamps[holder.last_block]
+
+        # Classify contracts by code hash
+        if "kinds" in self.stages:
+            contracts = [holder.address for holder in holders if holder.profile[2]]
+            kinds = eth.get_contract_kinds(contracts)
+            for holder in holders:
+                holder.kind = kinds.get(holder.address, "eoa")
+
+        # Collect the RPC stages started in fetch
+        if "balances" in fetched:
+            for holder, balances in zip(holders, fetched["balances"].result()):
+                holder.balances = dict(zip([token.address for token in self.tokens], balances))
+        if "eth" in fetched:
+            for holder, eth_wei in zip(holders, fetched["eth"].result()):
+                holder.eth_wei = eth_wei
+        if "transactions" in fetched:
+            for holder, count in zip(holders, fetched["transactions"].result()):
+                holder.transactions = count
+
+        return [[column.value(holder) for column in self.columns] for holder in holders]
+
+    def get_balances(self, addresses, block):
+        """
+        Function to fetch balanceOf for every report token, using the
+        replayed balances for the report token when available.
+        """
+        if self.replayed is None:
+            return eth.get_token_balances(self.tokens, addresses, block)
+
+        others = [token for token in self.tokens if token.address != self.token.address]
+        fetched = eth.get_token_balances(others, addresses, block) if others else [[] for address in addresses]
+
+        output = []
+        for address, balances in zip(addresses, fetched):
+            balances = iter(balances)
+            output.append([self.replayed.get(address, 0) if token.address == self.token.address else next(balances) for token in self.tokens])
+        return output
+
+    def replay_balances(self, start_block, block, holders, table):
+        """
+        Function to derive the report token balances from its stored
+        Transfer (and rebase) logs and check them against a sample.
+        """
+        rebases = None
+        non_rebasing = None
+        opt_changes = None
+        if self.rebasing:
+            rebases = replay.get_rebases(self.token, start_block, block)
+            non_rebasing = replay.get_non_rebasing(self.token, holders, block)
+            opt_changes = replay.get_opt_changes(self.token, start_block, block)
+
+        batches = events.iter_transfer_batches(self.token.address, start_block, block, table)
+        replayed = replay.replay_balances(batches, block, rebases, non_rebasing, opt_changes)
+        replay.verify_balances(self.token, replayed, block)
+        return replayed
+
+##################################################
+def init_worker(workers):
+    """
+    Function to set up a forked worker process with its own
+    connections and share of the API rate limits.
+    """
+    db.reconnect()
+    eth.reset()
+    api.reset(workers)
+
+    # Pool workers skip atexit hooks, record which cached results were used on exit instead
+    multiprocessing.util.Finalize(None, rpc.CACHE.touch, exitpriority=10)
+
+##################################################
+def process_shard(addresses):
+    """
+    Function to build the output rows for a chunk of holders in
+    a worker process, running its RPC stages side by side. Returns
+    the rows and the RPC cache hits / misses, which are reported by
+    the parent.
+    """
+    report, block = WORKER
+    rpc.CACHE.hits.clear()
+    rpc.CACHE.misses.clear()
+    with ThreadPoolExecutor(max_workers=len(RPC_STAGES)) as executor:
+        rows = report.process(addresses, report.fetch(executor, addresses, block))
+    return rows, rpc.CACHE.hits, rpc.CACHE.misses
+
+##################################################
+def get_workers(args):
+    """
+    Function to read --workers N from the command line
+    arguments, defaulting to a single process.
+    """
+    if "--workers" in args:
+        return int(args[args.index("--workers") + 1])
+    return 1
+
+##################################################
+def address(name="address"):
+    """
+    Function to return the holder address column.
+    """
+    return Column(name, lambda holder: holder.address)
+
+##################################################
+def ens(name="ens"):
+    """
+    Function to return the ENS name column.
+    """
+    return Column(name, lambda holder: holder.profile[1], ["profiles"])
+
+##################################################
+def is_contract(name="is_contract"):
+    """
+    Function to return the is_contract column.
+    """
+    return Column(name, lambda holder: holder.profile[2], ["profiles"])
+
+##################################################
+def first_activity(name="first_activity"):
+    """
+    Function to return the timestamp of the first transaction
+    (or deployment) of the holder.
+    """
+    return Column(name, lambda holder: holder.profile[3], ["profiles"])
+
+##################################################
+def is_gnosis(name="is_gnosis"):
+    """
+    Function to return whether the holder is a Gnosis Safe.
+    """
+    return Column(name, lambda holder: holder.kind == "safe", ["kinds"])
+
+##################################################
+def balance(name, contract, decimals=18):
+    """
+    Function to return a token balance column, as a rounded decimal.
+    """
+    column = Column(name, lambda holder: holder.token(contract, decimals), ["balances"])
+    column.tokens = [contract]
+    return column
+
+##################################################
+def total(name, balances):
+    """
+    Function to return a column summing balance columns.
+    """
+    column = Column(name, lambda holder: sum(each.value(holder) for each in balances), ["balances"])
+    column.tokens = [token for each in balances for token in each.tokens]
+    return column
+
+##################################################
+def eth_balance(name="eth"):
+    """
+    Function to return the ETH balance column.
+    """
+    return Column(name, lambda holder: float(round(eth.wei_to_ether(holder.eth_wei), 2)), ["eth"])
+
+##################################################
+def transaction_count(name="transaction_count"):
+    """
+    Function to return the transaction count (nonce) column.
+    """
+    return Column(name, lambda holder: holder.transactions, ["transactions"])
+
+##################################################
+def event_count(name):
+    """
+    Function to return the number of Transfer events column.
+    """
+    return Column(name, lambda holder: holder.events)
+
+##################################################
+def first_seen_block(name="first_seen_block"):
+    """
+    Function to return the block of the first Transfer event.
+    """
+    return Column(name, lambda holder: holder.first_block)
+
+##################################################
+def first_seen_timestamp(name="first_seen_timestamp"):
+    """
+    Function to return the timestamp of the first Transfer event.
+    """
+    return Column(name, lambda holder: holder.first_timestamp, ["timestamps"])
+
+##################################################
+def last_seen_block(name="last_seen_block"):
+    """
+    Function to return the block of the last Transfer event.
+    """
+    return Column(name, lambda holder: holder.last_block)
+
+##################################################
+def last_seen_timestamp(name="last_seen_timestamp"):
+    """
+    Function to return the timestamp of the last Transfer event.
+    """
+    return Column(name, lambda holder: holder.last_timestamp, ["timestamps"])
+
+##################################################
+def age_at_first_event(name):
+    """
+    Function to return the age of the address in days at its
+    first Transfer event (0 if the first activity is unknown).
+    """
+    def value(holder):
+        first_activity = holder.profile[3]
+        return seconds_to_days(holder.first_timestamp - first_activity) if first_activity != 0 else 0
+    return Column(name, value, ["profiles", "timestamps"])
+
+##################################################
+def days_active(name):
+    """
+    Function to return the days between the first and last
+    Transfer events.
+    """
+    return Column(name, lambda holder: seconds_to_days(holder.last_timestamp - holder.first_timestamp), ["timestamps"])
+
+##################################################
+def seconds_to_days(seconds):
+    """
+    Function to convert seconds to rounded days
+    """
+    return round(seconds / (60 * 60 * 24), 2)
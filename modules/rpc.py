@@ -0,0 +1,475 @@
+#! Python3
+"""
+    File name: rpc.py
+    Date created: 10/18/2026
+    Python Version: 3.9.x
+    File Details:
+        Purpose: Low level JSON-RPC helpers that sit underneath the shared Web3
+        provider in eth.py.
+
+        Notes:
+        - A Batch collects many JSON-RPC calls and sends them to the node as a
+          single JSON array POST. Each call returns a Future that is resolved
+          with the raw (un-formatted) result when the batch is flushed.
+        - Responses to calls pinned to a concrete block number (or keyed on a
+          hash) can never change, so they are kept in an on disk Cache. Calls
+          against 'latest' and blocks within REORG_DEPTH of the pinned head
+          always go to the node. If nothing has pinned the head yet (see
+          eth.get_latest_block), the first call at a block number pins it. The Web3 provider (cache_middleware), the
+          AsyncWeb3 provider in eth_async.py (async_cache_middleware) and Batch
+          all read and write the cache.
+"""
+
+# Import Standard Packages
+from collections import Counter
+from concurrent.futures import Future
+from hashlib import sha256
+from threading import Lock
+from time import sleep, time
+import atexit
+import itertools
+import json
+import sqlite3
+import zlib
+
+# Import Other Packages
+from termcolor import colored
+import requests
+
+SESSION = requests.Session()
+IDS = itertools.count(1)
+
+CACHE_PATH = "files/rpc_cache.db"
+CACHE_MAX_SIZE = 2 * 1024**3 # Evict least recently used responses above 2 GB
+REORG_DEPTH = 64 # Blocks this close to the pinned head are never cached
+
+# Position of the block parameter for calls that are fixed once the block is
+BLOCK_PARAMS = {
+    "eth_call": 1,
+    "eth_getBalance": 1,
+    "eth_getCode": 1,
+    "eth_getTransactionCount": 1,
+    "eth_getStorageAt": 2,
+    "eth_getBlockByNumber": 0
+}
+
+# Calls keyed on a hash, only cached once the node returns a result
+HASH_METHODS = ["eth_getBlockByHash", "eth_getTransactionByHash", "eth_getTransactionReceipt"]
+
+##################################################
+class RPCError(Exception):
+    """
+    Error returned by the node for a single call in a batch.
+    """
+    def __init__(self, method, error):
+        self.method = method
+        self.error = error
+        super().__init__(method + ": " + str(error))
+
+##################################################
+class Cache:
+    """
+    Thread safe on disk cache of JSON-RPC results, keyed on a hash of
+    the method and params. The SQLite file is only opened on first use
+    and a hit / miss report is printed when the run exits.
+    """
+    def __init__(self, path=CACHE_PATH, max_size=CACHE_MAX_SIZE):
+        self.path = path
+        self.max_size = max_size
+        self.enabled = True
+        self.head = None # Set by eth.get_latest_block (or on first use) to skip reorgable blocks
+        self.con = None
+        self.lock = Lock()
+        self.hits = Counter()
+        self.misses = Counter()
+        self.used = set()
+
+    def connect(self):
+        """
+        Function to open the cache DB and create the table
+        if needed. Must be called with the lock held.
+        """
+        if self.con is None:
+            self.con = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self.con.execute("PRAGMA auto_vacuum = INCREMENTAL;")
+            self.con.execute("CREATE TABLE IF NOT EXISTS rpc_cache (key TEXT PRIMARY KEY, method TEXT, size INTEGER, value BLOB, last_used INTEGER);")
+            self.con.execute("CREATE INDEX IF NOT EXISTS rpc_cache_last_used ON rpc_cache (last_used);")
+            atexit.register(self.close)
+        return self.con
+
+    def key(self, method, params):
+        """
+        Function to return the cache key for a call, or None
+        if its result could still change. Calls at a block
+        number are never cached before the head is known.
+        """
+        if not self.enabled:
+            return None
+
+        block = self.block(method, params)
+        if block is None or (block > 0 and (self.head is None or block > self.head - REORG_DEPTH)):
+            return None
+
+        return sha256(json.dumps([method, params], sort_keys=True, default=to_json).encode()).hexdigest()
+
+    def needs_head(self, method, params):
+        """
+        Function to check whether a call could be cached once
+        the head is known, but the head isn't known yet.
+        """
+        return self.enabled and self.head is None and (self.block(method, params) or 0) > 0
+
+    def block(self, method, params):
+        """
+        Function to return the block a call is pinned to, 0 for
+        calls keyed on a hash or None if it isn't pinned.
+        """
+        if method in HASH_METHODS:
+            return 0
+        elif method == "eth_getLogs" and params:
+            log_filter = params[0]
+            if "blockHash" in log_filter:
+                return 0
+            else:
+                from_block = to_block_number(log_filter.get("fromBlock"))
+                to_block = to_block_number(log_filter.get("toBlock"))
+                block = None if from_block is None or to_block is None else max(from_block, to_block)
+        elif method in BLOCK_PARAMS and len(params) > BLOCK_PARAMS[method]:
+            block = to_block_number(params[BLOCK_PARAMS[method]])
+        else:
+            block = None
+        return block
+
+    def get(self, key, method):
+        """
+        Function to return the cached result for a key,
+        or None if it is not cached.
+        """
+        with self.lock:
+            row = self.connect().execute("SELECT value FROM rpc_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses[method] += 1
+                return None
+            self.hits[method] += 1
+            self.used.add(key)
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, items):
+        """
+        Function to store many (key, method, result) items
+        in a single transaction.
+        """
+        rows = []
+        now = int(time())
+        for key, method, result in items:
+            value = zlib.compress(json.dumps(result).encode())
+            rows.append((key, method, len(value), value, now))
+
+        if not rows:
+            return
+
+        with self.lock:
+            con = self.connect()
+            with con:
+                con.executemany("INSERT OR REPLACE INTO rpc_cache (key, method, size, value, last_used) VALUES (?,?,?,?,?);", rows)
+
+    def report(self):
+        """
+        Function to print the cache hits and misses by method.
+        """
+        hits = sum(self.hits.values())
+        misses = sum(self.misses.values())
+        if hits + misses == 0:
+            return
+
+        print(colored("\nRPC cache: " + str(hits) + " hits / " + str(misses) + " misses (" + str(round(100 * hits / (hits + misses), 1)) + "% hit rate)", 'green'))
+        for method in sorted(set(self.hits) | set(self.misses)):
+            print("    " + method + ": " + str(self.hits[method]) + " hits / " + str(self.misses[method]) + " misses")
+
+    def evict(self):
+        """
+        Function to delete the least recently used results
+        until the cache is back under max_size.
+        """
+        with self.lock:
+            con = self.connect()
+            total = con.execute("SELECT COALESCE(SUM(size), 0) FROM rpc_cache").fetchone()[0]
+            if total <= self.max_size:
+                return
+
+            # Leave some headroom so eviction doesn't run on every exit
+            target = total - int(self.max_size * 0.9)
+            evicted = []
+            for key, size in con.execute("SELECT key, size FROM rpc_cache ORDER BY last_used"):
+                if target <= 0:
+                    break
+                evicted.append((key,))
+                target -= size
+
+            with con:
+                con.executemany("DELETE FROM rpc_cache WHERE key = ?", evicted)
+            con.execute("PRAGMA incremental_vacuum;")
+
+        print("Evicted " + str(len(evicted)) + " RPC cache entries.")
+
+    def close(self):
+        """
+        Function to print the report, record which results were
+        used this run, evict down to max_size and close the DB.
+        """
+        self.report()
+        self.hits = Counter()
+        self.misses = Counter()
+        if self.con is None:
+            return
+
+        self.touch()
+        self.evict()
+        self.con.close()
+        self.con = None
+
+    def touch(self):
+        """
+        Function to record which cached results were used
+        this run, so they are the last to be evicted.
+        """
+        with self.lock:
+            if self.con is None or not self.used:
+                return
+            with self.con:
+                self.con.executemany("UPDATE rpc_cache SET last_used = ? WHERE key = ?", [(int(time()), key) for key in self.used])
+            self.used = set()
+
+    def reset(self):
+        """
+        Function to drop the connection and counters inherited
+        from the parent in a forked worker process.
+        """
+        self.con = None
+        self.lock = Lock()
+        self.hits = Counter()
+        self.misses = Counter()
+        self.used = set()
+
+CACHE = Cache()
+
+##################################################
+def cache_middleware(make_request, w3):
+    """
+    Web3 middleware that serves pinned calls from the
+    on disk cache and stores new results.
+    """
+    def middleware(method, params):
+        # Pin the head first so a block near the tip is never cached
+        if CACHE.needs_head(method, params):
+            CACHE.head = to_block_number(make_request("eth_blockNumber", [])["result"])
+
+        key = CACHE.key(method, params)
+        if key is None:
+            return make_request(method, params)
+
+        result = CACHE.get(key, method)
+        if result is not None:
+            return {"jsonrpc": "2.0", "id": 0, "result": result}
+
+        response = make_request(method, params)
+        if "error" not in response and response.get("result") is not None:
+            CACHE.put([(key, method, response["result"])])
+        return response
+
+    return middleware
+
+##################################################
+async def async_cache_middleware(make_request, w3):
+    """
+    AsyncWeb3 version of cache_middleware, sharing
+    the same on disk cache.
+    """
+    async def middleware(method, params):
+        if CACHE.needs_head(method, params):
+            CACHE.head = to_block_number((await make_request("eth_blockNumber", []))["result"])
+
+        key = CACHE.key(method, params)
+        if key is None:
+            return await make_request(method, params)
+
+        result = CACHE.get(key, method)
+        if result is not None:
+            return {"jsonrpc": "2.0", "id": 0, "result": result}
+
+        response = await make_request(method, params)
+        if "error" not in response and response.get("result") is not None:
+            CACHE.put([(key, method, response["result"])])
+        return response
+
+    return middleware
+
+##################################################
+def reset():
+    """
+    Function to drop the connections inherited from the parent
+    in a forked worker process.
+    """
+    SESSION.close()
+    CACHE.reset()
+
+##################################################
+class Batch:
+    """
+    Context manager that queues JSON-RPC calls and sends them as one JSON
+    array request. Calls are flushed automatically every max_size calls
+    and whatever is left is flushed when the block exits. A request
+    that fails as a whole (HTTP error, no JSON array back) is retried
+    with a backoff before every call in it fails.
+
+        with rpc.Batch(RPC) as batch:
+            balance = batch.add("eth_getBalance", [address, "latest"])
+        print(int(balance.result(), 16))
+    """
+    def __init__(self, endpoint, max_size=500, session=SESSION, timeout=60, cache=CACHE, retries=3):
+        self.endpoint = endpoint
+        self.max_size = max_size
+        self.session = session
+        self.timeout = timeout
+        self.cache = cache
+        self.retries = retries
+        self.pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Only send the remaining calls if the block finished cleanly
+        if exc_type is None:
+            self.flush()
+        else:
+            for _, future, _ in self.pending:
+                future.cancel()
+            self.pending = []
+        return False
+
+    def add(self, method, params):
+        """
+        Function to queue a call and return a Future for its result.
+        """
+        future = Future()
+
+        # Pinned calls that are already cached never reach the node
+        if self.cache is not None and self.cache.needs_head(method, params):
+            self.cache.head = self.get_head()
+        key = self.cache.key(method, params) if self.cache is not None else None
+        if key is not None:
+            result = self.cache.get(key, method)
+            if result is not None:
+                future.set_result(result)
+                return future
+
+        request = {"jsonrpc": "2.0", "id": next(IDS), "method": method, "params": params}
+        self.pending.append((request, future, key))
+
+        if len(self.pending) >= self.max_size:
+            self.flush()
+
+        return future
+
+    def get_head(self):
+        """
+        Function to fetch the latest block number on its own,
+        to pin the cache head.
+        """
+        request = {"jsonrpc": "2.0", "id": next(IDS), "method": "eth_blockNumber", "params": []}
+        response = self.session.post(self.endpoint, json=request, timeout=self.timeout)
+        response.raise_for_status()
+        return to_block_number(response.json()["result"])
+
+    def flush(self):
+        """
+        Function to send all queued calls as one HTTP POST and
+        resolve each Future with its matching response.
+        """
+        if not self.pending:
+            return
+
+        pending = self.pending
+        self.pending = []
+
+        try:
+            results = self.send([each[0] for each in pending])
+        except Exception as e:
+            for _, future, _ in pending:
+                future.set_exception(e)
+            return
+
+        # Responses can come back in any order, match them on id
+        by_id = {}
+        for result in results:
+            by_id[result.get("id")] = result
+
+        cached = []
+        for request, future, key in pending:
+            result = by_id.get(request["id"])
+            if result is None:
+                future.set_exception(RPCError(request["method"], "missing response"))
+            elif "error" in result:
+                future.set_exception(RPCError(request["method"], result["error"]))
+            else:
+                future.set_result(result.get("result"))
+                if key is not None and result.get("result") is not None:
+                    cached.append((key, request["method"], result["result"]))
+
+        if cached:
+            self.cache.put(cached)
+
+    def send(self, body):
+        """
+        Function to POST a batch and return the list of responses,
+        retrying failures of the whole request with a backoff.
+        """
+        attempt = 0
+        while True:
+            try:
+                response = self.session.post(self.endpoint, json=body, timeout=self.timeout)
+                response.raise_for_status()
+                results = response.json()
+
+                # Some providers return a single error object for the whole batch
+                if not isinstance(results, list):
+                    raise RPCError("batch", results.get("error", results) if isinstance(results, dict) else results)
+                return results
+            except Exception:
+                attempt += 1
+                if attempt > self.retries:
+                    raise
+                sleep(0.5 * 2 ** attempt)
+
+##################################################
+def to_block_param(block):
+    """
+    Function to convert a block number into a JSON-RPC
+    block parameter, tags such as 'latest' pass through.
+    """
+    if isinstance(block, int):
+        return hex(block)
+    return block
+
+##################################################
+def to_block_number(block):
+    """
+    Function to convert a JSON-RPC block parameter into an
+    int, or None for tags such as 'latest'.
+    """
+    if isinstance(block, int):
+        return block
+    if isinstance(block, str) and block.startswith("0x"):
+        return int(block, 16)
+    return None
+
+##################################################
+def to_json(value):
+    """
+    Function to serialize bytes params (e.g. HexBytes call
+    data) as hex strings when building cache keys.
+    """
+    if isinstance(value, (bytes, bytearray)):
+        return "0x" + bytes(value).hex()
+    raise TypeError("Cannot serialize " + type(value).__name__)
@@ -7,18 +7,24 @@
     File Details:
         Purpose: A series of functions to help initialize a fresh SQLite DB
         
-        NOTE: Event table is not used at this time as fetching events in realtime
-        takes ~20s. Will need to create a unique key for each event using
-        the blockHash + txHash + logIndex. This should cover any possible
-        block reorg. This setup file, and use of the local DB, will change
-        over time.
+        NOTE: The event table stores Transfer events keyed on contract + block +
+        logIndex, and event_sync tracks the block range stored for each contract
+        so runs only need to fetch new blocks (see modules/events.py). The most
+        recent blocks are always refetched to cover block reorgs. The code table
+        stores the code hash per address and code_kind classifies each distinct
+        code hash once (EOA, contract, Safe, proxy). block_time is a compact
+        block number to timestamp index. This setup file, and use of the local
+        DB, will change over time.
+
+        setup() only creates what is missing, and db.connect() runs it on every
+        connection, so an existing DB picks up tables added after it was created
+        without rerunning this file.
 """
 
 from termcolor import colored
 import sqlite3
 
-CON = sqlite3.connect("../files/ousd.db")
-CUR = CON.cursor()
+DB_PATH = "../files/ousd.db"
 
 ##################################################
 def main():
@@ -28,37 +34,88 @@ def main():
 
     print("\nStarting SQLite setup.")
 
+    con = sqlite3.connect(DB_PATH)
+    setup(con)
+    con.close()
+
+    print(colored("SQLite setup complete.", 'green'))
+
+##################################################
+def setup(con):
+    """
+    Function to create any missing tables and columns in
+    a DB, safe to run against an existing one.
+    """
+    cur = con.cursor()
+
     # Check if event table exists else create
-    create_event_table()
+    create_event_table(cur)
+
+    # Check if event sync table exists else create
+    create_event_sync_table(cur)
 
     # Check if block table exists else create
-    create_block_table()
+    create_block_table(cur)
+
+    # Check if block timestamp table exists else create
+    create_block_time_table(cur)
 
     # Check if user table exists else create
-    create_user_table()
+    create_user_table(cur)
 
     # Check if contract table exists else create
-    create_contract_table()
+    create_contract_table(cur)
 
-    print(colored("SQLite setup complete.", 'green'))
+    # Check if code tables exist else create
+    create_code_tables(cur)
+
+    con.commit()
 
 ##################################################
-def create_event_table():
+def create_event_table(cur):
     """
-    Function to create the event table in the db
-    UNUSED RIGHT NOW
+    Function to create the event table in the db. Values are stored
+    as TEXT as token amounts can overflow a SQLite INTEGER.
     """
+    # Drop the old unused placeholder table if present
+    columns = [each[1] for each in cur.execute("PRAGMA table_info(event)").fetchall()]
+    if columns and "contract" not in columns:
+        cur.execute("DROP TABLE event")
+
     create_event = """
         CREATE TABLE IF NOT EXISTS event (
+            contract TEXT,
+            block INTEGER,
+            log_index INTEGER,
+            transaction_index INTEGER,
             hash TEXT,
+            block_hash TEXT,
             e_from TEXT,
-            e_to TEXT
+            e_to TEXT,
+            value TEXT,
+            PRIMARY KEY (contract, block, log_index)
         );
     """
-    CUR.execute(create_event)
+    cur.execute(create_event)
 
 ##################################################
-def create_block_table():
+def create_event_sync_table(cur):
+    """
+    Function to create the event sync table in the db, this
+    holds the block range stored in the event table per contract
+    """
+    create_event_sync = """
+        CREATE TABLE IF NOT EXISTS event_sync (
+            contract TEXT UNIQUE PRIMARY KEY,
+            first_block INTEGER,
+            last_block INTEGER,
+            last_updated INTEGER
+        );
+    """
+    cur.execute(create_event_sync)
+
+##################################################
+def create_block_table(cur):
     """
     Function to create the block table in the db
     """
@@ -70,10 +127,28 @@ def create_block_table():
             last_updated INTEGER
         );
     """
-    CUR.execute(create_block)
+    cur.execute(create_block)
 
 ##################################################
-def create_user_table():
+def create_block_time_table(cur):
+    """
+    Function to create the block_time table in the db and
+    copy over timestamps already stored in the block table
+    """
+    if table_exists(cur, "block_time"):
+        return
+
+    create_block_time = """
+        CREATE TABLE IF NOT EXISTS block_time (
+            number INTEGER PRIMARY KEY,
+            timestamp INTEGER
+        ) WITHOUT ROWID;
+    """
+    cur.execute(create_block_time)
+    cur.execute("INSERT OR IGNORE INTO block_time (number, timestamp) SELECT number, timestamp FROM block;")
+
+##################################################
+def create_user_table(cur):
     """
     Function to create the user table in the db
     """
@@ -83,13 +158,34 @@ def create_user_table():
             ens TEXT,
             is_contract INTEGER,
             first_activity INTEGER,
-            last_updated INTEGER
+            last_updated INTEGER,
+            ens_updated INTEGER
         );
     """
-    CUR.execute(create_user)
+    cur.execute(create_user)
+
+    # Add the ENS refresh timestamp to user tables created before it existed
+    add_column(cur, "user", "ens_updated", "INTEGER")
+
+##################################################
+def add_column(cur, table, column, column_type):
+    """
+    Function to add a column to an existing table if it
+    is not already present.
+    """
+    columns = [each[1] for each in cur.execute("PRAGMA table_info(" + table + ")").fetchall()]
+    if column not in columns:
+        cur.execute("ALTER TABLE " + table + " ADD COLUMN " + column + " " + column_type)
+
+##################################################
+def table_exists(cur, table):
+    """
+    Function to check if a table exists in the db.
+    """
+    return cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone() is not None
 
 ##################################################
-def create_contract_table():
+def create_contract_table(cur):
     """
     Function to create the contract table in the db
     """
@@ -101,7 +197,31 @@ def create_contract_table():
             last_updated INTEGER
         );
     """
-    CUR.execute(create_contract)
+    cur.execute(create_contract)
+
+##################################################
+def create_code_tables(cur):
+    """
+    Function to create the code and code_kind tables in the db
+    """
+    create_code = """
+        CREATE TABLE IF NOT EXISTS code (
+            address TEXT UNIQUE PRIMARY KEY,
+            code_hash TEXT,
+            code_size INTEGER,
+            last_updated INTEGER
+        );
+    """
+    cur.execute(create_code)
+
+    create_code_kind = """
+        CREATE TABLE IF NOT EXISTS code_kind (
+            code_hash TEXT UNIQUE PRIMARY KEY,
+            kind TEXT,
+            last_updated INTEGER
+        );
+    """
+    cur.execute(create_code_kind)
 
 ##################################################
 # Runtime Entry Point
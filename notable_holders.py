@@ -15,7 +15,7 @@
 
 # Imports
 import sys
-import requests
+from modules import api
 
 # Globals
 KEY = "demo"
@@ -91,9 +91,7 @@ def get_data(url):
     """
     Function to fetch data from URL and return JSON
     """
-    with requests.Session() as s:
-        response = s.get(url)
-    return response.json()
+    return api.get_json(url)
 
 
 ##################################################
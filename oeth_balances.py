@@ -30,6 +30,21 @@ SETH2 = eth.get_contract("0xFe2e637202056d30016725477c5da089Ab0A043A")
 RETH2 = eth.get_contract("0x20BC832ca081b91433ff6c17f85701B6e92486c5")
 
 
+# Token columns and their decimal base, ETH is inserted after DAI
+TOKENS = [
+    (OETH, 1e18), (OUSD, 1e18), (OGN, 1e18), (OGV, 1e18), (VEOGV, 1e18),
+    (USDC, 1e6), (USDT, 1e6), (DAI, 1e18),
+    (WETH, 1e18), (STETH, 1e18), (WSTETH, 1e18), (CBETH, 1e18), (RETH, 1e18),
+    (FRXETH, 1e18), (SFRXETH, 1e18), (SETH2, 1e18), (RETH2, 1e18)
+]
+
+CHUNK_SIZE = 10000 # Addresses loaded, fetched and written per chunk
+COLUMNS = [
+    "address", "OETH", "OUSD", "OGN", "OGV", "veOGV", "USDC", "USDT", "DAI", "ETH",
+    "WETH", "stETH", "wstETH", "cbETH", "rETH", "frxETH", "sfrxETH", "sETH2", "rETH2"
+]
+
+
 ##################################################
 def main():
     """
@@ -37,107 +52,51 @@ def main():
     the relevant token balances for each address.
     """
 
-    # Import address list
-    print("Loading addresses...")
-    addresses = data.load("./files/output/oeth_users_" + str(LATEST_BLOCK) + ".csv", False)
-    output_list = []
-    i = 1
-    for address in addresses:
-        print("Processing address " + str(i) + "/" + str(len(addresses)) + "...")
-        output_list.append(get_balances(address))
-        i+=1
-
+    input_name = "./files/output/oeth_users_" + str(LATEST_BLOCK) + ".csv"
     output_path = "files/output"
     output_name = "oeth_balances_" + str(LATEST_BLOCK) + ".csv"
-    data.save(output_list, output_path, output_name,
-        [
-            "address",
-            "OETH",
-            "OUSD",
-            "OGN",
-            "OGV",
-            "veOGV",
-            "USDC",
-            "USDT",
-            "DAI",
-            "ETH",
-            "WETH",
-            "stETH",
-            "wstETH",
-            "cbETH",
-            "rETH", 
-            "frxETH",
-            "sfrxETH",
-            "sETH2",
-            "rETH2"
-        ]
-    )
+
+    # Stream the address list in chunks and write each chunk's balances as it completes
+    print("Loading addresses...")
+    with data.StreamWriter(output_path, output_name, COLUMNS) as writer:
+        for chunk in data.load_chunks(input_name, ["address"], {"address": str}, CHUNK_SIZE):
+            writer.write_many(get_balances(chunk["address"].tolist()))
 
 
 ##################################################
-def get_balances(address):
+def get_balances(addresses):
     """
     Function to determine token balances for a provided
-    Ethereum address.
+    list of Ethereum addresses. Token balances are fetched
+    in bulk through Multicall and ETH balances through
+    JSON-RPC batches.
     """
+    addresses = [eth.get_checksum(address) for address in addresses]
+
+    print("Fetching token balances for " + str(len(addresses)) + " addresses...")
+    token_balances = eth.get_token_balances([token[0] for token in TOKENS], addresses, LATEST_BLOCK)
+    eth_balances = eth.get_balances(addresses, LATEST_BLOCK)
+
+    output = []
+    i = 1
+    for address, balances, eth_wei in zip(addresses, token_balances, eth_balances):
+        print("Processing address " + str(i) + "/" + str(len(addresses)) + "...")
 
-    address = eth.get_checksum(address)
-
-    #oeth_balance_test = get_token_balance(OETH, address, LATEST_BLOCK, 1e18)
-    oeth_balance = round(eth.get_token_balance(OETH, address, LATEST_BLOCK) / 1e18, 2)
-    ousd_balance = round(eth.get_token_balance(OUSD, address, LATEST_BLOCK) / 1e18, 2)
-    ogn_balance = round(eth.get_token_balance(OGN, address, LATEST_BLOCK) / 1e18, 2)
-    ogv_balance = round(eth.get_token_balance(OGV, address, LATEST_BLOCK) / 1e18, 2)
-
-    veogv_balance = round(eth.get_token_balance(VEOGV, address, LATEST_BLOCK) / 1e18, 2)
-
-    usdc_balance = round(eth.get_token_balance(USDC, address, LATEST_BLOCK) / 1e6, 2)
-    usdt_balance = round(eth.get_token_balance(USDT, address, LATEST_BLOCK) / 1e6, 2)
-    dai_balance = round(eth.get_token_balance(DAI, address, LATEST_BLOCK) / 1e18, 2)
-
-    eth_balance = round(eth.get_balance(address, LATEST_BLOCK) / 1e18, 2)
-    
-    weth_balance = round(eth.get_token_balance(WETH, address, LATEST_BLOCK) / 1e18, 2)
-    steth_balance = round(eth.get_token_balance(STETH, address, LATEST_BLOCK) / 1e18, 2)
-    wsteth_balance = round(eth.get_token_balance(WSTETH, address, LATEST_BLOCK) / 1e18, 2)
-    cbeth_balance = round(eth.get_token_balance(CBETH, address, LATEST_BLOCK) / 1e18, 2)
-    reth_balance = round(eth.get_token_balance(RETH, address, LATEST_BLOCK) / 1e18, 2)
-    frxeth_balance = round(eth.get_token_balance(FRXETH, address, LATEST_BLOCK) / 1e18, 2)
-    sfrxeth_balance = round(eth.get_token_balance(SFRXETH, address, LATEST_BLOCK) / 1e18, 2)
-    seth2_balance = round(eth.get_token_balance(SETH2, address, LATEST_BLOCK) / 1e18, 2)
-    reth2_balance = round(eth.get_token_balance(RETH2, address, LATEST_BLOCK) / 1e18, 2)
-
-    output = [
-        address,
-        oeth_balance,
-        ousd_balance,
-        ogn_balance,
-        ogv_balance,
-        veogv_balance,
-        usdc_balance,
-        usdt_balance,
-        dai_balance,
-        eth_balance,
-        weth_balance,
-        steth_balance,
-        wsteth_balance,
-        cbeth_balance,
-        reth_balance,
-        frxeth_balance,
-        sfrxeth_balance,
-        seth2_balance,
-        reth2_balance
-    ]
+        values = [to_decimal(balance, token[1]) for balance, token in zip(balances, TOKENS)]
+        eth_balance = to_decimal(eth_wei, 1e18)
+
+        output.append([address] + values[:8] + [eth_balance] + values[8:])
+        i+=1
 
     return output
 
 ##################################################
-def get_token_balance(contract, address, block, base):
+def to_decimal(balance, base):
     """
-    Function to return the balance of a token for 
-    a given address.
+    Function to convert a raw token balance into a rounded
+    decimal value.
     """
-    return round(eth.get_token_balance(contract, address, block) / base, 2)
+    return round(balance / base, 2)
 
 ##################################################
 # Runtime Entry Point
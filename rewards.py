@@ -4,9 +4,8 @@
     Python Version: 3.11.x
 
 """
-from modules import data
+from modules import api, data
 import datetime
-import requests
 import time
 
 ADDRESS = "0x5De069482Ac1DB318082477B7B87D59dfB313f91"
@@ -19,19 +18,19 @@ def main():
     rewards = 0
     days = 0
 
-    all_validator_data = requests.get(f'https://beaconcha.in/api/v1/validator/eth1/{ADDRESS}').json()
+    all_validator_data = api.get_json(f'https://beaconcha.in/api/v1/validator/eth1/{ADDRESS}')
     for each in all_validator_data["data"]:
         validator_string += str(each["validatorindex"]) + ","
         validators.append(each["validatorindex"])
 
-    rewards_data = requests.get(f'https://beaconcha.in/api/v1/validator/{validator_string[:-1]}/performance').json()
+    rewards_data = api.get_json(f'https://beaconcha.in/api/v1/validator/{validator_string[:-1]}/performance')
     for reward in rewards_data["data"]:
         rewards += reward["performancetotal"]
     
     for validator in validators:
-        validator_data = requests.get(f'https://beaconcha.in/api/v1/validator/{validator}').json()
+        validator_data = api.get_json(f'https://beaconcha.in/api/v1/validator/{validator}')
         epoch = validator_data["data"]["activationepoch"]
-        epoch_data = requests.get(f'https://beaconcha.in/api/v1/epoch/{epoch}').json()
+        epoch_data = api.get_json(f'https://beaconcha.in/api/v1/epoch/{epoch}')
         timestamp = convert_timestamp(epoch_data["data"]["ts"])
         days_active = (NOW - timestamp) / 86400
         days += days_active
@@ -11,10 +11,9 @@
 
 # Imports
 from time import sleep, time
-from modules import data, eth, db, config
+from modules import api, data, eth, db, config
 from termcolor import colored
 import sys
-import requests
 
 DEBUG = True
 
@@ -57,8 +56,8 @@ def main():
         """%(LIMIT, offset, space)
 
         # Request data from Snapshot GraphQL endpoint
-        response = requests.post(URL, json={'query': query})
-        response_data = response.json()["data"]["follows"]
+        response = api.post_json(URL, json={'query': query})
+        response_data = response["data"]["follows"]
 
         # Add data to existing list
         follower_data.extend(response_data)
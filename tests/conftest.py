@@ -0,0 +1,39 @@
+"""
+    Shared pytest setup. The modules read and write files/ relative to the
+    working directory, so tests run from a scratch directory with modules/
+    linked in, and never touch the real DB or RPC cache. No test makes a
+    network call, the RPC endpoint points at a closed port.
+"""
+
+# Import Standard Packages
+import os
+import sys
+import tempfile
+
+# Import Other Packages
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKDIR = tempfile.mkdtemp(prefix="data_scripts_tests_")
+
+os.environ["ORIGIN_RPC"] = "http://127.0.0.1:1"
+os.symlink(os.path.join(ROOT, "modules"), os.path.join(WORKDIR, "modules"))
+os.makedirs(os.path.join(WORKDIR, "files", "output"))
+os.chdir(WORKDIR)
+sys.path.insert(0, ROOT)
+
+from modules import db
+
+##################################################
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """
+    Fixture to point the db module at a fresh DB file.
+    """
+    con = db.connect(str(tmp_path / "test.db"))
+    monkeypatch.setattr(db, "CON", con)
+    monkeypatch.setattr(db, "CUR", con.cursor())
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "test.db"))
+    monkeypatch.setattr(db, "WRITER", None)
+    yield con
+    con.close()
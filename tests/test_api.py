@@ -0,0 +1,128 @@
+# Import Standard Packages
+import json
+
+# Import Other Packages
+import pytest
+import requests
+
+from modules import api
+
+URL = "https://api.etherscan.io/api?module=account"
+
+##################################################
+class FakeResponse:
+    """
+    Stand in for a requests Response.
+    """
+    def __init__(self, status_code, body, headers=None):
+        self.status_code = status_code
+        self.text = body if isinstance(body, str) else json.dumps(body)
+        self.content = self.text.encode()
+        self.headers = headers or {}
+        self.ok = status_code < 400
+        self.url = URL
+
+    def json(self):
+        return json.loads(self.text)
+
+##################################################
+class FakeSession:
+    """
+    Stand in for a requests Session, answering each request with
+    the next queued response, or raising it if it is an exception.
+    """
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+##################################################
+@pytest.fixture
+def client(monkeypatch):
+    """
+    Fixture to stub out sleeping (recording the retry delays)
+    and give every host an unlimited token bucket.
+    """
+    sleeps = []
+    monkeypatch.setattr(api, "sleep", sleeps.append)
+    monkeypatch.setattr(api, "BUCKETS", {})
+    monkeypatch.setattr(api, "LIMITS", {"api.etherscan.io": 10**9})
+    monkeypatch.setattr(api, "random", type("Random", (), {"random": staticmethod(lambda: 0)}))
+    return sleeps
+
+##################################################
+def use_session(monkeypatch, responses):
+    """
+    Function to answer requests to every host from a FakeSession.
+    """
+    session = FakeSession(responses)
+    monkeypatch.setattr(api, "get_session", lambda host: session)
+    return session
+
+##################################################
+def test_token_bucket_spaces_out_calls(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(api, "monotonic", lambda: now[0])
+
+    bucket = api.TokenBucket(5)
+    assert bucket.reserve() == 0
+
+    # Calls made at the same moment queue up one interval apart
+    assert bucket.reserve() == pytest.approx(0.2)
+    assert bucket.reserve() == pytest.approx(0.4)
+
+    # Time passing pays the debt back, but never banks more than capacity
+    now[0] += 10
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.2)
+
+##################################################
+def test_get_retries_429_and_5xx(client, monkeypatch):
+    session = use_session(monkeypatch, [
+        FakeResponse(429, "Too Many Requests", {"Retry-After": "3"}),
+        FakeResponse(502, "Bad Gateway"),
+        FakeResponse(200, {"status": "1", "result": "42"})
+    ])
+
+    assert api.get_json(URL) == {"status": "1", "result": "42"}
+    assert session.calls == 3
+
+    # Retry-After is honoured, otherwise the backoff doubles
+    assert client == [3.0, api.BACKOFF * 2]
+
+##################################################
+def test_get_retries_etherscan_rate_limit_body(client, monkeypatch):
+    session = use_session(monkeypatch, [
+        FakeResponse(200, {"status": "0", "message": "NOTOK", "result": "Max rate limit reached"}),
+        FakeResponse(200, {"status": "1", "result": "42"})
+    ])
+
+    assert api.get_json(URL)["result"] == "42"
+    assert session.calls == 2
+
+##################################################
+def test_get_raises_after_retries(client, monkeypatch):
+    use_session(monkeypatch, [FakeResponse(503, "Unavailable")] * 3)
+    with pytest.raises(api.HTTPError) as error:
+        api.get(URL, retries=2)
+    assert error.value.status == 503
+
+    use_session(monkeypatch, [requests.ConnectionError("connection reset")] * 3)
+    with pytest.raises(api.HTTPError):
+        api.get(URL, retries=2)
+
+##################################################
+def test_get_returns_other_errors_to_caller(client, monkeypatch):
+    session = use_session(monkeypatch, [FakeResponse(404, "Not Found")])
+    assert api.get(URL).status_code == 404
+    assert session.calls == 1
+
+    use_session(monkeypatch, [FakeResponse(404, "Not Found")])
+    with pytest.raises(api.HTTPError):
+        api.get_json(URL)
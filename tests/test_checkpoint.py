@@ -0,0 +1,47 @@
+from modules import checkpoint, eth, report
+
+##################################################
+def test_journal_resumes_rows_in_order(tmp_path):
+    path = str(tmp_path / "checkpoint.db")
+    with checkpoint.Journal("run", every=2, path=path) as journal:
+        journal.add("a", ["a", 1])
+        journal.add("b", ["b", 2])
+        journal.add("c", ["c", 3])
+        journal.add("a", ["a", 9]) # Already done, ignored
+
+    with checkpoint.Journal("run", path=path) as journal:
+        assert len(journal) == 3
+        assert "c" in journal and "d" not in journal
+        journal.add("d", ["d", 4])
+        assert journal.rows() == [["a", 1], ["b", 2], ["c", 3], ["d", 4]]
+
+    # Runs are kept apart
+    with checkpoint.Journal("other", path=path) as journal:
+        assert len(journal) == 0
+
+##################################################
+def test_journal_clear(tmp_path):
+    path = str(tmp_path / "checkpoint.db")
+    with checkpoint.Journal("run", path=path) as journal:
+        journal.add("a", ["a", 1])
+        journal.clear()
+        assert journal.rows() == []
+
+    with checkpoint.Journal("run", path=path) as journal:
+        assert "a" not in journal
+
+##################################################
+def test_report_pin_block_resumes(monkeypatch):
+    heads = iter([1000, 1100])
+    monkeypatch.setattr(eth, "get_latest_block", lambda: next(heads))
+    stub = report.Report("pinned", None, [])
+
+    # The first run journals a block behind the head, a rerun reuses it
+    assert stub.pin_block() == 1000 - report.rpc.REORG_DEPTH
+    assert stub.pin_block() == 1000 - report.rpc.REORG_DEPTH
+
+    # A fixed block is used as is
+    assert report.Report("fixed", None, [], block=5).pin_block() == 5
+
+    with checkpoint.Journal("report_pinned") as journal:
+        journal.clear()
@@ -0,0 +1,49 @@
+
+from modules import columnar
+from tests.test_events import ALICE, BOB, LOGS, TOPIC, ZERO
+
+##################################################
+def test_address_table():
+    table = columnar.AddressTable()
+    assert len(table) == 0
+    assert table.intern(bytes.fromhex(ALICE[2:])) == 0
+    assert table.intern(bytes.fromhex(BOB[2:])) == 1
+    assert table.intern(bytes.fromhex(ALICE[2:])) == 0
+
+    assert table.id(ALICE.lower()) == 0
+    assert table.id(ZERO) == -1
+    assert table.addresses([1, 0]) == [BOB, ALICE]
+
+##################################################
+def test_from_raw_logs():
+    batch = columnar.from_raw_logs(LOGS)
+    assert len(batch) == 4
+    assert list(batch.block) == [10, 11, 12, 15]
+    assert list(batch.log_index) == [0, 0, 1, 0]
+    assert batch.table.addresses(batch.sender) == [ZERO, ALICE, ZERO, BOB]
+    assert batch.table.addresses(batch.receiver) == [ALICE, BOB, BOB, ALICE]
+
+    # Values past int64 are kept exactly
+    assert list(batch.value) == [100, 40, 5, 2**200]
+
+    # Shared tables give the same ids across batches
+    again = columnar.from_raw_logs(LOGS[3:], batch.table)
+    assert list(again.sender) == [batch.table.id(BOB)]
+
+##################################################
+def test_decode_erc721_and_raw_json():
+    # ERC721 Transfers carry the token id as a 4th topic and no data, raw JSON-RPC uses hex strings
+    log = {
+        "topics": ["0x" + TOPIC.hex().removeprefix("0x"), "0x" + "00" * 32, "0x" + "00" * 12 + ALICE[2:], "0x" + (7).to_bytes(32, "big").hex()],
+        "data": "0x",
+        "blockNumber": "0x10",
+        "transactionIndex": "0x2",
+        "logIndex": "0x3"
+    }
+    assert columnar.decode_transfer(log) == (16, 2, 3, bytes(20), bytes.fromhex(ALICE[2:]), 7)
+
+##################################################
+def test_empty_batch():
+    batch = columnar.from_raw_logs([])
+    assert len(batch) == 0
+    assert len(batch.minted_to()) == 0
@@ -0,0 +1,53 @@
+# Import Standard Packages
+import csv
+
+from modules import data
+
+ADDRESSES = ["0x0000000000000000000000000000000000000001", "0x0000000000000000000000000000000000000002"]
+
+##################################################
+def read_csv(filename):
+    with open(filename, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+##################################################
+def test_save_flat_list(tmp_path):
+    # Scripts like minters.py save a flat list of addresses as one column
+    data.save(ADDRESSES, tmp_path, "users.csv", ["Address"])
+    assert read_csv(tmp_path / "users.csv") == [["Address"]] + [[address] for address in ADDRESSES]
+
+##################################################
+def test_save_rows_and_dtypes(tmp_path):
+    data.save([("a", "1", "True"), ("b", 2.0, False)], tmp_path, "rows.csv", ["name", "count", "flag"], {"count": int, "flag": bool})
+    assert read_csv(tmp_path / "rows.csv") == [["name", "count", "flag"], ["a", "1", "True"], ["b", "2", "False"]]
+
+##################################################
+def test_stream_writer_resume(tmp_path):
+    with data.StreamWriter(tmp_path, "out.csv", ["address", "balance"], chunk_size=2) as writer:
+        writer.write_many([["0x1", 1], ["0x2", 2], ["0x3", 3]])
+
+    # Simulate a crash part way through writing the last line
+    with open(tmp_path / "out.csv", "a", encoding="utf-8") as f:
+        f.write("0x4,")
+
+    writer = data.StreamWriter(tmp_path, "out.csv", ["address", "balance"], resume=True)
+    assert writer.written == 3
+    assert writer.keys() == {"0x1", "0x2", "0x3"}
+    writer.write(["0x4", 4])
+    writer.close()
+
+    assert read_csv(tmp_path / "out.csv") == [["address", "balance"], ["0x1", "1"], ["0x2", "2"], ["0x3", "3"], ["0x4", "4"]]
+
+##################################################
+def test_stream_writer_without_resume_overwrites(tmp_path):
+    data.save([["0x1"]], tmp_path, "out.csv", ["address"])
+    data.save([["0x2"]], tmp_path, "out.csv", ["address"])
+    assert read_csv(tmp_path / "out.csv") == [["address"], ["0x2"]]
+
+##################################################
+def test_load_matches_saved_rows(tmp_path):
+    data.save([["0x1", 1], ["0x2", 2]], tmp_path, "out.csv", ["address", "balance"])
+    filename = str(tmp_path / "out.csv")
+    assert data.load(filename, False) == ["0x1", "0x2"]
+    assert data.count_rows(filename) == 2
+    assert [chunk["balance"].tolist() for chunk in data.load_chunks(filename, ["balance"], {"balance": int}, chunk_size=1)] == [[1], [2]]
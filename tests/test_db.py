@@ -0,0 +1,79 @@
+# Import Standard Packages
+import sqlite3
+
+# Import Other Packages
+import pytest
+
+from modules import db
+
+##################################################
+def test_connect_creates_missing_tables(tmp_path):
+    # A DB set up before the event, block_time and code tables existed
+    path = str(tmp_path / "old.db")
+    con = sqlite3.connect(path)
+    con.execute("CREATE TABLE block (number INTEGER PRIMARY KEY, timestamp INTEGER, data TEXT, last_updated INTEGER)")
+    con.execute("INSERT INTO block VALUES (5, 100, '{}', 0)")
+    con.execute("CREATE TABLE user (address TEXT UNIQUE PRIMARY KEY, ens TEXT, is_contract INTEGER, first_activity INTEGER, last_updated INTEGER)")
+    con.commit()
+    con.close()
+
+    con = db.connect(path)
+    tables = set(each[0] for each in con.execute("SELECT name FROM sqlite_master WHERE type = 'table'"))
+    assert {"event", "event_sync", "block_time", "code", "code_kind", "contract"} <= tables
+    assert "ens_updated" in [each[1] for each in con.execute("PRAGMA table_info(user)")]
+
+    # Existing block timestamps are copied into the index
+    assert con.execute("SELECT * FROM block_time").fetchall() == [(5, 100)]
+
+##################################################
+def test_event_sync_on_fresh_db(database):
+    assert db.get_event_sync("0x0000000000000000000000000000000000000001") is None
+
+##################################################
+def test_writer_start_flush_stop(database):
+    db.start_writer()
+    writer = db.WRITER
+    try:
+        db.add_block(5, 100, "{}")
+        db.replace_events("0x1", 0, 1, 10, [("0x1", 3, 0, 0, "0x", "0x", "0xa", "0xb", "1")])
+        db.flush()
+
+        # Committed by the writer's own connection, to the same DB
+        assert db.get_block(5)[1] == 100
+        assert db.get_event_sync("0x1") == (1, 10)
+        assert len(list(db.iter_events("0x1", 0, 10))) == 1
+
+        # A failed write is raised by the next flush and doesn't stop the writer
+        db.write("INSERT INTO missing_table VALUES (?);", [(1,)])
+        with pytest.raises(sqlite3.OperationalError):
+            db.flush()
+        db.add_block(6, 200, "{}")
+        db.flush()
+        assert db.get_block(6)[1] == 200
+    finally:
+        db.stop_writer()
+
+    assert db.WRITER is None
+    assert not writer.is_alive()
+
+    # Without the writer, writes commit straight away
+    db.add_block(7, 300, "{}")
+    assert db.get_block(7)[1] == 300
+
+##################################################
+def test_reconnect_drops_writer_after_fork(database, monkeypatch):
+    db.start_writer()
+    writer = db.WRITER
+    try:
+        # The forked child has a copy of WRITER, but not its thread
+        db.reconnect()
+        assert db.WRITER is None
+        assert db.CON is not database
+
+        # The fresh connection is to the same DB
+        db.add_block(5, 100, "{}")
+        assert database.execute("SELECT timestamp FROM block WHERE number = 5").fetchone() == (100,)
+    finally:
+        db.CON.close()
+        writer.queue.put(None)
+        writer.join()
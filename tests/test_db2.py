@@ -0,0 +1,131 @@
+# Import Other Packages
+import pytest
+
+pytest.importorskip("psycopg2")
+
+from modules import db2
+import friends_process
+
+##################################################
+class FakeCursor:
+    """
+    Stand in for a psycopg2 cursor. COPY is read in small pieces
+    the way psycopg2 reads it, recording how many rows had been
+    pulled from the source at the first read.
+    """
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, query, params=None):
+        self.conn.statements.append((query, params))
+        if "FAIL" in query:
+            raise ValueError("statement failed")
+
+    def fetchall(self):
+        return self.conn.results
+
+    def copy_expert(self, query, file):
+        self.conn.statements.append((query, None))
+        chunks = []
+        while True:
+            chunk = file.read(16)
+            if not chunk:
+                break
+            if not chunks:
+                self.conn.pulled_at_first_read = self.conn.pulled[0]
+            chunks.append(chunk)
+        self.conn.copied = "".join(chunks)
+
+class FakeConnection:
+    def __init__(self):
+        self.statements = []
+        self.results = []
+        self.committed = 0
+        self.rolled_back = 0
+        self.pulled = [0]
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.committed += 1
+
+    def rollback(self):
+        self.rolled_back += 1
+
+class FakePool:
+    def __init__(self, conn):
+        self.conn = conn
+        self.returned = 0
+
+    def getconn(self):
+        return self.conn
+
+    def putconn(self, conn):
+        self.returned += 1
+
+@pytest.fixture
+def postgres(monkeypatch):
+    conn = FakeConnection()
+    pool = FakePool(conn)
+    monkeypatch.setattr(db2, "POOL", pool)
+
+    # execute_values needs a real cursor to format the values, record its calls instead
+    def execute_values(cursor, query, rows, template=None, page_size=None, fetch=False):
+        conn.statements.append((query, list(rows)))
+    monkeypatch.setattr(db2, "execute_values", execute_values)
+    return conn
+
+##################################################
+def test_execute_commits_or_rolls_back(postgres):
+    db2.execute("SELECT 1")
+    assert postgres.committed == 1
+    with pytest.raises(ValueError):
+        db2.execute("FAIL")
+    assert postgres.rolled_back == 1
+    assert db2.POOL.returned == 2
+
+##################################################
+def test_bulk_users_and_blocks(postgres):
+    db2.add_users([("0xa", "a.eth", False, 10), ("0xb", None, True, 0)])
+    db2.add_blocks([(5, 100, "{}")])
+    db2.add_users([])
+
+    (users_query, users), (blocks_query, blocks) = postgres.statements
+    assert "ON CONFLICT DO NOTHING" in users_query
+    assert [user[:4] for user in users] == [("0xa", "a.eth", False, 10), ("0xb", None, True, 0)]
+    assert len(users[0]) == 5
+    assert "INSERT INTO block" in blocks_query and blocks[0][:3] == (5, 100, "{}")
+
+##################################################
+def test_get_users(postgres):
+    postgres.results = [("0xa", "a.eth"), ("0xb", "")]
+    assert db2.get_users(["0xa", "0xb", "0xc"]) == {"0xa": ("0xa", "a.eth"), "0xb": ("0xb", "")}
+    assert postgres.statements[0][1] == (["0xa", "0xb", "0xc"],)
+
+##################################################
+def test_copy_rows_streams(postgres):
+    def rows():
+        for i in range(100):
+            postgres.pulled[0] += 1
+            yield (i, 'say "hi", ok' if i == 1 else None)
+
+    assert db2.copy_rows("item", ["id", "note"], rows()) == 100
+    assert postgres.pulled_at_first_read < 10
+    lines = postgres.copied.splitlines()
+    assert lines[:2] == ["0,\\N", '1,"say ""hi"", ok"']
+    assert len(lines) == 100
+    assert "COPY item (id, note) FROM STDIN" in postgres.statements[0][0]
+
+##################################################
+def test_load_users(postgres, tmp_path):
+    path = tmp_path / "users.txt"
+    path.write_text("0xa\n\n0xb\n")
+    friends_process.load_users(str(path))
+    assert postgres.copied.splitlines() == ["0xa", "0xb"]
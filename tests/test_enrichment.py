@@ -0,0 +1,70 @@
+# Import Other Packages
+import pytest
+
+from modules import db, enrichment, eth
+
+USER = "0x0000000000000000000000000000000000000001"
+CONTRACT = "0x0000000000000000000000000000000000000002"
+
+##################################################
+def test_get_user_details_resolves_and_caches(database, monkeypatch):
+    monkeypatch.setattr(eth, "get_ens_names", lambda addresses: {address: "" for address in addresses})
+    monkeypatch.setattr(eth, "get_codes", lambda addresses, block, batch_size: [b"\x60\x00" if address == CONTRACT else b"" for address in addresses])
+    monkeypatch.setattr(eth, "classify_code", lambda address, code: "contract")
+    monkeypatch.setattr(eth, "get_first_transaction", lambda address: 1000)
+    monkeypatch.setattr(eth, "get_contract_deploy_date", lambda address, return_block: 50)
+    monkeypatch.setattr(eth, "get_block_timestamps", lambda blocks: {block: 2000 for block in blocks})
+
+    output = enrichment.get_user_details([USER, CONTRACT])
+
+    assert output[USER][2:4] == (0, 1000)
+    assert output[CONTRACT][2:4] == (1, 2000)
+
+    # Both users and the contract's code hash were stored
+    assert set(db.get_users([USER, CONTRACT])) == {USER, CONTRACT}
+    assert set(db.get_codes([USER, CONTRACT])) == {CONTRACT}
+
+##################################################
+def test_lookup_contracts_surfaces_db_errors(monkeypatch):
+    def broken(addresses):
+        raise db.sqlite3.ProgrammingError("SQLite objects created in a thread can only be used in that same thread")
+    monkeypatch.setattr(eth, "get_contract_kinds", broken)
+
+    with pytest.raises(db.sqlite3.ProgrammingError):
+        enrichment.lookup_contracts([USER])
+
+##################################################
+def test_run_lookup_retries_failures(monkeypatch):
+    monkeypatch.setattr(enrichment, "sleep", lambda seconds: None)
+    attempts = {}
+
+    def flaky(address):
+        attempts[address] = attempts.get(address, 0) + 1
+        if address == "b" and attempts[address] < 2:
+            raise ValueError("rate limited")
+        if address == "c":
+            raise ValueError("always fails")
+        return address.upper()
+
+    lookups = {"test": {"workers": 2, "rate": 1000}}
+    assert enrichment.run_lookup("test", flaky, ["a", "b", "c"], lookups) == {"a": "A", "b": "B"}
+    assert attempts == {"a": 1, "b": 2, "c": 3}
+
+##################################################
+def test_get_user_details_strict_raises_after_caching(database, monkeypatch):
+    monkeypatch.setattr(enrichment, "sleep", lambda seconds: None)
+    monkeypatch.setattr(eth, "get_ens_names", lambda addresses: {address: "" for address in addresses})
+    monkeypatch.setattr(eth, "get_codes", lambda addresses, block, batch_size: [b"" for address in addresses])
+
+    def first_transaction(address):
+        if address == CONTRACT:
+            raise ValueError("etherscan down")
+        return 1000
+    monkeypatch.setattr(eth, "get_first_transaction", first_transaction)
+    monkeypatch.setattr(eth, "get_block_timestamps", lambda blocks: {})
+
+    with pytest.raises(LookupError):
+        enrichment.get_user_details([USER, CONTRACT], strict=True)
+
+    # The user that resolved is cached, the failed one is left to retry
+    assert set(db.get_users([USER, CONTRACT])) == {USER}
@@ -0,0 +1,285 @@
+# Import Other Packages
+from web3.exceptions import ContractLogicError
+import pytest
+import requests
+
+from modules import eth
+
+##################################################
+class FakeReverseRecords:
+    """
+    Stand in for the ReverseRecords contract. getNames reverts
+    for any batch holding a broken address, or raises error.
+    """
+    def __init__(self, names, broken=(), error=None):
+        self.names = names
+        self.broken = set(broken)
+        self.error = error
+        self.calls = 0
+        self.functions = self
+
+    def getNames(self, addresses):
+        self.calls += 1
+        self.batch = addresses
+        return self
+
+    def call(self):
+        if self.error is not None:
+            raise self.error
+        if self.broken & set(self.batch):
+            raise ContractLogicError("execution reverted")
+        return [self.names[address] for address in self.batch]
+
+##################################################
+class FakeMulticall:
+    """
+    Stand in for Multicall3 and eth_call. Balances are keyed on
+    (token, address), calls to a token in failing fail inside the
+    Multicall and reverts fail everywhere.
+    """
+    def __init__(self, balances, failing=(), reverts=()):
+        self.balances = balances
+        self.failing = set(failing)
+        self.reverts = set(reverts)
+        self.single_calls = []
+        self.functions = self
+        self.eth = self
+
+    def balance(self, token, call_data):
+        return self.balances[(token, "0x" + call_data[-20:].hex())].to_bytes(32, "big")
+
+    def aggregate3(self, calls):
+        self.batch = calls
+        return self
+
+    def call(self, transaction=None, block=None, block_identifier=None):
+        # eth.call(transaction, block) for single calls
+        if transaction is not None:
+            self.single_calls.append(transaction["to"])
+            if transaction["to"] in self.reverts:
+                raise ContractLogicError("execution reverted")
+            return self.balance(transaction["to"], transaction["data"])
+        return [(False, b"") if token in self.failing | self.reverts else (True, self.balance(token, call_data))
+                for token, allow_failure, call_data in self.batch]
+
+class Token:
+    def __init__(self, address):
+        self.address = address
+
+ALICE = "0x" + "aa" * 20
+BOB = "0x" + "bb" * 20
+BALANCES = {("t1", ALICE): 1, ("t2", ALICE): 0, ("t1", BOB): 3, ("t2", BOB): 4}
+
+##################################################
+def test_token_balances_retries_failed_calls(monkeypatch):
+    multicall = FakeMulticall(BALANCES, failing=["t2"])
+    monkeypatch.setattr(eth, "get_contract", lambda address, abi: multicall)
+    monkeypatch.setattr(eth, "get_web3", lambda: multicall)
+
+    # Failed sub-calls are fetched on their own rather than read as zero
+    assert eth.get_token_balances([Token("t1"), Token("t2")], [ALICE, BOB], 100, batch_size=3) == [[1, 0], [3, 4]]
+    assert multicall.single_calls == ["t2", "t2"]
+
+##################################################
+def test_token_balances_raises_on_revert(monkeypatch):
+    multicall = FakeMulticall(BALANCES, reverts=["t2"])
+    monkeypatch.setattr(eth, "get_contract", lambda address, abi: multicall)
+    monkeypatch.setattr(eth, "get_web3", lambda: multicall)
+    with pytest.raises(ContractLogicError):
+        eth.get_token_balances([Token("t1"), Token("t2")], [ALICE, BOB], 100)
+
+##################################################
+def test_reverse_names_skips_reverting_address(monkeypatch):
+    # Only the batching is under test, stand in for ENS normalization
+    monkeypatch.setattr(eth, "normalize_name", lambda name: name.lower())
+    names = {"a": "alice.eth", "b": "bob.eth", "c": "", "d": "Not.Normalized.eth"}
+    records = FakeReverseRecords(names, broken=["b"])
+    assert eth.get_reverse_names(records, ["a", "b", "c", "d"]) == ["alice.eth", "", "", ""]
+
+##################################################
+def test_reverse_names_raises_transport_errors():
+    records = FakeReverseRecords({"a": "alice.eth", "b": "bob.eth"}, error=requests.ConnectionError("connection reset"))
+    with pytest.raises(requests.ConnectionError):
+        eth.get_reverse_names(records, ["a", "b"])
+    assert records.calls == 1
+
+##################################################
+def test_is_log_range_error():
+    assert eth.is_log_range_error(ValueError({"code": -32005, "message": "query returned more than 10000 results"}))
+    assert eth.is_log_range_error(ValueError({"code": -32602, "message": "Log response size exceeded. You can make eth_getLogs requests with up to a 2K block range"}))
+    assert eth.is_log_range_error(ValueError("block range is too wide"))
+    assert not eth.is_log_range_error(requests.Timeout("Read timed out. (read timeout=10)"))
+    assert not eth.is_log_range_error(ValueError({"code": -32602, "message": "invalid block range params"}))
+    assert not eth.is_log_range_error(ValueError("execution reverted: amount exceeds balance"))
+
+##################################################
+class FakeLogs:
+    """
+    Stand in for eth_getLogs, raising each error in turn before
+    returning the logs.
+    """
+    def __init__(self, errors, logs):
+        self.errors = list(errors)
+        self.logs = logs
+        self.calls = 0
+        self.eth = self
+
+    def get_logs(self, params):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.logs
+
+##################################################
+def test_fetch_logs_retries_timeouts(monkeypatch):
+    node = FakeLogs([requests.Timeout("Read timed out."), requests.Timeout("Read timed out.")], ["log"])
+    monkeypatch.setattr(eth, "get_web3", lambda: node)
+    monkeypatch.setattr(eth, "sleep", lambda seconds: None)
+    assert eth.fetch_logs({}, 1, 10) == ["log"]
+    assert node.calls == 3
+
+##################################################
+def test_fetch_logs_raises_range_errors(monkeypatch):
+    node = FakeLogs([ValueError("query returned more than 10000 results")], ["log"])
+    monkeypatch.setattr(eth, "get_web3", lambda: node)
+    with pytest.raises(ValueError):
+        eth.fetch_logs({}, 1, 10)
+    assert node.calls == 1
+
+##################################################
+def test_min_block_spacing():
+    assert eth.min_block_spacing(eth.MERGE_BLOCK, eth.MERGE_BLOCK + 10) == 120
+    assert eth.min_block_spacing(eth.MERGE_BLOCK - 10, eth.MERGE_BLOCK) == 10
+
+##################################################
+def test_interpolate_timestamp():
+    # Post merge with no missed slots the bound pins the exact timestamp
+    low = eth.MERGE_BLOCK + 100
+    anchors = {low: 1000, low + 10: 1120}
+    assert eth.interpolate_timestamp(low + 4, low, low + 10, anchors) == (1048, 0)
+
+    # One missed slot leaves 12s of room either way
+    anchors = {low: 1000, low + 10: 1132}
+    estimate, error = eth.interpolate_timestamp(low + 4, low, low + 10, anchors)
+    assert 1048 <= estimate <= 1060 and error <= 12
+
+    # Pre merge blocks are only bounded by one second each
+    anchors = {100: 1000, 200: 2300}
+    estimate, error = eth.interpolate_timestamp(150, 100, 200, anchors)
+    assert estimate == 1650
+    assert error == max(1650 - 1050, 2250 - 1650)
+
+##################################################
+def test_estimate_block_timestamps_within_bound(monkeypatch):
+    # Post merge chain with every seventh slot missed
+    start = eth.MERGE_BLOCK + 1000
+    chain = {}
+    timestamp = 1700000000
+    for number in range(start, start + 5000):
+        chain[number] = timestamp
+        timestamp += 24 if number % 7 == 0 else 12
+
+    fetched = []
+    def get_block_timestamps(numbers, batch_size):
+        fetched.extend(numbers)
+        return {number: chain[number] for number in numbers}
+
+    monkeypatch.setattr(eth.db, "get_block_anchors", lambda first, last: {start: chain[start], start + 4999: chain[start + 4999]})
+    monkeypatch.setattr(eth, "get_block_timestamps", get_block_timestamps)
+
+    numbers = list(range(start, start + 5000, 13))
+    output = eth.estimate_block_timestamps(numbers, max_error=120)
+    assert sorted(output) == numbers
+    assert all(abs(output[number] - chain[number]) <= 120 for number in numbers)
+    assert len(fetched) < len(numbers) // 4
+
+##################################################
+class FakeSafe:
+    """
+    Stand in for the Safe VERSION() call, returning version or
+    raising it if it is an exception.
+    """
+    def __init__(self, version):
+        self.version = version
+        self.functions = self
+
+    def VERSION(self):
+        return self
+
+    def call(self):
+        if isinstance(self.version, Exception):
+            raise self.version
+        return self.version
+
+MINIMAL_PROXY = eth.MINIMAL_PROXY_PREFIX + bytes(20) + eth.MINIMAL_PROXY_SUFFIX
+
+##################################################
+def test_classify_code(monkeypatch):
+    monkeypatch.setattr(eth, "get_contract", lambda address, abi: FakeSafe(ContractLogicError("execution reverted")))
+    assert eth.classify_code(ALICE, MINIMAL_PROXY) == "minimal_proxy"
+    assert eth.classify_code(ALICE, bytes.fromhex("6080604052")) == "contract"
+
+    monkeypatch.setattr(eth, "get_contract", lambda address, abi: FakeSafe("1.3.0"))
+    assert eth.classify_code(ALICE, MINIMAL_PROXY) == "safe"
+
+##################################################
+def test_classify_code_raises_transport_errors(monkeypatch):
+    monkeypatch.setattr(eth, "get_contract", lambda address, abi: FakeSafe(requests.ConnectionError("connection reset")))
+    with pytest.raises(requests.ConnectionError):
+        eth.classify_code(ALICE, bytes.fromhex("6080604052"))
+
+# GnosisSafeProxy v1.3.0 runtime code, without the metadata trailer
+SAFE_PROXY = bytes.fromhex(
+    "608060405273ffffffffffffffffffffffffffffffffffffffff600054167fa619486e0000000000000000000000000000000000000000000000000000000060003514156050578060005260206000f35b3660008037600080366000845af43d6000803e60008114156070573d6000fd5b3d6000f3fe"
+)
+
+# Start of an EIP-1967 proxy, pushing the implementation slot
+ERC1967_PROXY = bytes.fromhex("60806040527f") + eth.PROXY_SLOTS[0] + bytes.fromhex("545af4")
+
+##################################################
+def test_classify_code_matches_proxy_code(monkeypatch):
+    def no_call(address, abi):
+        raise AssertionError("Unexpected VERSION() call")
+    monkeypatch.setattr(eth, "get_contract", no_call)
+
+    assert eth.classify_code(ALICE, SAFE_PROXY) == "safe"
+    assert eth.classify_code(ALICE, ERC1967_PROXY) == "proxy"
+
+##################################################
+def test_get_contract_kinds_checks_shared_proxies_per_address(database, monkeypatch):
+    carol, dave, erin = ("0x" + "0" * 39 + str(i) for i in range(3, 6))
+    codes = {ALICE: SAFE_PROXY, BOB: SAFE_PROXY, carol: ERC1967_PROXY, dave: ERC1967_PROXY, erin: b""}
+    monkeypatch.setattr(eth, "get_codes", lambda addresses, block, batch_size: [codes[address] for address in addresses])
+
+    # Only dave's implementation is a Safe, the shared proxy hash can't decide for carol
+    calls = []
+    def get_contract(address, abi):
+        calls.append(address)
+        return FakeSafe("1.3.0" if address == dave else ContractLogicError("execution reverted"))
+    monkeypatch.setattr(eth, "get_contract", get_contract)
+
+    expected = {ALICE: "safe", BOB: "safe", carol: "contract", dave: "safe", erin: "eoa"}
+    assert eth.get_contract_kinds(list(codes)) == expected
+    assert sorted(calls) == sorted([carol, dave])
+
+    # Safe proxy hashes are stored, the shared proxy hash is still checked per address
+    calls.clear()
+    assert eth.get_contract_kinds(list(codes)) == expected
+    assert sorted(calls) == sorted([carol, dave])
+
+##################################################
+def test_log_windows_bisect_and_adapt():
+    windows = eth.LogWindows(1, 100, gap=10, target=8, max_gap=40)
+    assert windows.take(3) == [(1, 10), (11, 20), (21, 30)]
+
+    # Refused windows are halved, as is the window size
+    assert windows.split((1, 10), ValueError("query returned more than 10000 results")) == [(1, 5), (6, 10)]
+    assert windows.gap == 5
+    with pytest.raises(requests.ConnectionError):
+        windows.split((11, 20), requests.ConnectionError("connection reset"))
+
+    # Sparse windows grow the window size, dense ones shrink it
+    windows.add((1, 5), [])
+    assert windows.take(1) == [(31, 40)]
+    windows.add((6, 10), [{"blockNumber": 7, "logIndex": 0}] * 9)
+    assert windows.take(1) == [(41, 45)]
@@ -0,0 +1,112 @@
+# Import Standard Packages
+import asyncio
+
+# Import Other Packages
+import pytest
+
+from modules import db, eth_async
+
+TRANSFER_ABI = {
+    "anonymous": False,
+    "name": "Transfer",
+    "type": "event",
+    "inputs": [
+        {"indexed": True, "name": "from", "type": "address"},
+        {"indexed": True, "name": "to", "type": "address"},
+        {"indexed": False, "name": "value", "type": "uint256"}
+    ]
+}
+
+##################################################
+class FakeEvent:
+    """
+    Stand in for a contract event, called to get the event object.
+    """
+    address = "0x0000000000000000000000000000000000000001"
+    abi = TRANSFER_ABI
+
+    def __call__(self):
+        return self
+
+##################################################
+class FakeNode:
+    """
+    Stand in for AsyncWeb3. The first block window is refused,
+    the others wait until they are cancelled.
+    """
+    def __init__(self):
+        self.eth = self
+        self.cancelled = []
+
+    async def get_logs(self, params):
+        if params["fromBlock"] == 1:
+            raise ValueError("query returned more than 10000 results")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            self.cancelled.append(params["fromBlock"])
+
+##################################################
+def test_failed_connect_is_retried(monkeypatch):
+    attempts = []
+
+    async def connect():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ConnectionError("node down")
+        return "w3"
+
+    monkeypatch.setattr(eth_async, "connect", connect)
+    monkeypatch.setattr(eth_async, "WEB3", None)
+
+    async def main():
+        with pytest.raises(ConnectionError):
+            await eth_async.get_web3()
+        return await eth_async.get_web3()
+
+    assert asyncio.run(main()) == "w3"
+    assert len(attempts) == 2
+
+##################################################
+def test_event_logs_error_waits_for_cancelled_windows(monkeypatch):
+    node = FakeNode()
+
+    async def get_web3():
+        return node
+
+    monkeypatch.setattr(eth_async, "get_web3", get_web3)
+
+    async def main():
+        with pytest.raises(ValueError):
+            await eth_async.get_event_logs(FakeEvent(), 1, 3, gap=1, workers=3)
+        # Every other window has finished cancelling before the error is raised
+        return sorted(node.cancelled)
+
+    assert asyncio.run(main()) == [2, 3]
+
+##################################################
+def test_get_block_data_stores_blocks_off_the_loop(database, monkeypatch):
+    class FakeBlockNode:
+        eth = None
+
+        async def get_block(self, number, full):
+            return {"number": number, "timestamp": 1000 + number}
+
+    node = FakeBlockNode()
+    node.eth = node
+    fetched = []
+
+    async def get_web3():
+        fetched.append(1)
+        return node
+
+    monkeypatch.setattr(eth_async, "get_web3", get_web3)
+
+    async def main():
+        return [await eth_async.get_block_data(5), await eth_async.get_block_data(5)]
+
+    assert asyncio.run(main()) == [{"number": 5, "timestamp": 1005}] * 2
+    assert len(fetched) == 1
+
+    # Written on the DB thread's own connection, to the same DB
+    assert db.get_block(5)[1] == 1005
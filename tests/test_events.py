@@ -0,0 +1,108 @@
+# Import Other Packages
+from hexbytes import HexBytes
+from web3 import Web3
+from web3.datastructures import AttributeDict
+
+from modules import activity, columnar, db, events
+
+TOPIC = Web3.keccak(text="Transfer(address,address,uint256)")
+CONTRACT = "0x2A8e1E676Ec238d8A992307B495b45B3fEAa5e86"
+ZERO = "0x0000000000000000000000000000000000000000"
+ALICE = Web3.to_checksum_address("0x000000000000000000000000000000000000a11c")
+BOB = Web3.to_checksum_address("0x0000000000000000000000000000000000000b0b")
+
+##################################################
+def raw_log(block, log_index, sender, receiver, value):
+    """
+    Function to build a Transfer log in the shape eth_getLogs
+    returns it through web3 (without event decoding).
+    """
+    return AttributeDict({
+        "address": CONTRACT,
+        "topics": [TOPIC, HexBytes(bytes(12) + bytes.fromhex(sender[2:])), HexBytes(bytes(12) + bytes.fromhex(receiver[2:]))],
+        "data": HexBytes(value.to_bytes(32, "big")),
+        "blockNumber": block,
+        "transactionIndex": 0,
+        "logIndex": log_index,
+        "transactionHash": HexBytes(block.to_bytes(32, "big")),
+        "blockHash": HexBytes(bytes(32))
+    })
+
+LOGS = [
+    raw_log(10, 0, ZERO, ALICE, 100),
+    raw_log(11, 0, ALICE, BOB, 40),
+    raw_log(12, 1, ZERO, BOB, 5),
+    raw_log(15, 0, BOB, ALICE, 2**200)
+]
+
+##################################################
+def test_to_rows_decodes_raw_logs():
+    row = events.to_rows(CONTRACT, LOGS[1:2])[0]
+    assert row == (CONTRACT, 11, 0, 0, "0x" + (11).to_bytes(32, "big").hex(), "0x" + bytes(32).hex(), ALICE, BOB, "40")
+
+##################################################
+def test_transfer_batches_stream_in_chunks(database):
+    db.replace_events(CONTRACT, 0, 10, 15, events.to_rows(CONTRACT, LOGS))
+
+    batches = list(events.iter_transfer_batches(CONTRACT, 0, 20, chunk_size=3))
+    assert [len(batch) for batch in batches] == [3, 1]
+    assert batches[0].table is batches[1].table
+    assert list(batches[1].value) == [2**200]
+
+    # Nothing stored in the range
+    assert list(events.iter_transfer_batches(CONTRACT, 100, 200)) == []
+
+##################################################
+def test_activity_from_batches_matches_single_batch(database):
+    db.replace_events(CONTRACT, 0, 10, 15, events.to_rows(CONTRACT, LOGS))
+
+    chunked = activity.from_batches(events.iter_transfer_batches(CONTRACT, 0, 20, chunk_size=1))
+    whole = activity.from_batches([columnar.from_raw_logs(LOGS)])
+
+    for output in [chunked, whole]:
+        assert output.addresses() == [ZERO, ALICE, BOB]
+        assert [output.count(address) for address in output.addresses()] == [2, 3, 3]
+        assert (output.first_block(ALICE), output.last_block(ALICE)) == (10, 15)
+        assert (output.first_block(BOB), output.last_block(BOB)) == (11, 15)
+
+##################################################
+def test_minted_to():
+    batch = columnar.from_raw_logs(LOGS)
+    assert batch.table.addresses(batch.minted_to()) == [ALICE, BOB]
+
+##################################################
+class FakeToken:
+    """
+    Stand in for a token contract, only its address and event
+    are used by sync_transfer_logs.
+    """
+    address = CONTRACT
+    events = AttributeDict({"Transfer": None})
+
+##################################################
+def test_sync_catches_up_and_rewinds_for_reorgs(database, monkeypatch):
+    chain = list(LOGS)
+    fetched = []
+
+    def get_event_logs(event, from_block, to_block, gap, workers, decode):
+        fetched.append((from_block, to_block))
+        return [log for log in chain if from_block <= log["blockNumber"] <= to_block]
+
+    monkeypatch.setattr(events.eth, "get_event_logs", get_event_logs)
+    assert events.sync_transfer_logs(FakeToken, 10, 15, reorg_depth=3) == (10, 15)
+    assert db.get_event_sync(CONTRACT) == (10, 15)
+
+    # Block 15 is reorged out for a block 14, then the chain moves on to block 20
+    chain = LOGS[:3] + [raw_log(14, 0, BOB, ALICE, 7), raw_log(20, 0, ALICE, BOB, 1)]
+    assert events.sync_transfer_logs(FakeToken, None, 20, reorg_depth=3) == (10, 20)
+
+    # Only the last reorg_depth stored blocks are refetched
+    assert fetched == [(10, 15), (13, 20)]
+    assert db.get_event_sync(CONTRACT) == (10, 20)
+
+    rows = list(db.iter_events(CONTRACT, 0, 100))
+    assert [(row[1], row[8]) for row in rows] == [(10, "100"), (11, "40"), (12, "5"), (14, "7"), (20, "1")]
+
+    # Already up to date, nothing is fetched
+    events.sync_transfer_logs(FakeToken, None, 20, reorg_depth=3)
+    assert len(fetched) == 2
@@ -0,0 +1,88 @@
+# Import Other Packages
+from web3.datastructures import AttributeDict
+import numpy as np
+
+from modules import columnar, replay
+from test_events import ALICE, BOB, LOGS, raw_log, ZERO
+
+##################################################
+def test_replay_token_balances_across_chunks():
+    table = columnar.AddressTable()
+    batches = [columnar.from_raw_logs(LOGS[:2], table), columnar.from_raw_logs(LOGS[2:], table)]
+
+    balances = replay.replay_balances(batches)
+    assert balances == {ALICE: 60 + 2**200, BOB: 45 - 2**200}
+
+    # Stop at a target block
+    assert replay.replay_balances(batches, to_block=11) == {ALICE: 60, BOB: 40}
+
+##################################################
+def test_replay_rebasing_credits():
+    # Credits per token halves at block 20, so rebasing balances double
+    logs = [raw_log(10, 0, ZERO, ALICE, 100), raw_log(30, 0, ALICE, BOB, 50)]
+    rebases = (np.array([20 * replay.KEY_SHIFT], dtype=np.int64), np.array([5 * 10**26], dtype=object))
+
+    balances = replay.replay_balances([columnar.from_raw_logs(logs)], 40, rebases)
+    assert balances == {ALICE: 150, BOB: 50}
+
+    # Opted out accounts keep their token balance
+    balances = replay.replay_balances([columnar.from_raw_logs(logs)], 40, rebases, non_rebasing=[ALICE])
+    assert balances == {ALICE: 50, BOB: 50}
+
+##################################################
+def test_credits_per_token_at():
+    rebases = (np.array([5, 9], dtype=np.int64), np.array([7, 3], dtype=object))
+    assert list(replay.credits_per_token_at(rebases, np.array([1, 6, 10, 12]), 10)) == [10, 7, 3, 3]
+
+##################################################
+def test_replay_nothing():
+    assert replay.replay_balances([]) == {}
+
+##################################################
+def rebase_keys(*blocks):
+    return np.array([block * replay.KEY_SHIFT for block in blocks], dtype=np.int64)
+
+def cpts(*values):
+    output = np.empty(len(values), dtype=object)
+    output[:] = values
+    return output
+
+##################################################
+def test_replay_opt_out_and_in_mid_history():
+    logs = [raw_log(10, 0, ZERO, ALICE, 100), raw_log(35, 0, ALICE, BOB, 50)]
+    rebases = (rebase_keys(20, 30, 38), cpts(5 * 10**26, 25 * 10**25, 125 * 10**24))
+
+    # Alice opts out at block 25, after the first rebase doubled her 100 to 200
+    opt_out = (rebase_keys(25), [ALICE], [False])
+    balances = replay.replay_balances([columnar.from_raw_logs(logs)], 36, rebases, opt_changes=opt_out)
+    assert balances == {ALICE: 150, BOB: 50}
+
+    # She opts back in at block 37, so the rebase at 38 doubles her again
+    opt_in = (rebase_keys(25, 37), [ALICE, ALICE], [False, True])
+    balances = replay.replay_balances([columnar.from_raw_logs(logs)], 40, rebases, opt_changes=opt_in)
+    assert balances == {ALICE: 300, BOB: 100}
+
+    # An account whose first event is an opt in was non rebasing before it
+    balances = replay.replay_balances([columnar.from_raw_logs(logs)], 40, rebases, opt_changes=(rebase_keys(37), [BOB], [True]))
+    assert balances == {ALICE: 700, BOB: 100}
+
+##################################################
+def test_get_rebases_scales_legacy_events(monkeypatch):
+    class Events:
+        TotalSupplyUpdated = "legacy"
+        TotalSupplyUpdatedHighres = "highres"
+
+    class Contract:
+        address = ALICE
+        events = Events
+
+    def log(block, cpt):
+        return AttributeDict({"blockNumber": block, "logIndex": 0, "args": AttributeDict({"rebasingCreditsPerToken": cpt})})
+
+    logs = {"legacy": [log(5, 9 * 10**17), log(8, 8 * 10**17)], "highres": [log(12, 7 * 10**26)]}
+    monkeypatch.setattr(replay.eth, "get_contract", lambda address, abi: Contract)
+    monkeypatch.setattr(replay.eth, "get_event_logs", lambda event, *args: logs[event])
+
+    keys, credits_per_token = replay.get_rebases(Contract, 1, 20)
+    assert list(keys) == list(rebase_keys(5, 8, 12))
+    assert list(credits_per_token) == [9 * 10**26, 8 * 10**26, 7 * 10**26]
@@ -0,0 +1,68 @@
+# Import Standard Packages
+import os
+
+# Import Other Packages
+import pytest
+
+from modules import columnar, db, events, report
+from tests.test_events import ALICE, BOB, LOGS
+
+##################################################
+class StubReport(report.Report):
+    """
+    Report with the stages replaced, rows are (address, pid).
+    """
+    def __init__(self, fail=None):
+        super().__init__("stub", None, [])
+        self.fail = fail
+
+    def fetch(self, executor, addresses, block):
+        return {}
+
+    def process(self, addresses, fetched):
+        if self.fail in addresses:
+            raise ValueError("failed " + self.fail)
+        return [[address, os.getpid()] for address in addresses]
+
+CHUNKS = [["a", "b"], ["c", "d"], ["e"], ["f", "g"]]
+
+##################################################
+def test_process_pool_keeps_chunk_order(database):
+    db.start_writer()
+    try:
+        results = list(StubReport().process_pool(CHUNKS, 100, 2))
+        assert [[row[0] for row in rows] for rows in results] == CHUNKS
+        assert os.getpid() not in set(row[1] for rows in results for row in rows)
+
+        # The writer is restarted and the shared report cleared
+        assert db.WRITER is not None
+        assert report.WORKER is None
+    finally:
+        db.stop_writer()
+
+##################################################
+def test_process_pool_error_cleans_up(database):
+    with pytest.raises(ValueError):
+        list(StubReport(fail="c").process_pool(CHUNKS, 100, 2))
+    assert report.WORKER is None
+    db.stop_writer()
+
+##################################################
+def test_get_workers():
+    assert report.get_workers(["ousd.py"]) == 1
+    assert report.get_workers(["ousd.py", "--workers", "4"]) == 4
+
+##################################################
+def test_run_skips_addresses_without_events(database, monkeypatch):
+    monkeypatch.setattr(events, "sync_transfer_logs", lambda token, start_block, block, gap: (1, block))
+    monkeypatch.setattr(events, "iter_transfer_batches", lambda address, start_block, block, table: iter([columnar.from_raw_logs(LOGS[:2], table)]))
+
+    class Token:
+        address = "0x0000000000000000000000000000000000000001"
+
+    never = "0x000000000000000000000000000000000000dEaD"
+    columns = [report.address(), report.event_count("events")]
+    report.Report("skip", Token(), columns, block=20, addresses=[ALICE, never, BOB]).run()
+
+    with open("files/output/skip_20.csv") as file:
+        assert file.read().split() == ["address,events", ALICE + ",2", BOB + ",1"]
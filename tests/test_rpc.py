@@ -0,0 +1,169 @@
+# Import Other Packages
+from hexbytes import HexBytes
+import pytest
+import requests
+
+from modules import rpc
+
+ADDRESS = "0x0000000000000000000000000000000000000001"
+
+##################################################
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """
+    Fixture to point the shared RPC cache at a fresh file.
+    """
+    cache = rpc.Cache(str(tmp_path / "rpc_cache.db"))
+    cache.head = 1000
+    monkeypatch.setattr(rpc, "CACHE", cache)
+    yield cache
+    cache.close()
+
+##################################################
+def test_key_is_stable(cache):
+    call = {"to": ADDRESS, "data": "0x70a08231"}
+    key = cache.key("eth_call", [call, hex(900)])
+    assert key is not None
+
+    # Param order and bytes vs hex call data don't change the key
+    assert cache.key("eth_call", [{"data": HexBytes("0x70a08231"), "to": ADDRESS}, hex(900)]) == key
+    assert cache.key("eth_call", [call, hex(901)]) != key
+    assert cache.key("eth_getBalance", [ADDRESS, hex(900)]) != key
+
+##################################################
+def test_key_skips_unpinned_and_recent_blocks(cache):
+    assert cache.key("eth_getBalance", [ADDRESS, "latest"]) is None
+    assert cache.key("eth_getBalance", [ADDRESS, hex(1000 - rpc.REORG_DEPTH + 1)]) is None
+    assert cache.key("eth_getBalance", [ADDRESS, hex(1000 - rpc.REORG_DEPTH)]) is not None
+    assert cache.key("eth_getLogs", [{"fromBlock": hex(10), "toBlock": "latest"}]) is None
+    assert cache.key("eth_getLogs", [{"fromBlock": hex(10), "toBlock": hex(990)}]) is None
+    assert cache.key("eth_blockNumber", []) is None
+
+    # Hash keyed calls don't depend on the head
+    assert cache.key("eth_getTransactionReceipt", ["0x" + "ab" * 32]) is not None
+
+##################################################
+def test_key_needs_head(cache):
+    cache.head = None
+    assert cache.key("eth_getBalance", [ADDRESS, hex(5)]) is None
+    assert cache.needs_head("eth_getBalance", [ADDRESS, hex(5)])
+    assert not cache.needs_head("eth_getBalance", [ADDRESS, "latest"])
+    assert not cache.needs_head("eth_getTransactionReceipt", ["0x" + "ab" * 32])
+
+##################################################
+class FakeNode:
+    """
+    Stand in for the provider below the middleware, counting
+    the requests that reach it.
+    """
+    def __init__(self, head=1000):
+        self.head = head
+        self.requests = []
+
+    def __call__(self, method, params):
+        self.requests.append(method)
+        if method == "eth_blockNumber":
+            return {"jsonrpc": "2.0", "id": 1, "result": hex(self.head)}
+        return {"jsonrpc": "2.0", "id": 1, "result": "0x10"}
+
+##################################################
+def test_middleware_hits_and_misses(cache):
+    node = FakeNode()
+    middleware = rpc.cache_middleware(node, None)
+
+    assert middleware("eth_getBalance", [ADDRESS, hex(500)])["result"] == "0x10"
+    assert middleware("eth_getBalance", [ADDRESS, hex(500)])["result"] == "0x10"
+    assert middleware("eth_getBalance", [ADDRESS, "latest"])["result"] == "0x10"
+    assert node.requests == ["eth_getBalance", "eth_getBalance"]
+    assert cache.hits["eth_getBalance"] == 1 and cache.misses["eth_getBalance"] == 1
+
+##################################################
+def test_middleware_pins_head_on_first_use(cache):
+    cache.head = None
+    node = FakeNode(head=520)
+    middleware = rpc.cache_middleware(node, None)
+
+    # The block turns out to be near the head, so it is never cached
+    middleware("eth_getBalance", [ADDRESS, hex(500)])
+    middleware("eth_getBalance", [ADDRESS, hex(500)])
+    assert cache.head == 520
+    assert node.requests == ["eth_blockNumber", "eth_getBalance", "eth_getBalance"]
+
+##################################################
+class FakeResponse:
+    def __init__(self, status, body):
+        self.status_code = status
+        self.body = body
+
+    def raise_for_status(self):
+        if self.status_code != 200:
+            raise requests.HTTPError(str(self.status_code))
+
+    def json(self):
+        return self.body
+
+class FakeSession:
+    """
+    Stand in for requests.Session. Each post returns the next
+    canned (status, body) reply, or by default answers every call
+    in reverse order with its own id as the result, or an error
+    for eth_fail.
+    """
+    def __init__(self, replies=()):
+        self.replies = list(replies)
+        self.posts = []
+
+    def post(self, endpoint, json, timeout):
+        self.posts.append(json)
+        if self.replies:
+            return FakeResponse(*self.replies.pop(0))
+        body = []
+        for request in reversed(json):
+            if request["method"] == "eth_fail":
+                body.append({"id": request["id"], "error": {"code": -32000, "message": "failed"}})
+            else:
+                body.append({"id": request["id"], "result": hex(request["id"])})
+        return FakeResponse(200, body)
+
+##################################################
+def test_batch_matches_ids_and_auto_flushes():
+    session = FakeSession()
+    with rpc.Batch("http://node", max_size=2, session=session, cache=None) as batch:
+        futures = [batch.add("eth_blockNumber", []) for i in range(5)]
+        assert len(session.posts) == 2 and all(len(each) == 2 for each in session.posts)
+
+    assert len(session.posts) == 3
+    ids = [request["id"] for post in session.posts for request in post]
+    assert [future.result() for future in futures] == [hex(each) for each in ids]
+
+##################################################
+def test_batch_per_call_errors():
+    with rpc.Batch("http://node", session=FakeSession(), cache=None) as batch:
+        ok = batch.add("eth_blockNumber", [])
+        failed = batch.add("eth_fail", [])
+
+    assert ok.result() is not None
+    with pytest.raises(rpc.RPCError):
+        failed.result()
+
+##################################################
+def test_batch_retries_failed_requests(monkeypatch):
+    monkeypatch.setattr(rpc, "sleep", lambda seconds: None)
+    session = FakeSession([(502, None), (200, {"error": {"code": -32005, "message": "rate limited"}})])
+    with rpc.Batch("http://node", session=session, cache=None) as batch:
+        future = batch.add("eth_blockNumber", [])
+
+    assert len(session.posts) == 3
+    assert future.result() == hex(session.posts[-1][0]["id"])
+
+##################################################
+def test_batch_fails_every_call_after_retries(monkeypatch):
+    monkeypatch.setattr(rpc, "sleep", lambda seconds: None)
+    session = FakeSession([(503, None)] * 3)
+    with rpc.Batch("http://node", session=session, cache=None, retries=2) as batch:
+        futures = [batch.add("eth_blockNumber", []) for i in range(2)]
+
+    assert len(session.posts) == 3
+    for future in futures:
+        with pytest.raises(requests.HTTPError):
+            future.result()
@@ -13,7 +13,8 @@
 
 # Imports
 import sys
-import requests
+import json
+from modules import api
 from web3 import Web3
 from ens import ENS
 
@@ -28,7 +29,12 @@ URL = "https://eth-mainnet.g.alchemy.com/nft/v2/" + ALCHEMY_KEY + "/getOwnersFor
 
 ALCHEMY = "https://eth-mainnet.alchemyapi.io/v2/" + ALCHEMY_KEY
 WEB3 =  Web3(Web3.HTTPProvider(ALCHEMY))
-ns = ENS.fromWeb3(WEB3)
+ns = ENS.from_web3(WEB3)
+
+# ENS ReverseRecords resolves many reverse records per call and forward-verifies them
+REVERSE_RECORDS = "0x3671aE578E63FdF66ad4F3E12CC0c0d71Ac7510C"
+with open("modules/abi/reverse_records.json") as f:
+    REVERSE_RECORDS_ABI = json.load(f)
 
 
 ##################################################
@@ -48,26 +54,22 @@ def main(address):
     # Sort dict in descending order by values
     sorted_owners = dict(sorted(owner_data.items(), key=lambda item: item[1], reverse=True))
     
+    # Resolve ENS names for the top 10 holders in a single call
+    top_holders = list(sorted_owners.keys())[:10]
+    top_holder_names = get_ens_names(top_holders)
+
     # Pull top holder and held quantity for output
-    top_holder = list(sorted_owners.keys())[0]
-    top_holder_ens = get_ens_name(top_holder)
-    top_holder_quantitiy = list(sorted_owners.values())[0]
+    top_holder = top_holders[0]
+    top_holder_ens = top_holder_names[top_holder]
+    top_holder_quantitiy = sorted_owners[top_holder]
     print("The top holder of Pudgy Penguins is " + top_holder_ens + " who holds " + str(top_holder_quantitiy) + " tokens.")
 
     # Pull top 10 holders and quantities held for output
-    # Ugly code to iterate over the first 10 values in a sorted dict
-    i = 1
-    for holder in sorted_owners:
-        each_holder = get_ens_name(holder)
+    for holder in top_holders:
+        each_holder = top_holder_names[holder]
         each_holder_quantity = sorted_owners[holder]
         print(each_holder + " - " + str(each_holder_quantity))
 
-        if i < 10:
-            i+=1
-            continue
-        else:
-            break
-
     # Set up holder distribution dict
     hd = {
         1: 0, # 0-1
@@ -148,9 +150,7 @@ def get_data(url):
     """
     Function to fetch data from URL and return JSON.
     """
-    with requests.Session() as s:
-        response = s.get(url)
-    return response.json()
+    return api.get_json(url)
 
 ##################################################
 def get_ens_name(address):
@@ -162,7 +162,24 @@ def get_ens_name(address):
     if ens_lookup is None:
         return address
     else:
-        return ns.name(address)
+        return ens_lookup
+
+##################################################
+def get_ens_names(addresses):
+    """
+    Function to lookup the ens names for a list of addresses in
+    one ReverseRecords call, falling back to the address if
+    there is no name or the batch call fails.
+    """
+    addresses = [Web3.to_checksum_address(address) for address in addresses]
+    reverse_records = WEB3.eth.contract(address=REVERSE_RECORDS, abi=REVERSE_RECORDS_ABI)
+
+    try:
+        names = reverse_records.functions.getNames(addresses).call()
+    except Exception as e:
+        return {address.lower(): get_ens_name(address) for address in addresses}
+
+    return {address.lower(): name or address.lower() for address, name in zip(addresses, names)}
 
 
 ##################################################
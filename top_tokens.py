@@ -13,12 +13,11 @@
 
 # Imports
 from time import time, sleep
-from modules import data, eth, db, dexguru, apyvision, holders
-import requests
+from modules import api, data, eth, db, dexguru, apyvision, holders
 import sys
 
 DEBUG = False
-BLOCK = eth.get_latest_block()
+BLOCK = None # Pinned to the latest block at runtime unless set here
 
 ##################################################
 def main():
@@ -30,6 +29,9 @@ def main():
 
     print("\nStarting Token Analysis.")
 
+    # Pin the block for the whole run
+    block = BLOCK or eth.get_latest_block()
+
     output = []
     i = 1
 
@@ -62,11 +64,14 @@ def main():
     token_pool_addresses = data.flatten(list(token_pools.values()))
 
     # Get holder data on pools (slow-mode)
-    pool_owners = holders.scrape_slow(token_pool_addresses, BLOCK)
+    pool_owners = holders.scrape_slow(token_pool_addresses, block)
 
     # Determine token unique LP count
     token_lp_count = get_lp_count(token_pools, pool_owners)
 
+    # Fetch cached contract details for every token in one query
+    contracts = db.get_contracts(t_addresses)
+
     # Iterate over token list and prepare for data dump
     for token in eth_tokens:
         print("\rProcessing contract " + str(i) + " / " + str(len(eth_tokens)) + (20 * " "), end="", flush=True)
@@ -79,7 +84,7 @@ def main():
         eth_proxy = ""
 
         # Fetch contract data from DB else process
-        contract_data = process_contract(address)
+        contract_data = contracts.get(address) or process_contract(address)
 
         # Check if contract is verified on Etherscan
         etherscan_verified = True if contract_data[1] == 1 else False
@@ -236,9 +241,7 @@ def get_data(url):
     """
     Function to fetch data from URL and return JSON output.
     """
-    with requests.Session() as s:
-        response = s.get(url)
-    return response.json()
+    return api.get_json(url)
 
 ##################################################
 def process_contract(address):
@@ -258,11 +261,8 @@ def process_contract(address):
         # Pull contract deploy date
         deploy_date = eth.get_contract_deploy_date(address)
 
-        # Add contract to the DB
-        db.add_contract(address, is_verified, deploy_date)
-
-        # Pull standardized data from DB
-        contract_details = db.get_contract(address)
+        # Add contract to the DB and use the new row values
+        contract_details = db.add_contract(address, is_verified, deploy_date)
 
     return contract_details
 
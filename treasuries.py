@@ -6,11 +6,9 @@
 
 # Imports
 import sys
-import requests
-from modules import data, eth
+from modules import api, data, eth
 
 DEBUG = False
-ETH_PRICE = float(eth.get_eth_price())
 LATEST_BLOCK = 18251964 # eth.get_latest_block()
 
 USDC = eth.get_contract("0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48")
@@ -26,6 +24,23 @@ SFRXETH = eth.get_contract("0xac3E018457B222d93114458476f3E3416Abbe38F")
 SETH2 = eth.get_contract("0xFe2e637202056d30016725477c5da089Ab0A043A")
 RETH2 = eth.get_contract("0x20BC832ca081b91433ff6c17f85701B6e92486c5")
 
+""" UPDATE FOR NEW TOKENS """
+# Output key, contract and decimal base for each ERC20 balance
+TOKENS = [
+    ("usdc", USDC, 1e6),
+    ("usdt", USDT, 1e6),
+    ("dai", DAI, 1e18),
+    ("weth", WETH, 1e18),
+    ("steth", STETH, 1e18),
+    ("wsteth", WSTETH, 1e18),
+    ("cbeth", CBETH, 1e18),
+    ("reth", RETH, 1e18),
+    ("frxeth", FRXETH, 1e18),
+    ("sfrxeth", SFRXETH, 1e18),
+    ("seth2", SETH2, 1e18),
+    ("reth2", RETH2, 1e18)
+]
+
 
 ##################################################
 def main():
@@ -117,59 +132,21 @@ def get_balances(input):
 def get_balance(addresses):
     """
     Function to determine the token balance for a provided
-    Ethereum treasury address.
-    UGLY UGLY UGLY
+    Ethereum treasury address. Token balances for all of the
+    treasury addresses are fetched in one Multicall batch.
     """
+    addresses = [eth.get_checksum(address) for address in addresses]
+    token_balances = eth.get_token_balances([token[1] for token in TOKENS], addresses, LATEST_BLOCK)
+    eth_balances = eth.get_balances(addresses, LATEST_BLOCK)
+
+    output = {"eth": 0}
+    for token in TOKENS:
+        output[token[0]] = 0
 
-    usdc_balance = 0
-    usdt_balance = 0
-    dai_balance = 0
-
-    eth_balance = 0
-    weth_balance = 0
-    steth_balance = 0
-    wsteth_balance = 0
-    cbeth_balance = 0
-    reth_balance = 0
-    frxeth_balance = 0
-    sfrxeth_balance = 0
-    seth2_balance = 0
-    reth2_balance = 0
-
-    for address in addresses:
-
-        address = eth.get_checksum(address)
-
-        usdc_balance += round(eth.get_token_balance(USDC, address, LATEST_BLOCK) / 1e6, 2)
-        usdt_balance += round(eth.get_token_balance(USDT, address, LATEST_BLOCK) / 1e6, 2)
-        dai_balance += round(eth.get_token_balance(DAI, address, LATEST_BLOCK) / 1e18, 2)
-        eth_balance += round(eth.get_balance(address, LATEST_BLOCK) / 1e18, 2)
-        weth_balance += round(eth.get_token_balance(WETH, address, LATEST_BLOCK) / 1e18, 2)
-        steth_balance += round(eth.get_token_balance(STETH, address, LATEST_BLOCK) / 1e18, 2)
-        wsteth_balance += round(eth.get_token_balance(WSTETH, address, LATEST_BLOCK) / 1e18, 2)
-        cbeth_balance += round(eth.get_token_balance(CBETH, address, LATEST_BLOCK) / 1e18, 2)
-        reth_balance += round(eth.get_token_balance(RETH, address, LATEST_BLOCK) / 1e18, 2)
-        frxeth_balance += round(eth.get_token_balance(FRXETH, address, LATEST_BLOCK) / 1e18, 2)
-        sfrxeth_balance += round(eth.get_token_balance(SFRXETH, address, LATEST_BLOCK) / 1e18, 2)
-        seth2_balance += round(eth.get_token_balance(SETH2, address, LATEST_BLOCK) / 1e18, 2)
-        reth2_balance += round(eth.get_token_balance(RETH2, address, LATEST_BLOCK) / 1e18, 2)
-
-    output = {
-        'usdc': usdc_balance,
-        'usdt': usdt_balance,
-        'dai': dai_balance,
-        'eth': eth_balance,
-        'weth': weth_balance,
-        'steth': steth_balance,
-        'wsteth': wsteth_balance,
-        'cbeth': cbeth_balance,
-        'reth': reth_balance,
-        'frxeth': frxeth_balance,
-        'sfrxeth': sfrxeth_balance,
-        'seth2': seth2_balance,
-        'reth2': reth2_balance
-
-    }
+    for balances, eth_wei in zip(token_balances, eth_balances):
+        output["eth"] += round(eth_wei / 1e18, 2)
+        for balance, token in zip(balances, TOKENS):
+            output[token[0]] += round(balance / token[2], 2)
 
     return output
 
@@ -179,9 +156,7 @@ def get_data(url):
     """
     Function to fetch data from URL and return JSON
     """
-    with requests.Session() as s:
-        response = s.get(url)
-    return response.json()
+    return api.get_json(url)
 
 
 ##################################################
@@ -14,20 +14,22 @@ def main():
 
     # Import address list
     print("Loading blocks...")
-    blocks = data.load("./files/input/block_data.csv", True)
-    output_list = []
-    block_count = len(blocks)
-
-    for block in blocks:
-        block_number = int(block[2])
-        row_number = block[0]
-        print("Processing block " + str(row_number - block_count + 1) + "/" + str(block_count) + "...")
-        block_data = [block[2], eth.get_total_supply(OETH, block_number)]
-        output_list.append(block_data)
+    input_name = "./files/input/block_data.csv"
+    blocks = data.load_records(input_name)
+    block_count = data.count_rows(input_name)
 
+    # Stream results to CSV, skipping blocks written before a crash
     output_path = "files/output"
     output_name = "oeth_total_supply.csv"
-    data.save(output_list, output_path, output_name, ["block", "total_supply"])
+    with data.StreamWriter(output_path, output_name, ["block", "total_supply"], {"block": int}, chunk_size=100, resume=True) as writer:
+        done = writer.keys()
+
+        for block in blocks:
+            block_number = int(block[2])
+            row_number = block[0]
+            if block_number in done: continue
+            print("Processing block " + str(row_number - block_count + 1) + "/" + str(block_count) + "...")
+            writer.write([block[2], eth.get_total_supply(OETH, block_number)])
 
 
 ##################################################
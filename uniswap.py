@@ -9,8 +9,7 @@
 """
 
 from time import sleep, time
-from modules import data
-import requests
+from modules import api, data
 import sys
 
 DEBUG = False
@@ -96,9 +95,7 @@ def get_data(url):
     """
     Function to fetch data from URL and return JSON output.
     """
-    with requests.Session() as s:
-        response = s.get(url)
-    return response.json()
+    return api.get_json(url)
 
 ##################################################
 # Runtime Entry Point
@@ -16,8 +16,7 @@ sys.path.append('..')
 
 # Imports
 from time import sleep, time
-from modules import data
-import requests
+from modules import api, data
 import math
 
 ##################################################
@@ -71,9 +70,7 @@ def get_data(url):
     """
     Function to fetch data from URL and return JSON output
     """
-    with requests.Session() as s:
-        response = s.get(url)
-    return response.json()
+    return api.get_json(url)
 
 
 ##################################################